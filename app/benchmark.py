@@ -0,0 +1,419 @@
+"""
+Reproducible latency and throughput benchmarks.
+
+Generates a synthetic PDF, DOCX and TXT corpus of several sizes, then times
+text extraction, every model class and the API endpoints (in-process, with
+the result cache disabled). Reports throughput and p50/p95/p99 latency per
+suite, document size and format.
+
+In stub mode (the default) models are built around offline stand-ins from
+app.models.stubs, measuring everything around the model calls without any
+download; real mode loads the configured models. Results can be saved as a
+baseline and later runs compared against it to catch regressions; a
+benchmark only counts as regressed when every timed round of the run was
+slower than every round of the baseline, so timer and scheduling noise is
+not reported.
+
+Usage:
+    document-intelligence-benchmark --save-baseline benchmarks/baseline.json
+    document-intelligence-benchmark --baseline benchmarks/baseline.json
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.utils.document_context import DocumentContext
+from app.utils.document_loader import load_document
+from app.utils.synthetic import CORPUS_FORMATS, CORPUS_SIZES, generate_corpus
+
+logger = logging.getLogger("app.benchmark")
+
+SUITES = ("load", "models", "endpoints")
+BENCHMARK_MODES = ("stub", "real")
+
+# Model name -> call timed by the models suite
+MODEL_CALLS = {
+    "extractor": lambda model, context, options: model.extract_key_information(context),
+    "classifier": lambda model, context, options: model.classify_document(context),
+    "summarizer": lambda model, context, options: model.generate_summary(context, **options)
+}
+
+# Endpoints timed by the endpoints suite
+ENDPOINTS = ("extract", "classify", "summarize", "process")
+
+def latency_stats(seconds: List[float], words: int = 0, rounds: int = 1) -> Dict[str, Any]:
+    """
+    Summarize the latencies of a series of calls.
+    
+    Args:
+        seconds: Duration of every call, round after round
+        words: Total words processed by the calls, for words per second
+        rounds: Number of timed rounds the calls were made in
+    
+    Returns:
+        Run count, mean and p50/p95/p99 latency in milliseconds, throughput,
+        and with several rounds the p50 latency of every round
+    """
+    values = np.asarray(seconds, dtype=float)
+    total = float(values.sum())
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    stats = {
+        "runs": len(values),
+        "mean_ms": round(float(values.mean()) * 1000, 3),
+        "p50_ms": round(float(p50) * 1000, 3),
+        "p95_ms": round(float(p95) * 1000, 3),
+        "p99_ms": round(float(p99) * 1000, 3),
+        "per_second": round(len(values) / total, 3) if total > 0 else 0.0
+    }
+    if words:
+        stats["words_per_second"] = round(words / total, 1) if total > 0 else 0.0
+    if rounds > 1 and len(values) % rounds == 0:
+        # Spread between rounds, used to tell regressions from noise
+        stats["round_p50_ms"] = [round(float(p50) * 1000, 3) for p50 in np.median(values.reshape(rounds, -1), axis=1)]
+    return stats
+
+def time_calls(call: Callable[[Any], Any], inputs: List[Any], repeat: int = 5,
+               warmup: int = 1) -> List[float]:
+    """
+    Time call over every input, repeat times after warmup untimed rounds.
+    
+    Returns:
+        Duration of every timed call in seconds
+    """
+    for _ in range(warmup):
+        for item in inputs:
+            call(item)
+    seconds = []
+    for _ in range(repeat):
+        for item in inputs:
+            started = time.perf_counter()
+            call(item)
+            seconds.append(time.perf_counter() - started)
+    return seconds
+
+def _by_size(corpus: List[Dict[str, Any]], file_format: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for document in corpus:
+        if file_format is None or document["format"] == file_format:
+            groups.setdefault(document["size"], []).append(document)
+    return groups
+
+def benchmark_loading(corpus: List[Dict[str, Any]], repeat: int = 5, warmup: int = 1) -> Dict[str, Dict[str, float]]:
+    """Time load_document per format and size, keyed "load/<format>/<size>"."""
+    results = {}
+    for file_format in dict.fromkeys(document["format"] for document in corpus):
+        for size, documents in _by_size(corpus, file_format).items():
+            seconds = time_calls(lambda document: load_document(document["path"]), documents, repeat, warmup)
+            words = sum(document["words"] for document in documents) * repeat
+            results[f"load/{file_format}/{size}"] = latency_stats(seconds, words, repeat)
+    return results
+
+def benchmark_models(corpus: List[Dict[str, Any]], registry: Any, summary_options: Dict[str, Any],
+                     models: Iterable[str] = tuple(MODEL_CALLS), profile: Optional[str] = None,
+                     repeat: int = 5, warmup: int = 1) -> Dict[str, Dict[str, float]]:
+    """
+    Time every model class per document size, keyed "models/<model>/<size>".
+    
+    Every call gets a fresh DocumentContext, so nothing is shared between
+    runs. Model loading is timed separately, keyed "models/<model>/load".
+    """
+    texts = {
+        size: [load_document(document["path"])[0] for document in documents]
+        for size, documents in _by_size(corpus, "txt").items()
+    }
+    
+    results = {}
+    for name in models:
+        if not registry.is_enabled(name):
+            logger.info("Skipping disabled model %s", name)
+            continue
+        started = time.perf_counter()
+        model = registry.get(name, profile)
+        results[f"models/{name}/load"] = {"seconds": round(time.perf_counter() - started, 3)}
+        
+        call = MODEL_CALLS[name]
+        for size, size_texts in texts.items():
+            seconds = time_calls(
+                lambda text: call(model, DocumentContext(text), summary_options), size_texts, repeat, warmup
+            )
+            words = sum(len(text.split()) for text in size_texts) * repeat
+            results[f"models/{name}/{size}"] = latency_stats(seconds, words, repeat)
+    return results
+
+def benchmark_endpoints(corpus: List[Dict[str, Any]], endpoints: Iterable[str] = ENDPOINTS,
+                        profile: Optional[str] = None, repeat: int = 5,
+                        warmup: int = 1) -> Dict[str, Dict[str, float]]:
+    """
+    Post every document to the API endpoints in-process, keyed "endpoints/<endpoint>/<size>".
+    
+    The application is imported here, so CACHE_ENABLED=false must be set
+    beforehand for requests to reach the models.
+    """
+    from fastapi.testclient import TestClient
+    
+    from app.main import app
+    
+    client = TestClient(app)
+    data = {"profile": profile} if profile else {}
+    
+    def post(endpoint: str, document: Dict[str, Any]) -> None:
+        with open(document["path"], "rb") as file:
+            response = client.post(
+                f"/{endpoint}", files={"file": (os.path.basename(document["path"]), file)}, data=data
+            )
+        if response.status_code != 200:
+            raise RuntimeError(f"/{endpoint} returned {response.status_code}: {response.text}")
+    
+    results = {}
+    for endpoint in endpoints:
+        for size, documents in _by_size(corpus).items():
+            seconds = time_calls(lambda document: post(endpoint, document), documents, repeat, warmup)
+            words = sum(document["words"] for document in documents) * repeat
+            results[f"endpoints/{endpoint}/{size}"] = latency_stats(seconds, words, repeat)
+    return results
+
+def compare_results(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                    metric: str = "p50_ms", tolerance: float = 0.2,
+                    min_difference_ms: float = 1.0) -> List[Dict[str, Any]]:
+    """
+    Compare a run against a baseline run.
+    
+    When both runs recorded the p50 latency of every round, the p50 metric
+    regresses only if the fastest round of the run is slower than the slowest
+    round of the baseline by more than the tolerance, so run-to-run noise
+    within the spread of the rounds is not reported.
+    
+    Args:
+        results: Benchmark results keyed like the baseline
+        baseline: Results of an earlier run
+        metric: Latency statistic to compare
+        tolerance: Relative slowdown above which a benchmark counts as regressed
+        min_difference_ms: Smallest absolute slowdown counted as a regression,
+            so timer noise on sub-millisecond benchmarks is not reported
+    
+    Returns:
+        One {"benchmark", "baseline", "current", "change", "regression"} entry
+        per benchmark present in both runs
+    """
+    comparison = []
+    for key, stats in results.items():
+        previous = baseline.get(key, {}).get(metric)
+        if metric not in stats or not previous:
+            continue
+        change = stats[metric] / previous - 1
+        
+        slowest, fastest = previous, stats[metric]
+        if metric == "p50_ms" and stats.get("round_p50_ms") and baseline[key].get("round_p50_ms"):
+            slowest, fastest = max(baseline[key]["round_p50_ms"]), min(stats["round_p50_ms"])
+        comparison.append({
+            "benchmark": key,
+            "baseline": previous,
+            "current": stats[metric],
+            "change": round(change, 4),
+            "regression": fastest > slowest * (1 + tolerance) and fastest - slowest > min_difference_ms
+        })
+    return comparison
+
+def machine_info(mode: str) -> Dict[str, Any]:
+    """Describe the machine and mode a run is timed on."""
+    return {
+        "mode": mode,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+def machine_mismatches(meta: Dict[str, Any], baseline_meta: Dict[str, Any]) -> List[str]:
+    """
+    List the machine details in which a run differs from its baseline.
+    
+    Args:
+        meta: machine_info of the run
+        baseline_meta: Metadata of the baseline report
+    
+    Returns:
+        One "<field>: <baseline> != <run>" entry per differing detail
+    """
+    return [
+        f"{field}: {baseline_meta.get(field)} != {value}"
+        for field, value in meta.items()
+        if baseline_meta.get(field) != value
+    ]
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(args: argparse.Namespace, corpus_dir: str) -> Dict[str, Any]:
+    """Generate the corpus and run the selected suites, returning the report."""
+    from app.core.config import get_settings
+    from app.models.stubs import stub_models
+    
+    sizes = _split(args.sizes)
+    corpus = generate_corpus(corpus_dir, sizes, _split(args.formats), args.documents, args.seed)
+    logger.info("Generated %d documents in %s", len(corpus), corpus_dir)
+    
+    suites = _split(args.suites)
+    results: Dict[str, Dict[str, float]] = {}
+    stubs = stub_models() if args.mode == "stub" else contextlib.nullcontext()
+    with stubs:
+        if "load" in suites:
+            results.update(benchmark_loading(corpus, args.repeat, args.warmup))
+        
+        if "models" in suites:
+            from app.models.registry import create_model_registry
+            
+            settings = get_settings()
+            summary_options = {
+                "hierarchical": settings.summary_hierarchical,
+                "max_reduce_depth": settings.summary_max_reduce_depth,
+                "mode": settings.summary_mode
+            }
+            registry = create_model_registry(settings)
+            results.update(benchmark_models(
+                corpus, registry, summary_options, profile=args.profile, repeat=args.repeat, warmup=args.warmup
+            ))
+        
+        if "endpoints" in suites:
+            results.update(benchmark_endpoints(
+                corpus, profile=args.profile, repeat=args.repeat, warmup=args.warmup
+            ))
+    
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            **machine_info(args.mode),
+            "seed": args.seed,
+            "documents": args.documents,
+            "repeat": args.repeat,
+            "created_at": time.time()
+        },
+        "results": results
+    }
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def format_results(results: Dict[str, Dict[str, float]]) -> str:
+    """Render results as an aligned text table."""
+    lines = [f"{'benchmark':<36} {'runs':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'per s':>9} {'words/s':>11}"]
+    for key, stats in results.items():
+        if "runs" not in stats:
+            lines.append(f"{key:<36} {'':>5} {stats['seconds'] * 1000:>10.1f}")
+            continue
+        lines.append(
+            f"{key:<36} {stats['runs']:>5} {stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f} "
+            f"{stats['p99_ms']:>10.1f} {stats['per_second']:>9.2f} {stats.get('words_per_second', 0):>11.0f}"
+        )
+    return "\n".join(lines)
+
+def format_comparison(comparison: List[Dict[str, Any]], metric: str) -> str:
+    lines = [f"{'benchmark':<36} {'baseline ' + metric:>16} {'current':>10} {'change':>8}"]
+    for entry in comparison:
+        flag = "  REGRESSION" if entry["regression"] else ""
+        lines.append(
+            f"{entry['benchmark']:<36} {entry['baseline']:>16.1f} {entry['current']:>10.1f} "
+            f"{entry['change']:>+8.1%}{flag}"
+        )
+    return "\n".join(lines)
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark document loading, models and endpoints")
+    parser.add_argument("--mode", choices=BENCHMARK_MODES, default="stub",
+                        help="stub runs offline stand-ins for the models, real loads the configured models")
+    parser.add_argument("--suites", default=",".join(SUITES), help="Comma-separated suites to run")
+    parser.add_argument("--sizes", default=",".join(CORPUS_SIZES),
+                        help=f"Comma-separated document sizes ({', '.join(f'{name}={words} words' for name, words in CORPUS_SIZES.items())})")
+    parser.add_argument("--formats", default=",".join(CORPUS_FORMATS), help="Comma-separated document formats")
+    parser.add_argument("--documents", type=int, default=3, help="Documents per size and format")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed rounds over the documents")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed rounds before timing")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic corpus")
+    parser.add_argument("--profile", default=None, help="Model profile to benchmark")
+    parser.add_argument("--corpus-dir", default=None, help="Keep the generated corpus in this directory")
+    parser.add_argument("--output", default=None, help="Write the report as JSON to this file")
+    parser.add_argument("--save-baseline", default=None, help="Write the report as the new baseline")
+    parser.add_argument("--baseline", default=None, help="Compare against this baseline report")
+    parser.add_argument("--metric", default="p50_ms", help="Statistic compared against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Relative slowdown reported as a regression (default 0.2)")
+    parser.add_argument("--allow-machine-mismatch", action="store_true",
+                        help="Compare against a baseline recorded on a different machine or mode")
+    args = parser.parse_args(argv)
+    
+    unknown = [suite for suite in _split(args.suites) if suite not in SUITES]
+    unknown += [size for size in _split(args.sizes) if size not in CORPUS_SIZES]
+    unknown += [file_format for file_format in _split(args.formats) if file_format not in CORPUS_FORMATS]
+    if unknown:
+        parser.error(f"Unknown suites, sizes or formats: {', '.join(unknown)}")
+    return args
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    
+    # Every request must reach the models; stub mode also needs the NLI
+    # classifier, as the embedding engine loads its model directly
+    os.environ["CACHE_ENABLED"] = "false"
+    if args.mode == "stub":
+        os.environ["CLASSIFIER_ENGINE"] = "nli"
+    from app.core.config import get_settings
+    get_settings.cache_clear()
+    
+    # Timings from another machine or mode are not comparable
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        mismatches = machine_mismatches(machine_info(args.mode), baseline.get("meta", {}))
+        if mismatches and not args.allow_machine_mismatch:
+            logger.error("Baseline was recorded on a different machine (%s); record a new baseline "
+                         "or pass --allow-machine-mismatch", "; ".join(mismatches))
+            return 2
+        if mismatches:
+            logger.warning("Baseline was recorded on a different machine: %s", "; ".join(mismatches))
+    
+    if args.corpus_dir:
+        report = run_benchmarks(args, args.corpus_dir)
+    else:
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            report = run_benchmarks(args, corpus_dir)
+    
+    print(format_results(report["results"]))
+    for path in filter(None, [args.output, args.save_baseline]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        logger.info("Wrote %s", path)
+    
+    if baseline is None:
+        return 0
+    
+    comparison = compare_results(report["results"], baseline.get("results", {}), args.metric, args.tolerance)
+    print()
+    print(format_comparison(comparison, args.metric))
+    regressions = [entry["benchmark"] for entry in comparison if entry["regression"]]
+    if regressions:
+        logger.error("%d benchmarks regressed by more than %.0f%%: %s",
+                     len(regressions), args.tolerance * 100, ", ".join(regressions))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
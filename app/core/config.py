@@ -0,0 +1,177 @@
+import os
+from functools import lru_cache
+from typing import List, Literal, Optional
+
+from dotenv import dotenv_values
+from pydantic import BaseModel
+
+class Settings(BaseModel):
+    """
+    Application settings.
+    
+    Every field can be overridden with an environment variable of the same
+    name in upper case, e.g. ``CACHE_MAX_ENTRIES=1024``, or with the same
+    variable in a ``.env`` file.
+    """
+    # Models
+    enabled_models: str = "extractor,classifier,summarizer"
+    model_warmup: bool = False
+    spacy_model: str = "en_core_web_sm"
+    ner_model: str = "dslim/bert-base-NER"
+    classifier_model: str = "facebook/bart-large-mnli"
+    summarizer_model: str = "facebook/bart-large-cnn"
+    
+    # Model profiles: fast, balanced and accurate, which uses the models above.
+    # Requests pick a profile, or get the default one
+    model_profile: str = "accurate"
+    enabled_profiles: str = "fast,balanced,accurate"
+    
+    # Classification engine: nli (zero-shot, one pass per label) or embedding
+    # (label embedding similarity, escalating to NLI below the threshold)
+    classifier_engine: Literal["nli", "embedding"] = "nli"
+    embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_escalation_threshold: float = 0.0
+    embedding_escalation_top_k: int = 5
+    # JSON list of document types, or object mapping each type to descriptions
+    document_types_path: Optional[str] = None
+    
+    # Inference backend of the transformer models: eager, quantized or onnx,
+    # optionally overridden per model
+    model_backend: str = "eager"
+    ner_backend: Optional[str] = None
+    classifier_backend: Optional[str] = None
+    summarizer_backend: Optional[str] = None
+    onnx_cache_dir: Optional[str] = None
+    
+    # Result cache
+    cache_enabled: bool = True
+    cache_max_entries: int = 512
+    cache_max_bytes: int = 64 * 1024 * 1024
+    cache_db_path: Optional[str] = None
+    
+    # Inference executors, one per model, with these limits each. Every model
+    # can get its own number of workers instead of inference_workers
+    inference_workers: int = 2
+    inference_max_queue: int = 8
+    inference_timeout: Optional[float] = 300.0
+    extractor_workers: Optional[int] = None
+    classifier_workers: Optional[int] = None
+    summarizer_workers: Optional[int] = None
+    
+    # PyTorch intra-op and inter-op threads, 0 keeps PyTorch's defaults. With
+    # several inference workers, intra-op threads times the total number of
+    # workers should not exceed the CPU cores
+    torch_num_threads: int = 0
+    torch_interop_threads: int = 0
+    
+    # Model input limits: tokens per NER and embedding window, words per
+    # summarizer chunk (documents up to this length are summarized in one
+    # pass) and words of the leading sample the classifiers score
+    ner_max_length: int = 512
+    embedding_max_length: int = 512
+    summary_chunk_words: int = 1024
+    classifier_sample_words: int = 1024
+    
+    # Number of documents /process/batch works on at once
+    process_batch_concurrency: int = 4
+    # Limits on zip archives uploaded to /process/batch, against zip bombs
+    batch_max_archive_members: int = 1000
+    batch_max_member_bytes: int = 100 * 1024 * 1024
+    
+    # Background jobs
+    job_workers: int = 2
+    job_max_queue: int = 1000
+    job_db_path: Optional[str] = None
+    job_spool_dir: Optional[str] = None
+    job_stage_timeout: Optional[float] = 3600.0
+    job_webhook_timeout: float = 10.0
+    # Comma-separated hosts job webhooks may call, any public host when unset
+    job_webhook_allowed_hosts: Optional[str] = None
+    
+    # spaCy runs long documents through nlp.pipe as sentence-aligned pieces
+    # of at most spacy_max_piece_chars characters
+    spacy_batch_size: int = 64
+    spacy_n_process: int = 1
+    spacy_max_piece_chars: int = 5000
+    
+    # Micro-batching of transformer inputs
+    batch_max_size: int = 16
+    batch_max_wait_ms: float = 5.0
+    
+    # Document loading
+    pdf_workers: int = 0
+    pdf_parallel_min_pages: int = 50
+    
+    # Summarization: abstractive, extractive (sentence scoring, no model pass)
+    # or hybrid (extractive selection shrinking long documents to one model pass)
+    summary_mode: str = "abstractive"
+    summary_hierarchical: bool = False
+    summary_max_reduce_depth: int = 2
+    
+    # Instrumentation exported on /metrics; server_timing also returns each
+    # request's timing breakdown in a Server-Timing response header
+    metrics_enabled: bool = True
+    server_timing: bool = False
+    
+    # Server started by ``python -m app.main``; reload is meant for development
+    # and ignores server_workers
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 1
+    server_reload: bool = False
+    
+    @property
+    def enabled_model_names(self) -> List[str]:
+        """Names of the models served by this deployment."""
+        return [name.strip() for name in self.enabled_models.split(",") if name.strip()]
+    
+    @property
+    def enabled_profile_names(self) -> List[str]:
+        """Model profiles served by this deployment, always including the default profile."""
+        names = [name.strip() for name in self.enabled_profiles.split(",") if name.strip()]
+        return list(dict.fromkeys(names + [self.model_profile]))
+    
+    @property
+    def webhook_allowed_hosts(self) -> List[str]:
+        """Hosts job webhooks may call, empty when any public host is allowed."""
+        return [host.strip() for host in (self.job_webhook_allowed_hosts or "").split(",") if host.strip()]
+    
+    def backend_for(self, model: str) -> str:
+        """Inference backend of the extractor's NER model, the classifier or the summarizer."""
+        override = {
+            "extractor": self.ner_backend,
+            "classifier": self.classifier_backend,
+            "summarizer": self.summarizer_backend
+        }[model]
+        return override or self.model_backend
+    
+    def workers_for(self, model: str) -> int:
+        """Inference workers of the extractor, the classifier or the summarizer."""
+        override = {
+            "extractor": self.extractor_workers,
+            "classifier": self.classifier_workers,
+            "summarizer": self.summarizer_workers
+        }[model]
+        return override or self.inference_workers
+    
+    @classmethod
+    def from_env(cls, env_file: Optional[str] = None) -> "Settings":
+        """
+        Build settings from environment variables and a .env file.
+        
+        Environment variables take precedence over the file, which is read
+        from ``ENV_FILE``, by default ``.env`` in the working directory.
+        """
+        env_file = env_file or os.getenv("ENV_FILE", ".env")
+        file_values = dotenv_values(env_file) if os.path.isfile(env_file) else {}
+        values = {}
+        for name in cls.model_fields:
+            value = os.getenv(name.upper(), file_values.get(name.upper()))
+            if value is not None and value != "":
+                values[name] = value
+        return cls(**values)
+
+@lru_cache()
+def get_settings() -> Settings:
+    """Return the process-wide settings instance."""
+    return Settings.from_env()
@@ -0,0 +1,332 @@
+"""
+Inference instrumentation exported in the Prometheus text format.
+
+Timers record into latency histograms and, while a request is being served,
+into that request's timing breakdown, which can be sent back as a
+``Server-Timing`` header. Metrics are collected in-process without any extra
+dependency; when disabled, timers are a shared no-op object.
+"""
+import bisect
+import contextvars
+import itertools
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds, covering fast regex passes up to long summarization jobs
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 16384, 65536)
+
+# Timing breakdown of the request being served, name -> seconds
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+    
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """Yield (suffix, formatted labels, value) for every sample."""
+        raise NotImplementedError
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples()]
+        return lines
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield "_total", _format_labels(self.labelnames, key), value
+
+class Gauge(_Metric):
+    """Current value, read from a callback at scrape time."""
+    
+    kind = "gauge"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+    
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        values = self.collect() if self.collect is not None else {}
+        for key, value in values.items():
+            yield "", _format_labels(self.labelnames, key), value
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets."""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Labels -> [count per bucket (last is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], List[Any]] = {}
+    
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts[0][index] += 1
+            counts[1] += value
+    
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in values:
+            cumulative = list(itertools.accumulate(counts))
+            for bound, count in zip(self.buckets + (math.inf,), cumulative):
+                yield "_bucket", _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"'), count
+            yield "_count", _format_labels(self.labelnames, key), cumulative[-1]
+            yield "_sum", _format_labels(self.labelnames, key), total
+
+class _NullTimer:
+    """Timer used while metrics are disabled."""
+    
+    def __enter__(self) -> "_NullTimer":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+_NULL_TIMER = _NullTimer()
+
+class _Timer:
+    def __init__(self, histogram: Histogram, timing_name: Optional[str], labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.timing_name = timing_name
+        self.labels = labels
+    
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        seconds = time.perf_counter() - self.started
+        self.histogram.observe(seconds, **self.labels)
+        if self.timing_name is not None:
+            record_request_timing(self.timing_name, seconds)
+
+def record_request_timing(name: str, seconds: float, timings: Optional[Dict[str, float]] = None) -> None:
+    """Add seconds to a timing of the current request, or of the given breakdown."""
+    timings = timings if timings is not None else _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+def current_request_timings() -> Optional[Dict[str, float]]:
+    """Timing breakdown of the request being served, None outside of requests."""
+    return _request_timings.get()
+
+def start_request_timings() -> Tuple[Dict[str, float], contextvars.Token]:
+    """Start collecting a timing breakdown for the current request."""
+    timings: Dict[str, float] = {}
+    return timings, _request_timings.set(timings)
+
+def end_request_timings(token: contextvars.Token) -> None:
+    _request_timings.reset(token)
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """Format a timing breakdown as a Server-Timing header value, in milliseconds."""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together for /metrics.
+    
+    While ``enabled`` is False, timers are a shared no-op and nothing is
+    recorded, so instrumented code pays a single attribute check.
+    """
+    
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+    
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              collect: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None) -> Gauge:
+        gauge = self._register(Gauge(name, documentation, labelnames))
+        if collect is not None:
+            gauge.collect = collect
+        return gauge
+    
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+    
+    def timer(self, histogram: Histogram, timing_name: Optional[str] = None, **labels: Any):
+        """
+        Time a block into a histogram and the current request's breakdown.
+        
+        Args:
+            histogram: Histogram receiving the duration in seconds
+            timing_name: Name of the duration in the request's Server-Timing breakdown
+            **labels: Histogram labels
+        
+        Returns:
+            Context manager timing its block
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(histogram, timing_name, labels)
+    
+    def observe(self, histogram: Histogram, value: float, **labels: Any) -> None:
+        if self.enabled:
+            histogram.observe(value, **labels)
+    
+    def inc(self, counter: Counter, amount: float = 1.0, **labels: Any) -> None:
+        if self.enabled:
+            counter.inc(amount, **labels)
+    
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request.
+    
+    Collects the request's timing breakdown while it is served and records its
+    latency by route template, so paths with ids share a series. With
+    server_timing, the breakdown collected before the response starts is sent
+    back in a ``Server-Timing`` header, along with the time so far as "total".
+    """
+    
+    def __init__(self, app: Callable, registry: "MetricsRegistry", server_timing: bool = False):
+        self.app = app
+        self.registry = registry
+        self.server_timing = server_timing
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        timings, token = start_request_timings()
+        status = 500
+        
+        async def send_with_timing(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    header = server_timing_header(dict(timings, total=time.perf_counter() - started))
+                    message = dict(message, headers=list(message.get("headers", [])) + [
+                        (b"server-timing", header.encode("latin-1"))
+                    ])
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request_timings(token)
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status
+            )
+
+def _resident_memory() -> Dict[Tuple[str, ...], float]:
+    try:
+        with open("/proc/self/statm", "r") as file:
+            return {(): int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")}
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+# Process-wide registry and the metrics recorded by the instrumented modules
+metrics = MetricsRegistry()
+
+REQUEST_SECONDS = metrics.histogram(
+    "docintel_request_seconds", "HTTP request latency", ["method", "route", "status"]
+)
+UPLOAD_READ_SECONDS = metrics.histogram("docintel_upload_read_seconds", "Reading and hashing an upload")
+TEXT_EXTRACTION_SECONDS = metrics.histogram(
+    "docintel_text_extraction_seconds", "Text extraction per document format", ["format"]
+)
+TOKENIZATION_SECONDS = metrics.histogram(
+    "docintel_tokenization_seconds", "Full-document tokenization", ["tokenizer"]
+)
+TOKENIZED_TOKENS = metrics.histogram(
+    "docintel_tokenized_tokens", "Tokens per tokenized document", ["tokenizer"], SIZE_BUCKETS
+)
+STAGE_SECONDS = metrics.histogram(
+    "docintel_stage_seconds", "Processing stage latency, including queueing for a worker", ["stage"]
+)
+PIPELINE_SECONDS = metrics.histogram(
+    "docintel_pipeline_seconds", "Model pipeline call latency per batch", ["batcher"]
+)
+PIPELINE_BATCH_SIZE = metrics.histogram(
+    "docintel_pipeline_batch_size", "Inputs per model pipeline call", ["batcher"], SIZE_BUCKETS
+)
+PIPELINE_INPUT_CHARS = metrics.histogram(
+    "docintel_pipeline_input_chars", "Characters of the longest input of a pipeline call", ["batcher"], SIZE_BUCKETS
+)
+PIPELINE_INPUT_TOKENS = metrics.histogram(
+    "docintel_pipeline_input_tokens", "Tokens of the longest input of a pipeline call, which sets the padding",
+    ["batcher"], SIZE_BUCKETS
+)
+SERIALIZATION_SECONDS = metrics.histogram("docintel_serialization_seconds", "JSON response serialization")
+CACHE_REQUESTS = metrics.counter(
+    "docintel_cache_requests", "Result cache lookups by stage and result (hit or miss)", ["stage", "result"]
+)
+metrics.gauge("process_resident_memory_bytes", "Resident memory of the process", collect=_resident_memory)
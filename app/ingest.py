@@ -0,0 +1,418 @@
+"""
+Offline bulk ingestion of document archives.
+
+Walks directories or file lists, extracts text in a pool of worker processes,
+runs the extractor, classifier and summarizer from concurrent threads so their
+inputs share model batches, and writes one record per document to JSONL or
+Parquet. Finished files are recorded in a checkpoint so an interrupted run can
+be resumed without redoing them.
+
+Usage:
+    document-intelligence-ingest archive/ --output results.jsonl
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from app.core.config import get_settings
+from app.models.registry import ModelRegistry, create_model_registry
+from app.utils.document_context import DocumentContext
+from app.utils.document_loader import iter_pdf_pages, load_document
+
+logger = logging.getLogger("app.ingest")
+
+SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".txt"}
+
+# Processing stage -> model it needs
+STAGE_MODELS = {
+    "extract": "extractor",
+    "classify": "classifier",
+    "summarize": "summarizer"
+}
+
+def iter_input_files(paths: Iterable[str], file_list: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield the supported documents found in the given files and directories.
+    
+    Args:
+        paths: Files or directories, directories are walked recursively
+        file_list: Optional file with one document path per line
+    
+    Returns:
+        Iterator over absolute document paths
+    """
+    candidates: List[str] = list(paths)
+    if file_list:
+        with open(file_list, "r", encoding="utf-8") as file:
+            candidates.extend(line.strip() for line in file if line.strip())
+    
+    for path in candidates:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                        yield os.path.abspath(os.path.join(root, name))
+        elif os.path.splitext(path)[1].lower() in SUPPORTED_EXTENSIONS:
+            yield os.path.abspath(path)
+
+def extract_document(path: str) -> Dict[str, Any]:
+    """Extract the text of one document, run in a worker process."""
+    try:
+        file_extension = os.path.splitext(path)[1].lower()
+        if file_extension == ".pdf":
+            pages = list(iter_pdf_pages(path))
+            text, page_count = "".join(pages), len(pages)
+        else:
+            text, file_extension = load_document(path)
+            page_count = 1
+        return {"path": path, "file_type": file_extension, "pages": page_count, "text": text}
+    except Exception as e:
+        return {"path": path, "error": f"Error extracting text: {str(e)}"}
+
+def analyze_document(registry: ModelRegistry, stages: List[str], extracted: Dict[str, Any],
+                     summary_options: Dict[str, Any], profile: Optional[str] = None) -> Dict[str, Any]:
+    """Run the requested model stages over one extracted document."""
+    context = DocumentContext(extracted["text"])
+    record = {
+        "path": extracted["path"],
+        "status": "success",
+        "file_type": extracted["file_type"],
+        "pages": extracted["pages"],
+        "text_length": context.word_count
+    }
+    
+    try:
+        if "extract" in stages:
+            record["entities"] = registry.get("extractor", profile).extract_key_information(context)
+        if "classify" in stages:
+            record["classification"] = registry.get("classifier", profile).classify_document(context)
+        if "summarize" in stages:
+            record["summary"] = registry.get("summarizer", profile).generate_summary(context, **summary_options)
+    except Exception as e:
+        return {"path": extracted["path"], "status": "error", "detail": f"Error processing document: {str(e)}"}
+    
+    return record
+
+class Checkpoint:
+    """Append-only record of the documents that were written successfully."""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                self.done = {line.rstrip("\n") for line in file if line.strip()}
+        self._file = open(path, "a", encoding="utf-8")
+    
+    def mark(self, paths: List[str]) -> None:
+        if not paths:
+            return
+        self._file.write("".join(path + "\n" for path in paths))
+        self._file.flush()
+        self.done.update(paths)
+    
+    def close(self) -> None:
+        self._file.close()
+
+class JSONLWriter:
+    """
+    Writes one JSON record per line, every record is durable once written.
+    
+    Output of an earlier run is compacted first: failed records, which are
+    retried, repeated documents and a partly written last line are dropped.
+    The documents kept are listed in ``recovered``.
+    """
+    
+    def __init__(self, path: str):
+        self.recovered = self._compact(path)
+        self._file = open(path, "a", encoding="utf-8")
+    
+    @staticmethod
+    def _compact(path: str) -> List[str]:
+        if not os.path.exists(path):
+            return []
+        
+        kept: Dict[str, str] = {}
+        changed = False
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if not isinstance(record, dict) or record.get("status") != "success" or record["path"] in kept:
+                    changed = True
+                    continue
+                if not line.endswith("\n"):
+                    line += "\n"
+                    changed = True
+                kept[record["path"]] = line
+        
+        if changed:
+            temporary = path + ".tmp"
+            with open(temporary, "w", encoding="utf-8") as file:
+                file.writelines(kept.values())
+            os.replace(temporary, path)
+        return list(kept)
+    
+    def write(self, record: Dict[str, Any]) -> List[str]:
+        """Write a record and return the paths of successful records that are now durable."""
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        return [record["path"]] if record["status"] == "success" else []
+    
+    def close(self) -> List[str]:
+        self._file.close()
+        return []
+
+class ParquetWriter:
+    """
+    Writes records to a directory of Parquet part files.
+    
+    Every part is written with the schema of COLUMNS, nested results stored
+    as JSON strings, so parts holding only errors still match the others and
+    the directory reads as one dataset. Like JSONLWriter, parts of an earlier
+    run are compacted to their successful records, listed in ``recovered``.
+    Requires pyarrow.
+    """
+    
+    # Column -> pyarrow type name
+    COLUMNS = {
+        "path": "string",
+        "status": "string",
+        "detail": "string",
+        "file_type": "string",
+        "pages": "int64",
+        "text_length": "int64",
+        "entities": "string",
+        "classification": "string",
+        "summary": "string"
+    }
+    
+    def __init__(self, path: str, rows_per_part: int = 500):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet output requires pyarrow: pip install pyarrow")
+        
+        self._pyarrow = pyarrow
+        self._parquet = pyarrow.parquet
+        self.schema = pyarrow.schema(
+            [(column, getattr(pyarrow, type_name)()) for column, type_name in self.COLUMNS.items()]
+        )
+        self.path = path
+        self.rows_per_part = rows_per_part
+        self._rows: List[Dict[str, Any]] = []
+        os.makedirs(path, exist_ok=True)
+        self._part = len([name for name in os.listdir(path) if name.endswith(".parquet")])
+        self.recovered = self._compact()
+    
+    def _compact(self) -> List[str]:
+        kept: Set[str] = set()
+        for name in sorted(os.listdir(self.path)):
+            if not name.endswith(".parquet"):
+                continue
+            part_path = os.path.join(self.path, name)
+            table = self._parquet.read_table(part_path)
+            keep = []
+            for path, status in zip(table.column("path").to_pylist(), table.column("status").to_pylist()):
+                keep.append(status == "success" and path not in kept)
+                if keep[-1]:
+                    kept.add(path)
+            if not all(keep) or table.schema != self.schema:
+                # Parts written before the schema was fixed may have null-typed columns
+                table = table.filter(self._pyarrow.array(keep, type=self._pyarrow.bool_()))
+                table = table.select(list(self.COLUMNS)).cast(self.schema)
+                temporary = part_path + ".tmp"
+                self._parquet.write_table(table, temporary)
+                os.replace(temporary, part_path)
+        return sorted(kept)
+    
+    def write(self, record: Dict[str, Any]) -> List[str]:
+        """Buffer a record and return the paths of successful records that are now durable."""
+        row = {
+            key: json.dumps(value) if isinstance(value, (dict, list)) else value
+            for key, value in record.items()
+        }
+        self._rows.append(row)
+        if len(self._rows) >= self.rows_per_part:
+            return self._flush()
+        return []
+    
+    def _flush(self) -> List[str]:
+        if not self._rows:
+            return []
+        table = self._pyarrow.Table.from_pylist(
+            [{column: row.get(column) for column in self.COLUMNS} for row in self._rows], schema=self.schema
+        )
+        part_path = os.path.join(self.path, f"part-{self._part:05d}.parquet")
+        self._parquet.write_table(table, part_path)
+        self._part += 1
+        
+        written = [row["path"] for row in self._rows if row["status"] == "success"]
+        self._rows = []
+        return written
+    
+    def close(self) -> List[str]:
+        return self._flush()
+
+class Throughput:
+    """Tracks and reports documents and pages processed per second."""
+    
+    def __init__(self):
+        self.started = time.monotonic()
+        self.documents = 0
+        self.pages = 0
+        self.errors = 0
+    
+    def add(self, record: Dict[str, Any]) -> None:
+        if record.get("status") == "success":
+            self.documents += 1
+            self.pages += record.get("pages", 0)
+        else:
+            self.errors += 1
+    
+    def report(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return (
+            f"{self.documents} documents ({self.errors} errors), {self.pages} pages in {elapsed:.1f}s: "
+            f"{self.documents / elapsed:.2f} documents/s, {self.pages / elapsed:.2f} pages/s"
+        )
+
+def run_ingest(paths: List[str], output: str, output_format: str, checkpoint_path: str,
+               stages: List[str], extract_workers: int, inference_threads: int,
+               file_list: Optional[str] = None, progress_every: int = 50,
+               profile: Optional[str] = None) -> Throughput:
+    """
+    Process every document under paths and write the results.
+    
+    Returns:
+        Throughput statistics of the run
+    """
+    settings = get_settings()
+    registry = create_model_registry(settings)
+    for stage in stages:
+        registry.require(STAGE_MODELS[stage], profile)
+    summary_options = {
+        "hierarchical": settings.summary_hierarchical,
+        "max_reduce_depth": settings.summary_max_reduce_depth,
+        "mode": settings.summary_mode
+    }
+    
+    checkpoint = Checkpoint(checkpoint_path)
+    writer = ParquetWriter(output) if output_format == "parquet" else JSONLWriter(output)
+    # Documents written just before an interruption may not be checkpointed yet
+    checkpoint.mark([path for path in writer.recovered if path not in checkpoint.done])
+    todo = (path for path in iter_input_files(paths, file_list) if path not in checkpoint.done)
+    if checkpoint.done:
+        logger.info("Resuming, skipping %d finished documents", len(checkpoint.done))
+    
+    throughput = Throughput()
+    # Bound the documents held in memory between extraction and writing
+    max_in_flight = extract_workers * 2 + inference_threads * 2
+    
+    def record_result(record: Dict[str, Any]) -> None:
+        # Failed documents are written but not checkpointed, so a resumed run retries them,
+        # replacing their record
+        if record["status"] != "success":
+            logger.warning("%s: %s", record["path"], record.get("detail"))
+        checkpoint.mark(writer.write(record))
+        throughput.add(record)
+        if (throughput.documents + throughput.errors) % progress_every == 0:
+            logger.info(throughput.report())
+    
+    spawn = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=extract_workers, mp_context=spawn) as extract_pool, \
+                ThreadPoolExecutor(max_workers=inference_threads, thread_name_prefix="ingest") as inference_pool:
+            extracting: Set[Any] = set()
+            analyzing: Set[Any] = set()
+            exhausted = False
+            
+            while True:
+                while not exhausted and len(extracting) + len(analyzing) < max_in_flight:
+                    path = next(todo, None)
+                    if path is None:
+                        exhausted = True
+                    else:
+                        extracting.add(extract_pool.submit(extract_document, path))
+                
+                if not extracting and not analyzing:
+                    break
+                
+                done, _ = wait(extracting | analyzing, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in extracting:
+                        extracting.remove(future)
+                        extracted = future.result()
+                        if "error" in extracted:
+                            record_result({"path": extracted["path"], "status": "error", "detail": extracted["error"]})
+                        else:
+                            analyzing.add(inference_pool.submit(
+                                analyze_document, registry, stages, extracted, summary_options, profile
+                            ))
+                    else:
+                        analyzing.remove(future)
+                        record_result(future.result())
+    finally:
+        checkpoint.mark(writer.close())
+        checkpoint.close()
+    
+    return throughput
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="document-intelligence-ingest",
+        description="Extract entities, classify and summarize every document under the given paths."
+    )
+    parser.add_argument("paths", nargs="*", help="Documents or directories to process")
+    parser.add_argument("--file-list", help="File with one document path per line")
+    parser.add_argument("--output", required=True, help="Output JSONL file or Parquet directory")
+    parser.add_argument("--format", choices=["jsonl", "parquet"],
+                        help="Output format, defaults to parquet for .parquet outputs and jsonl otherwise")
+    parser.add_argument("--checkpoint", help="Checkpoint file, defaults to <output>.checkpoint")
+    parser.add_argument("--stages", default="extract,classify,summarize",
+                        help="Comma-separated stages to run (default: extract,classify,summarize)")
+    parser.add_argument("--profile", help="Model profile: fast, balanced or accurate (default: MODEL_PROFILE)")
+    parser.add_argument("--extract-workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Worker processes extracting text")
+    parser.add_argument("--inference-threads", type=int, default=None,
+                        help="Documents analyzed concurrently, defaults to BATCH_MAX_SIZE")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    
+    if not args.paths and not args.file_list:
+        parser.error("give at least one path or --file-list")
+    
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGE_MODELS]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+    
+    output_format = args.format or ("parquet" if args.output.endswith(".parquet") else "jsonl")
+    
+    throughput = run_ingest(
+        paths=args.paths,
+        output=args.output,
+        output_format=output_format,
+        checkpoint_path=args.checkpoint or args.output.rstrip("/") + ".checkpoint",
+        stages=stages,
+        extract_workers=args.extract_workers,
+        inference_threads=args.inference_threads or get_settings().batch_max_size,
+        file_list=args.file_list,
+        profile=args.profile
+    )
+    logger.info("Finished: %s", throughput.report())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
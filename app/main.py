@@ -1,23 +1,78 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import functools
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
 import uvicorn
-from typing import Dict, Any
+import zipfile
+from typing import Dict, Any, Awaitable, BinaryIO, Callable, List, Optional, Tuple
 
-from app.models.extractor import EntityExtractor
-from app.models.classifier import DocumentClassifier
-from app.models.summarizer import DocumentSummarizer
-from app.utils.document_loader import process_uploaded_file
+from app.core.config import get_settings
+from app.core.metrics import (
+    CACHE_REQUESTS, SERIALIZATION_SECONDS, STAGE_SECONDS, MetricsMiddleware, metrics
+)
+from app.models.fields import extract_fields
+from app.models.registry import ModelDisabledError, UnknownProfileError, create_model_registry
+from app.models.summarizer import SUMMARY_MODES
+from app.utils.cache import content_hash, create_result_cache, make_cache_key
+from app.utils.document_context import DocumentContext
+from app.utils.document_loader import hash_uploaded_file, load_document
+from app.utils.executor import InferenceExecutor, InferenceQueueFullError, InferenceTimeoutError
+from app.utils.jobs import (
+    JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, PRIORITY_RANKS, InvalidWebhookError, JobQueue,
+    JobQueueFullError, create_job_store, job_priority, new_job, send_webhook, validate_webhook_url
+)
+
+class TimedJSONResponse(JSONResponse):
+    """JSON response recording how long serializing the content took."""
+    
+    def render(self, content: Any) -> bytes:
+        with metrics.timer(SERIALIZATION_SECONDS, "serialize"):
+            return super().render(content)
 
 app = FastAPI(
     title="Document Intelligence System",
     description="NLP-powered document processing API",
     version="0.1.0",
+    default_response_class=TimedJSONResponse,
+)
+
+settings = get_settings()
+metrics.enabled = settings.metrics_enabled
+
+# Models are loaded lazily on first use, or during warmup at startup
+model_registry = create_model_registry(settings)
+summary_options = {
+    "hierarchical": settings.summary_hierarchical,
+    "max_reduce_depth": settings.summary_max_reduce_depth,
+    "mode": settings.summary_mode
+}
+
+# Result cache shared by all endpoints
+result_cache = create_result_cache(
+    enabled=settings.cache_enabled,
+    max_entries=settings.cache_max_entries,
+    max_bytes=settings.cache_max_bytes,
+    db_path=settings.cache_db_path
 )
 
-# Initialize models
-entity_extractor = EntityExtractor()
-document_classifier = DocumentClassifier()
-document_summarizer = DocumentSummarizer()
+# Bounded pools running model inference off the event loop, one per model so
+# the stages of a document run side by side instead of queueing behind each other
+inference_executors = {
+    model_name: InferenceExecutor(
+        max_workers=settings.workers_for(model_name),
+        max_queue=settings.inference_max_queue,
+        timeout=settings.inference_timeout
+    )
+    for model_name in ("extractor", "classifier", "summarizer")
+}
 
 # Set up CORS
 app.add_middleware(
@@ -28,91 +83,718 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so request latency covers every other middleware
+app.add_middleware(MetricsMiddleware, registry=metrics, server_timing=settings.server_timing)
+
+# Errors that map to a dedicated status code instead of a generic 500
+SERVICE_ERRORS = (InferenceQueueFullError, InferenceTimeoutError, ModelDisabledError, UnknownProfileError)
+
+def extract_text_entities(extractor, context: DocumentContext) -> Dict[str, Any]:
+    return extractor.extract_key_information(context)
+
+def extract_text_fields(_, context: DocumentContext) -> Dict[str, Any]:
+    return extract_fields(context)
+
+def classify_text(classifier, context: DocumentContext) -> Dict[str, Any]:
+    return classifier.classify_document(context)
+
+def summarize_text(summarizer, context: DocumentContext, options: Optional[Dict[str, Any]] = None,
+                   on_chunk_summary: Optional[Callable[[int, str], None]] = None) -> Dict[str, Any]:
+    return summarizer.generate_summary(
+        context, **(options or summary_options), on_chunk_summary=on_chunk_summary
+    )
+
+class UploadedDocument:
+    """
+    An uploaded file identified by its content hash, with text extracted on demand.
+    
+    The extracted text is wrapped in a DocumentContext shared by every stage of
+    the request, so words, sentences and tokens are only computed once. Every
+    stage uses the models of the document's profile.
+    """
+    
+    def __init__(self, filename: str, source: BinaryIO, content_hash: str, profile: Optional[str] = None):
+        self.filename = filename
+        self.source = source
+        self.content_hash = content_hash
+        self.profile = model_registry.resolve_profile(profile)
+        self.extension = os.path.splitext(filename or "")[1].lower()
+        self.cache_status: Dict[str, str] = {}
+        self._context: Optional[DocumentContext] = None
+        # Stages running at the same time extract the text only once
+        self._context_lock = asyncio.Lock()
+    
+    @classmethod
+    async def open(cls, upload_file: UploadFile, profile: Optional[str] = None) -> "UploadedDocument":
+        model_registry.resolve_profile(profile)
+        return cls(upload_file.filename, upload_file.file, await hash_uploaded_file(upload_file), profile)
+    
+    @classmethod
+    def from_bytes(cls, filename: str, content: bytes, profile: Optional[str] = None) -> "UploadedDocument":
+        return cls(filename, io.BytesIO(content), content_hash(content), profile)
+    
+    async def get_context(self, on_segment: Optional[Callable[[str], None]] = None) -> DocumentContext:
+        """
+        Return the document's context, extracting its text on first use.
+        
+        on_segment is called from the extraction thread with every page,
+        paragraph or block of text as it is extracted; it is not called when
+        the text was already extracted.
+        """
+        async with self._context_lock:
+            if self._context is None:
+                # Extract text from the upload without blocking the event loop
+                text, self.extension = await run_in_threadpool(
+                    load_document, self.source, self.extension, on_segment
+                )
+                self._context = DocumentContext(text)
+        return self._context
+    
+    async def run_stage(self, stage: str, model_name: Optional[str], params: Dict[str, Any],
+                        compute: Callable[[Any, DocumentContext], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Return the cached result for a stage, computing it from the document on a miss.
+        
+        Stages with model_name None run without a model, compute gets None instead.
+        """
+        if model_name is not None:
+            model_registry.require(model_name, self.profile)
+        key = make_cache_key(
+            self.content_hash, stage,
+            model_registry.model_id(model_name, self.profile) if model_name is not None else "patterns",
+            dict(params, file_type=self.extension)
+        )
+        result = result_cache.get(key)
+        if result is not None:
+            self.cache_status[stage] = "HIT"
+            metrics.inc(CACHE_REQUESTS, stage=stage, result="hit")
+            return result
+        
+        metrics.inc(CACHE_REQUESTS, stage=stage, result="miss")
+        with metrics.timer(STAGE_SECONDS, stage, stage=stage):
+            context = await self.get_context()
+            executor = inference_executors[model_name if model_name is not None else "extractor"]
+            result = await executor.run(self._compute, model_name, compute, context, timeout=timeout)
+        result_cache.set(key, result)
+        self.cache_status[stage] = "MISS"
+        return result
+    
+    def _compute(self, model_name: Optional[str], compute: Callable[[Any, DocumentContext], Any],
+                 context: DocumentContext) -> Any:
+        # Runs on the inference executor, where models are loaded on first use
+        model = model_registry.get(model_name, self.profile) if model_name is not None else None
+        return compute(model, context)
+    
+    def set_cache_header(self, response: Response) -> None:
+        response.headers["X-Cache"] = ", ".join(
+            f"{stage}={status}" for stage, status in self.cache_status.items()
+        )
+
+# Minimum seconds between text_progress events of /process/stream
+TEXT_PROGRESS_INTERVAL = 0.25
+
+# Stage -> (model it needs, cache params, compute function, result field)
+STAGES = {
+    "extract": ("extractor", {}, extract_text_entities, "entities"),
+    "classify": ("classifier", {}, classify_text, "classification"),
+    "summarize": ("summarizer", summary_options, summarize_text, "summary")
+}
+
+def parse_stages(stages: str) -> List[str]:
+    """Parse a comma-separated stage list, raising a 400 error for unknown stages."""
+    requested = [stage.strip() for stage in stages.split(",") if stage.strip()]
+    unknown = [stage for stage in requested if stage not in STAGES]
+    if not requested or unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown stages: {', '.join(unknown) or stages}")
+    return list(dict.fromkeys(requested))
+
+async def process_all_stages(document: UploadedDocument, stages: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Run processing stages concurrently, reusing results cached by the single-stage endpoints.
+    
+    Every model has its own executor, so the wall time is close to that of the
+    slowest stage rather than the sum of all of them.
+    
+    Args:
+        document: Uploaded document
+        stages: Stages to run, defaults to all of STAGES
+    
+    Returns:
+        Combined results with the seconds every stage took under "timings"
+    """
+    stages = stages or list(STAGES)
+    for stage in stages:
+        model_registry.require(STAGES[stage][0], document.profile)
+    
+    async def timed_stage(stage: str) -> Tuple[Any, float]:
+        model_name, params, compute, _ = STAGES[stage]
+        started = time.perf_counter()
+        result = await document.run_stage(stage, model_name, params, compute)
+        return result, time.perf_counter() - started
+    
+    outcomes = await asyncio.gather(*(timed_stage(stage) for stage in stages))
+    results = {STAGES[stage][3]: result for stage, (result, _) in zip(stages, outcomes)}
+    
+    if "summary" in results:
+        text_length = results["summary"]["original_length"]
+    else:
+        text_length = (await document.get_context()).word_count
+    
+    return dict(
+        {
+            "status": "success",
+            "filename": document.filename,
+            "file_type": document.extension,
+            "profile": document.profile,
+            "text_length": text_length
+        },
+        **results,
+        timings={stage: round(seconds, 4) for stage, (_, seconds) in zip(stages, outcomes)}
+    )
+
+# Jobs classify first, so later stages run at the priority the classifier reports
+JOB_STAGE_ORDER = ["classify", "extract", "summarize"]
+
+# Job fields only used internally, never returned to clients
+PRIVATE_JOB_FIELDS = {"source_path", "content_hash", "size", "callback_url", "priority_fixed"}
+
+# Documents of running jobs, kept open between stages so text is only extracted once
+job_documents: Dict[str, UploadedDocument] = {}
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in job.items() if key not in PRIVATE_JOB_FIELDS}
+
+async def finish_job(job: Dict[str, Any], status: str, detail: Optional[str] = None) -> None:
+    """Record the outcome of a job, release its document and notify its webhook."""
+    job.update(status=status, finished_at=time.time())
+    if detail is not None:
+        job["detail"] = detail
+    job_store.save(job)
+    
+    document = job_documents.pop(job["id"], None)
+    if document is not None:
+        document.source.close()
+    if os.path.exists(job["source_path"]):
+        os.remove(job["source_path"])
+    
+    if job.get("callback_url"):
+        await run_in_threadpool(
+            send_webhook, job["callback_url"], public_job(job), settings.job_webhook_timeout,
+            settings.webhook_allowed_hosts
+        )
+
+async def run_job_step(job_id: str) -> Optional[Tuple[int, int]]:
+    """
+    Run the next pending stage of a job.
+    
+    Returns:
+        The job's priority if it has stages left, else None
+    """
+    job = job_store.get(job_id)
+    if job is None or job["status"] not in (JOB_QUEUED, JOB_RUNNING):
+        return None
+    if job["status"] == JOB_QUEUED:
+        job.update(status=JOB_RUNNING, started_at=time.time())
+        job_store.save(job)
+    
+    stage = job["pending_stages"][0]
+    model_name, params, compute, field = STAGES[stage]
+    try:
+        document = job_documents.get(job_id)
+        if document is None:
+            document = UploadedDocument(
+                job["filename"], open(job["source_path"], "rb"), job["content_hash"], job["profile"]
+            )
+            job_documents[job_id] = document
+        result = await document.run_stage(stage, model_name, params, compute, timeout=settings.job_stage_timeout)
+    except InferenceQueueFullError:
+        # Interactive requests are using every inference slot, retry shortly
+        await asyncio.sleep(1)
+        job_store.save(job)
+        return job_priority(job["priority"], job["size"])
+    except Exception as e:
+        await finish_job(job, JOB_FAILED, detail=f"Error processing document: {str(e)}")
+        return None
+    
+    # Partial results are visible while the remaining stages run
+    job["result"][field] = result
+    job["pending_stages"].pop(0)
+    if stage == "classify" and not job["priority_fixed"]:
+        job["priority"] = result["priority"]
+    
+    if job["pending_stages"]:
+        job_store.save(job)
+        return job_priority(job["priority"], job["size"])
+    
+    await finish_job(job, JOB_COMPLETED)
+    return None
+
+# Long-running documents are processed in the background as jobs
+job_store = create_job_store(settings.job_db_path)
+job_queue = JobQueue(run_job_step, workers=settings.job_workers, max_size=settings.job_max_queue)
+
+# Gauges read when /metrics is scraped
+metrics.gauge(
+    "docintel_inference_queue_depth", "Inference calls running or waiting for a worker, per model", ["model"],
+    lambda: {(name,): executor.pending for name, executor in inference_executors.items()}
+)
+metrics.gauge("docintel_job_queue_depth", "Background job steps waiting to run", collect=lambda: {(): len(job_queue)})
+metrics.gauge(
+    "docintel_model_memory_bytes", "PyTorch parameter and buffer memory of loaded models", ["model", "model_id"],
+    model_registry.memory_bytes
+)
+job_spool_dir = settings.job_spool_dir or os.path.join(tempfile.gettempdir(), "document-jobs")
+
+def spool_document(source: BinaryIO, path: str) -> int:
+    """Copy an uploaded document to the job spool directory and return its size."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    source.seek(0)
+    with open(path, "wb") as file:
+        shutil.copyfileobj(source, file)
+        return file.tell()
+
+def read_archive_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+    """Read one archive member, refusing members above BATCH_MAX_MEMBER_BYTES uncompressed."""
+    limit = settings.batch_max_member_bytes
+    if info.file_size > limit:
+        raise ValueError(f"Archive member is {info.file_size} bytes uncompressed, at most {limit} allowed")
+    with archive.open(info) as member:
+        # The declared size bounds decompression, read one byte more to catch a wrong one
+        content = member.read(limit + 1)
+    if len(content) > limit:
+        raise ValueError(f"Archive member is larger than {limit} bytes uncompressed")
+    return content
+
+async def list_batch_documents(files: List[UploadFile],
+                               profile: Optional[str] = None) -> List[Tuple[Dict[str, Any], Callable[[], Awaitable[UploadedDocument]]]]:
+    """
+    Expand uploaded files and zip archives into documents to process.
+    
+    Archives are parsed off the event loop. An archive with more than
+    BATCH_MAX_ARCHIVE_MEMBERS files is rejected with a 413; members larger than
+    BATCH_MAX_MEMBER_BYTES fail when opened, without being decompressed.
+    
+    Returns:
+        List of (descriptive fields, coroutine function opening the document)
+    """
+    documents = []
+    for upload_file in files:
+        if os.path.splitext(upload_file.filename or "")[1].lower() != ".zip":
+            documents.append((
+                {"filename": upload_file.filename},
+                lambda upload_file=upload_file: UploadedDocument.open(upload_file, profile)
+            ))
+            continue
+        
+        archive = await run_in_threadpool(zipfile.ZipFile, upload_file.file)
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+        ]
+        if len(members) > settings.batch_max_archive_members:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Archive {upload_file.filename} holds {len(members)} files, "
+                       f"at most {settings.batch_max_archive_members} allowed"
+            )
+        
+        for info in members:
+            async def open_entry(archive=archive, info=info):
+                content = await run_in_threadpool(read_archive_member, archive, info)
+                return UploadedDocument.from_bytes(info.filename, content, profile)
+            
+            documents.append(({"filename": info.filename, "archive": upload_file.filename}, open_entry))
+    
+    return documents
+
+@app.exception_handler(InferenceQueueFullError)
+async def inference_queue_full_handler(request, exc: InferenceQueueFullError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.exception_handler(InferenceTimeoutError)
+async def inference_timeout_handler(request, exc: InferenceTimeoutError):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+@app.exception_handler(JobQueueFullError)
+async def job_queue_full_handler(request, exc: JobQueueFullError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
+@app.exception_handler(UnknownProfileError)
+async def unknown_profile_handler(request, exc: UnknownProfileError):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+@app.exception_handler(ModelDisabledError)
+async def model_disabled_handler(request, exc: ModelDisabledError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+@app.on_event("startup")
+def start_model_warmup():
+    if settings.model_warmup:
+        model_registry.start_warmup()
+
+@app.on_event("startup")
+def start_job_queue():
+    job_queue.start()
+    
+    # Jobs interrupted by a restart are picked up again if their document survived
+    for job in job_store.unfinished():
+        if os.path.exists(job["source_path"]):
+            job_queue.submit(job["id"], job_priority(job["priority"], job["size"]), force=True)
+        else:
+            job.update(status=JOB_FAILED, finished_at=time.time(), detail="Document was lost on restart")
+            job_store.save(job)
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    await job_queue.stop()
+
+@app.on_event("shutdown")
+def shutdown_inference_executors():
+    for executor in inference_executors.values():
+        executor.shutdown(wait=False)
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Document Intelligence System API"}
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the server process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: every enabled model is loaded, or models load lazily"""
+    ready = model_registry.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "loading", "models": model_registry.status()}
+    )
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Instrumentation in the Prometheus text exposition format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/extract")
-async def extract_entities(file: UploadFile = File(...)):
-    """Extract named entities from a document"""
+async def extract_entities(response: Response, file: UploadFile = File(...), profile: Optional[str] = Form(None),
+                           patterns_only: bool = Form(False)):
+    """
+    Extract named entities from a document.
+    
+    With patterns_only, only money, dates, emails, phone numbers, invoice
+    numbers and percentages are extracted, without running any model.
+    """
     try:
-        # Process the uploaded file
-        text, extension = await process_uploaded_file(file)
+        document = await UploadedDocument.open(file, profile)
         
         # Extract entities
-        entities = entity_extractor.extract_key_information(text)
+        if patterns_only:
+            entities = await document.run_stage(
+                "extract", None, {"patterns_only": True}, extract_text_fields
+            )
+        else:
+            entities = await document.run_stage(
+                "extract", "extractor", {}, extract_text_entities
+            )
+        document.set_cache_header(response)
         
         return {
             "status": "success",
             "filename": file.filename,
-            "file_type": extension,
+            "file_type": document.extension,
+            "profile": document.profile,
             "entities": entities
         }
+    except SERVICE_ERRORS:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
 
 @app.post("/classify")
-async def classify_document(file: UploadFile = File(...)):
+async def classify_document(response: Response, file: UploadFile = File(...), profile: Optional[str] = Form(None)):
     """Classify document type and priority"""
     try:
-        # Process the uploaded file
-        text, extension = await process_uploaded_file(file)
+        document = await UploadedDocument.open(file, profile)
         
         # Classify document
-        classification = document_classifier.classify_document(text)
+        classification = await document.run_stage(
+            "classify", "classifier", {}, classify_text
+        )
+        document.set_cache_header(response)
         
         return {
             "status": "success",
             "filename": file.filename,
-            "file_type": extension,
+            "file_type": document.extension,
+            "profile": document.profile,
             "classification": classification
         }
+    except SERVICE_ERRORS:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error classifying document: {str(e)}")
 
 @app.post("/summarize")
-async def summarize_document(file: UploadFile = File(...)):
-    """Generate a summary of the document"""
+async def summarize_document(response: Response, file: UploadFile = File(...), profile: Optional[str] = Form(None),
+                             mode: Optional[str] = Form(None)):
+    """Generate a summary of the document, mode overrides SUMMARY_MODE"""
+    if mode is not None and mode not in SUMMARY_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown summary mode: {mode}")
+    options = dict(summary_options, mode=mode) if mode else summary_options
+    
     try:
-        # Process the uploaded file
-        text, extension = await process_uploaded_file(file)
+        document = await UploadedDocument.open(file, profile)
         
         # Generate summary
-        summary = document_summarizer.generate_summary(text)
+        summary = await document.run_stage(
+            "summarize", "summarizer", options, functools.partial(summarize_text, options=options)
+        )
+        document.set_cache_header(response)
         
         return {
             "status": "success",
             "filename": file.filename,
-            "file_type": extension,
+            "file_type": document.extension,
+            "profile": document.profile,
             "summary": summary
         }
+    except SERVICE_ERRORS:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error summarizing document: {str(e)}")
 
 @app.post("/process")
-async def process_document(file: UploadFile = File(...)):
-    """Process document with all available functions"""
+async def process_document(response: Response, file: UploadFile = File(...), profile: Optional[str] = Form(None),
+                           stages: str = Form("extract,classify,summarize")):
+    """Process document with the requested functions, all of them by default, running them concurrently"""
+    requested = parse_stages(stages)
     try:
-        # Process the uploaded file
-        text, extension = await process_uploaded_file(file)
+        document = await UploadedDocument.open(file, profile)
         
-        # Run all processing functions
-        entities = entity_extractor.extract_key_information(text)
-        classification = document_classifier.classify_document(text)
-        summary = document_summarizer.generate_summary(text)
+        result = await process_all_stages(document, requested)
+        document.set_cache_header(response)
         
         # Return combined results
-        return {
-            "status": "success",
-            "filename": file.filename,
-            "file_type": extension,
-            "text_length": len(text.split()),
-            "entities": entities,
-            "classification": classification,
-            "summary": summary
-        }
+        return result
+    except SERVICE_ERRORS:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
 
+def server_sent_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/process/stream")
+async def process_document_stream(file: UploadFile = File(...), profile: Optional[str] = Form(None),
+                                  stages: str = Form("extract,classify,summarize")):
+    """
+    Process a document like /process, streaming results as server-sent events.
+    
+    Events, each with a JSON payload:
+    
+    - ``text_progress``: text extraction is under way (segments, characters),
+      sent as pages, paragraphs or blocks are extracted, at most every
+      TEXT_PROGRESS_INTERVAL seconds
+    - ``text``: the text was extracted (filename, file_type, profile, text_length)
+    - ``entities``, ``classification``: a stage finished, with its result and seconds
+    - ``summary_chunk``: one chunk summary of a long document (index, summary)
+    - ``summary``: the final summary and its seconds
+    - ``error``: a stage failed (stage, detail), the other stages carry on
+    - ``done``: every stage has finished (status, timings)
+    """
+    requested = parse_stages(stages)
+    document = await UploadedDocument.open(file, profile)
+    for stage in requested:
+        model_registry.require(STAGES[stage][0], document.profile)
+    
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    timings: Dict[str, float] = {}
+    
+    progress = {"segments": 0, "characters": 0, "sent": None}
+    
+    def on_segment(segment: str) -> None:
+        # Called from the extraction thread for every page, paragraph or block
+        progress["segments"] += 1
+        progress["characters"] += len(segment)
+        now = time.perf_counter()
+        if progress["sent"] is None or now - progress["sent"] >= TEXT_PROGRESS_INTERVAL:
+            progress["sent"] = now
+            data = {"segments": progress["segments"], "characters": progress["characters"]}
+            loop.call_soon_threadsafe(events.put_nowait, ("text_progress", data))
+    
+    def on_chunk_summary(index: int, summary: str) -> None:
+        # Called from the summarizer's batching thread
+        loop.call_soon_threadsafe(events.put_nowait, ("summary_chunk", {"index": index, "summary": summary}))
+    
+    async def run_streamed_stage(stage: str) -> None:
+        model_name, params, compute, field = STAGES[stage]
+        if stage == "summarize":
+            compute = functools.partial(summarize_text, on_chunk_summary=on_chunk_summary)
+        started = time.perf_counter()
+        try:
+            result = await document.run_stage(stage, model_name, params, compute)
+        except Exception as e:
+            await events.put(("error", {"stage": stage, "detail": f"Error processing document: {str(e)}"}))
+            return
+        timings[stage] = round(time.perf_counter() - started, 4)
+        await events.put((field, {field: result, "seconds": timings[stage]}))
+    
+    async def stream_events():
+        tasks = []
+        try:
+            # Report extraction progress until the text is ready
+            loading = asyncio.ensure_future(document.get_context(on_segment=on_segment))
+            tasks = [loading]
+            loading.add_done_callback(lambda _: events.put_nowait(("text_loaded", None)))
+            while True:
+                event, data = await events.get()
+                if event == "text_loaded":
+                    break
+                yield server_sent_event(event, data)
+            
+            try:
+                context = loading.result()
+            except Exception as e:
+                yield server_sent_event("error", {"stage": "load", "detail": f"Error extracting text: {str(e)}"})
+                yield server_sent_event("done", {"status": "error", "timings": timings})
+                return
+            yield server_sent_event("text", {
+                "filename": document.filename,
+                "file_type": document.extension,
+                "profile": document.profile,
+                "text_length": context.word_count
+            })
+            
+            tasks = [asyncio.ensure_future(run_streamed_stage(stage)) for stage in requested]
+            finished = 0
+            while finished < len(requested):
+                event, data = await events.get()
+                if event != "summary_chunk":
+                    finished += 1
+                yield server_sent_event(event, data)
+            
+            status = "success" if len(timings) == len(requested) else "error"
+            yield server_sent_event("done", {"status": status, "timings": timings})
+        finally:
+            # Stop outstanding work if the client goes away
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(
+        stream_events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    stages: str = Form("extract,classify,summarize"),
+    priority: Optional[str] = Form(None),
+    callback_url: Optional[str] = Form(None),
+    profile: Optional[str] = Form(None)
+):
+    """
+    Queue a document for background processing and return its job id right away.
+    
+    Jobs run in priority order, then smallest document first. Unless a priority
+    is given, a job starts at medium priority and is re-prioritized with the
+    classifier's priority once its classify stage has run. The finished job is
+    POSTed to callback_url when one is given. profile selects the model
+    profile, defaulting to MODEL_PROFILE.
+    """
+    requested = parse_stages(stages)
+    if priority is not None and priority not in PRIORITY_RANKS:
+        raise HTTPException(status_code=400, detail=f"Unknown priority: {priority}")
+    if callback_url:
+        try:
+            # Resolving the host blocks, keep it off the event loop
+            await run_in_threadpool(validate_webhook_url, callback_url, settings.webhook_allowed_hosts)
+        except InvalidWebhookError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    profile = model_registry.resolve_profile(profile)
+    for stage in requested:
+        model_registry.require(STAGES[stage][0], profile)
+    
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    job = new_job(
+        filename=file.filename,
+        file_type=extension,
+        priority=priority or "medium",
+        profile=profile,
+        stages=requested,
+        pending_stages=[stage for stage in JOB_STAGE_ORDER if stage in requested],
+        priority_fixed=priority is not None,
+        result={},
+        callback_url=callback_url
+    )
+    job["content_hash"] = await hash_uploaded_file(file)
+    job["source_path"] = os.path.join(job_spool_dir, job["id"] + extension)
+    job["size"] = await run_in_threadpool(spool_document, file.file, job["source_path"])
+    
+    try:
+        job_queue.submit(job["id"], job_priority(job["priority"], job["size"]))
+    except JobQueueFullError:
+        os.remove(job["source_path"])
+        raise
+    job_store.save(job)
+    
+    return JSONResponse(
+        status_code=202, content=public_job(job), headers={"Location": f"/jobs/{job['id']}"}
+    )
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Return the status of a job and the results of its finished stages"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return public_job(job)
+
+@app.post("/process/batch")
+async def process_documents_batch(files: List[UploadFile] = File(...), profile: Optional[str] = Form(None)):
+    """
+    Process many documents, or zip archives of documents, with all available functions.
+    
+    Documents are processed concurrently so their model inputs share batches,
+    and each result is streamed back as one line of newline-delimited JSON as
+    soon as that document is done.
+    """
+    model_registry.resolve_profile(profile)
+    try:
+        documents = await list_batch_documents(files, profile)
+    except zipfile.BadZipFile as e:
+        raise HTTPException(status_code=400, detail=f"Invalid zip archive: {str(e)}")
+    
+    semaphore = asyncio.Semaphore(settings.process_batch_concurrency)
+    
+    async def process_entry(fields: Dict[str, Any], open_document) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                document = await open_document()
+                result = await process_all_stages(document)
+                return dict(result, **fields, cache=document.cache_status)
+            except Exception as e:
+                return dict(fields, status="error", detail=str(e))
+    
+    async def stream_results():
+        tasks = [asyncio.ensure_future(process_entry(*document)) for document in documents]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield json.dumps(await task) + "\n"
+        finally:
+            # Stop outstanding work if the client goes away
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run(
+        "app.main:app",
+        host=settings.server_host,
+        port=settings.server_port,
+        workers=settings.server_workers,
+        reload=settings.server_reload
+    )
\ No newline at end of file
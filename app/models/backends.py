@@ -0,0 +1,248 @@
+"""
+Inference backends for the transformer pipelines.
+
+- ``eager``: PyTorch as loaded by transformers
+- ``quantized``: PyTorch with dynamic int8 quantization of the linear layers
+- ``onnx``: ONNX Runtime sessions exported with optimum (``pip install optimum[onnxruntime]``)
+
+Run ``python -m app.models.backends --backend quantized`` to check that a
+backend gives the same results as eager mode for the configured models.
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("eager", "quantized", "onnx")
+
+# Pipeline task -> optimum ONNX Runtime model class
+ONNX_MODEL_CLASSES = {
+    "token-classification": "ORTModelForTokenClassification",
+    "zero-shot-classification": "ORTModelForSequenceClassification",
+    "summarization": "ORTModelForSeq2SeqLM"
+}
+
+def backend_model_id(model_name: str, backend: str = "eager") -> str:
+    """Identity of a model run on a backend, used to keep cached results apart."""
+    return model_name if backend == "eager" else f"{model_name}@{backend}"
+
+def _load_onnx_model(task: str, model_name: str, cache_dir: Optional[str] = None):
+    try:
+        import optimum.onnxruntime
+    except ImportError:
+        raise RuntimeError("The onnx backend requires optimum: pip install optimum[onnxruntime]")
+    from transformers import AutoTokenizer
+    
+    model_class = getattr(optimum.onnxruntime, ONNX_MODEL_CLASSES[task])
+    export_dir = os.path.join(cache_dir, model_name.replace("/", "--")) if cache_dir else None
+    if export_dir and os.path.isdir(export_dir):
+        return model_class.from_pretrained(export_dir), AutoTokenizer.from_pretrained(export_dir)
+    
+    # Export the PyTorch checkpoint, keeping the result so later loads skip the export
+    model = model_class.from_pretrained(model_name, export=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if export_dir:
+        model.save_pretrained(export_dir)
+        tokenizer.save_pretrained(export_dir)
+    return model, tokenizer
+
+def build_pipeline(task: str, model_name: str, backend: str = "eager",
+                   onnx_cache_dir: Optional[str] = None, **kwargs: Any):
+    """
+    Build a transformers pipeline running on the given backend.
+    
+    Args:
+        task: Pipeline task, one of ONNX_MODEL_CLASSES
+        model_name: Hugging Face model name or path
+        backend: One of BACKENDS
+        onnx_cache_dir: Directory keeping exported ONNX models between runs
+        **kwargs: Further pipeline arguments
+    
+    Returns:
+        The pipeline
+    """
+    from transformers import pipeline
+    
+    if backend == "eager":
+        return pipeline(task, model=model_name, **kwargs)
+    
+    if backend == "quantized":
+        import torch
+        
+        nlp = pipeline(task, model=model_name, **kwargs)
+        nlp.model = torch.quantization.quantize_dynamic(nlp.model, {torch.nn.Linear}, dtype=torch.qint8)
+        return nlp
+    
+    if backend == "onnx":
+        model, tokenizer = _load_onnx_model(task, model_name, onnx_cache_dir)
+        return pipeline(task, model=model, tokenizer=tokenizer, **kwargs)
+    
+    raise ValueError(f"Unknown inference backend: {backend}, expected one of {', '.join(BACKENDS)}")
+
+def configure_torch_threads(num_threads: int = 0, interop_threads: int = 0) -> None:
+    """
+    Set PyTorch's intra-op and inter-op thread counts, 0 keeping PyTorch's defaults.
+    
+    PyTorch is only imported when a count is set. The inter-op count can only
+    be set before PyTorch runs any inter-op work, later attempts are skipped.
+    """
+    if num_threads <= 0 and interop_threads <= 0:
+        return
+    import torch
+    
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+    if interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            logger.warning("PyTorch inter-op threads are already in use, keeping %d", torch.get_num_interop_threads())
+
+class TokenizerCopy:
+    """
+    Private copy of a pipeline's tokenizer for tokenizing outside its micro-batcher.
+    
+    Fast tokenizers cannot be shared between threads: the pipeline changes
+    its tokenizer's truncation and padding on the batcher thread while
+    tokenizing. Request threads use this copy instead, one call at a time.
+    Other attributes are read from the copy.
+    """
+    
+    def __init__(self, tokenizer: Any):
+        self.tokenizer = copy.deepcopy(tokenizer)
+        self._lock = threading.Lock()
+    
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            return self.tokenizer(*args, **kwargs)
+    
+    def __getattr__(self, name: str) -> Any:
+        if name == "tokenizer":
+            # Not set yet, e.g. while unpickling
+            raise AttributeError(name)
+        return getattr(self.tokenizer, name)
+
+def entity_agreement(reference: List[Dict[str, Any]], candidate: List[Dict[str, Any]]) -> float:
+    """F1 score of the candidate's (label, start, end) entities against the reference."""
+    reference_spans = {(e["entity_group"], e["start"], e["end"]) for e in reference}
+    candidate_spans = {(e["entity_group"], e["start"], e["end"]) for e in candidate}
+    if not reference_spans and not candidate_spans:
+        return 1.0
+    matched = len(reference_spans & candidate_spans)
+    return 2 * matched / (len(reference_spans) + len(candidate_spans))
+
+def label_agreement(reference: Dict[str, Any], candidate: Dict[str, Any]) -> float:
+    """1.0 if both zero-shot results rank the same label first, else 0.0."""
+    return float(reference["labels"][0] == candidate["labels"][0])
+
+def summary_agreement(reference: List[Dict[str, Any]], candidate: List[Dict[str, Any]]) -> float:
+    """Unigram F1 overlap between two summaries."""
+    reference_words = reference[0]["summary_text"].lower().split()
+    candidate_words = candidate[0]["summary_text"].lower().split()
+    if not reference_words and not candidate_words:
+        return 1.0
+    remaining = list(reference_words)
+    overlap = 0
+    for word in candidate_words:
+        if word in remaining:
+            remaining.remove(word)
+            overlap += 1
+    return 2 * overlap / (len(reference_words) + len(candidate_words))
+
+# Task -> (agreement function, call arguments)
+PARITY_CHECKS = {
+    "token-classification": (entity_agreement, {}),
+    "zero-shot-classification": (label_agreement, {
+        "candidate_labels": ["invoice", "contract", "email", "report", "memo"]
+    }),
+    "summarization": (summary_agreement, {"max_length": 60, "min_length": 10, "do_sample": False})
+}
+
+PARITY_TEXTS = [
+    "John Smith from ABC Corporation in New York signed the contract on January 15, 2023. "
+    "XYZ Ltd. will pay $5,000 per month for consulting services.",
+    "Invoice INV-2041 from Northwind Traders is due on March 3. Please remit $12,400 to the "
+    "account at First National Bank in Chicago before the deadline to avoid late fees.",
+    "Hi team, the quarterly review with Maria Garcia has moved to Thursday in the London office. "
+    "Please send your slides to Tom Baker by Wednesday noon so they can be merged."
+]
+
+def check_parity(task: str, model_name: str, backend: str, texts: Optional[List[str]] = None,
+                 onnx_cache_dir: Optional[str] = None, **kwargs: Any) -> Dict[str, Any]:
+    """
+    Compare a backend's outputs and latency against eager mode.
+    
+    Args:
+        task: Pipeline task, one of PARITY_CHECKS
+        model_name: Hugging Face model name or path
+        backend: Backend to compare against eager mode
+        texts: Inputs to compare on, defaults to PARITY_TEXTS
+        onnx_cache_dir: Directory keeping exported ONNX models between runs
+        **kwargs: Further pipeline arguments
+    
+    Returns:
+        Report with the mean agreement (1.0 is identical) and latencies
+    """
+    agreement_fn, call_kwargs = PARITY_CHECKS[task]
+    texts = texts or PARITY_TEXTS
+    pipelines = {
+        "eager": build_pipeline(task, model_name, **kwargs),
+        backend: build_pipeline(task, model_name, backend, onnx_cache_dir, **kwargs)
+    }
+    
+    outputs, seconds = {}, {}
+    for name, nlp in pipelines.items():
+        # One untimed call so lazy initialization does not count as latency
+        nlp(texts[0], **call_kwargs)
+        started = time.perf_counter()
+        outputs[name] = [nlp(text, **call_kwargs) for text in texts]
+        seconds[name] = (time.perf_counter() - started) / len(texts)
+    
+    scores = [agreement_fn(ref, cand) for ref, cand in zip(outputs["eager"], outputs[backend])]
+    return {
+        "task": task,
+        "model": model_name,
+        "backend": backend,
+        "agreement": sum(scores) / len(scores),
+        "eager_seconds": seconds["eager"],
+        "backend_seconds": seconds[backend],
+        "speedup": seconds["eager"] / seconds[backend] if seconds[backend] else None
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.core.config import get_settings
+    
+    settings = get_settings()
+    models = {
+        "extractor": ("token-classification", settings.ner_model, {"aggregation_strategy": "simple"}),
+        "classifier": ("zero-shot-classification", settings.classifier_model, {}),
+        "summarizer": ("summarization", settings.summarizer_model, {})
+    }
+    
+    parser = argparse.ArgumentParser(description="Compare an inference backend against eager mode.")
+    parser.add_argument("--backend", choices=[b for b in BACKENDS if b != "eager"], required=True)
+    parser.add_argument("--models", default=",".join(models),
+                        help="Comma-separated models to check (default: extractor,classifier,summarizer)")
+    parser.add_argument("--min-agreement", type=float, default=0.9,
+                        help="Fail when the mean agreement of a model is below this value")
+    args = parser.parse_args(argv)
+    
+    passed = True
+    for name in args.models.split(","):
+        task, model_name, kwargs = models[name.strip()]
+        report = check_parity(task, model_name, args.backend, onnx_cache_dir=settings.onnx_cache_dir, **kwargs)
+        report["passed"] = report["agreement"] >= args.min_agreement
+        passed = passed and report["passed"]
+        print(json.dumps(report))
+    
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,41 @@
-from typing import Dict, List, Any
-import re
-from transformers import pipeline
+from typing import Dict, List, Any, Optional, Sequence, Tuple, Union
+import torch
+
+from app.models.backends import backend_model_id, build_pipeline
+from app.models.fields import document_fields
+from app.utils.batching import MicroBatcher
+from app.utils.document_context import DocumentContext
 
 class DocumentClassifier:
-    def __init__(self):
+    def __init__(self, model_name: str = "facebook/bart-large-mnli",
+                 max_batch_size: int = 16, max_batch_wait_ms: float = 5.0,
+                 backend: str = "eager", onnx_cache_dir: Optional[str] = None,
+                 document_types: Optional[List[str]] = None, sample_words: int = 1024):
         # Load zero-shot classification pipeline
-        self.classifier = pipeline(
+        self.model_id = backend_model_id(model_name, backend)
+        self.classifier = build_pipeline(
             "zero-shot-classification",
-            model="facebook/bart-large-mnli"
+            model_name,
+            backend,
+            onnx_cache_dir
         )
         
+        self._init_labels(document_types)
+        self.sample_words = sample_words
+        
+        # Merge NLI pairs from concurrent requests into padded batches
+        self.nli_batcher = MicroBatcher(
+            self._entailment_logits,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_batch_wait_ms,
+            length_fn=lambda pair: len(pair[0]) + len(pair[1]),
+            name="nli-batcher"
+        )
+    
+    def _init_labels(self, document_types: Optional[List[str]] = None) -> None:
+        """Set up the candidate labels and hypothesis templates."""
         # Define document types
-        self.document_types = [
+        self.document_types = list(document_types or [
             "invoice", 
             "contract", 
             "report", 
@@ -21,7 +45,7 @@ class DocumentClassifier:
             "memo",
             "financial_statement",
             "legal_notice"
-        ]
+        ])
         
         # Define priority levels
         self.priority_levels = [
@@ -30,27 +54,74 @@ class DocumentClassifier:
             "medium", 
             "low"
         ]
+        
+        # Hypothesis templates used for each label group
+        self.type_template = "This document is a {}."
+        self.priority_template = "This document has {} priority."
+    
+    def _sample_text(self, text: Union[str, DocumentContext]) -> str:
+        """Return the leading part of the document used for classification."""
+        # For very long documents, use the first sample_words words for classification
+        return DocumentContext.of(text).leading_words(self.sample_words)
+    
+    def _entailment_logits(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        """Run a batch of (premise, hypothesis) pairs through the NLI model."""
+        inputs = self.classifier.tokenizer(
+            [premise for premise, _ in pairs],
+            [hypothesis for _, hypothesis in pairs],
+            padding=True,
+            truncation="only_first",
+            return_tensors="pt"
+        ).to(self.classifier.device)
+        self.nli_batcher.record_input_tokens(inputs["input_ids"].shape[1])
+        
+        with torch.no_grad():
+            logits = self.classifier.model(**inputs).logits
+        return logits[:, self.classifier.entailment_id].tolist()
     
-    def classify_document_type(self, text: str) -> Dict[str, Any]:
+    def _score_label_groups(self, text_sample: str,
+                            label_groups: Sequence[Tuple[List[str], str]]) -> List[Dict[str, Any]]:
         """
-        Classify document type using zero-shot classification.
+        Score several groups of candidate labels in a single batched NLI pass.
+        
+        Every (premise, hypothesis) pair of every group is sent through the
+        model together, sharing padded batches with concurrent requests.
+        Scores are then normalised within each group exactly like the
+        zero-shot pipeline does, so each entry matches what
+        ``self.classifier(text, candidate_labels=...)`` returns.
         
         Args:
-            text: Document text
-            
+            text_sample: Premise text
+            label_groups: Sequence of (candidate_labels, hypothesis_template)
+        
         Returns:
-            Classification results with confidence scores
+            One {"labels": [...], "scores": [...]} dict per group, sorted by score
         """
-        # For very long documents, use first 1024 tokens for classification
-        text_sample = " ".join(text.split()[:1024])
+        hypotheses = [
+            template.format(label)
+            for labels, template in label_groups
+            for label in labels
+        ]
         
-        # Run zero-shot classification
-        result = self.classifier(
-            text_sample,
-            candidate_labels=self.document_types,
-            hypothesis_template="This document is a {}."
+        entail_logits = torch.tensor(
+            self.nli_batcher.submit([(text_sample, hypothesis) for hypothesis in hypotheses])
         )
         
+        results = []
+        offset = 0
+        for labels, _ in label_groups:
+            scores = torch.softmax(entail_logits[offset:offset + len(labels)], dim=-1).tolist()
+            offset += len(labels)
+            ranked = sorted(zip(labels, scores), key=lambda pair: pair[1], reverse=True)
+            results.append({
+                "labels": [label for label, _ in ranked],
+                "scores": [score for _, score in ranked]
+            })
+        
+        return results
+    
+    def _type_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the document type response from raw label scores."""
         return {
             "document_type": result["labels"][0],
             "confidence": result["scores"][0],
@@ -60,32 +131,17 @@ class DocumentClassifier:
             ]
         }
     
-    def determine_priority(self, text: str) -> Dict[str, Any]:
-        """
-        Determine document priority using keyword matching and zero-shot classification.
+    def _priority_result(self, text: Union[str, DocumentContext],
+                         priority_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Combine raw priority label scores with keyword-based urgency checks."""
+        # Urgency terms and deadlines come from the same scan as the business fields
+        fields = document_fields(text)
         
-        Args:
-            text: Document text
-            
-        Returns:
-            Priority assessment
-        """
         # Look for explicit urgency indicators
-        urgent_terms = ["urgent", "asap", "immediately", "emergency", "deadline", "critical"]
-        text_lower = text.lower()
-        explicit_urgency = any(term in text_lower for term in urgent_terms)
+        explicit_urgency = any(field.label == "URGENCY" for field in fields)
         
         # Check for dates and deadlines
-        date_pattern = r'\b(today|tomorrow|next week|due by|due date|deadline)\b'
-        contains_deadline = bool(re.search(date_pattern, text_lower))
-        
-        # Use zero-shot classification for priority
-        text_sample = " ".join(text.split()[:1024])
-        priority_result = self.classifier(
-            text_sample,
-            candidate_labels=self.priority_levels,
-            hypothesis_template="This document has {} priority."
-        )
+        contains_deadline = any(field.label == "DEADLINE" for field in fields)
         
         # Determine final priority
         # If explicit urgency indicators found, boost priority
@@ -104,18 +160,73 @@ class DocumentClassifier:
             ]
         }
     
-    def classify_document(self, text: str) -> Dict[str, Any]:
+    def classify_document_type(self, text: Union[str, DocumentContext]) -> Dict[str, Any]:
+        """
+        Classify document type using zero-shot classification.
+        
+        Args:
+            text: Document text or shared DocumentContext
+        
+        Returns:
+            Classification results with confidence scores
+        """
+        text_sample = self._sample_text(text)
+        
+        # Run zero-shot classification
+        result = self.classifier(
+            text_sample,
+            candidate_labels=self.document_types,
+            hypothesis_template=self.type_template
+        )
+        
+        return self._type_result(result)
+    
+    def determine_priority(self, text: Union[str, DocumentContext]) -> Dict[str, Any]:
+        """
+        Determine document priority using keyword matching and zero-shot classification.
+        
+        Args:
+            text: Document text or shared DocumentContext
+        
+        Returns:
+            Priority assessment
+        """
+        # Use zero-shot classification for priority
+        priority_result = self.classifier(
+            self._sample_text(text),
+            candidate_labels=self.priority_levels,
+            hypothesis_template=self.priority_template
+        )
+        
+        return self._priority_result(text, priority_result)
+    
+    def classify_document(self, text: Union[str, DocumentContext], single_pass: bool = True) -> Dict[str, Any]:
         """
         Full document classification including type and priority.
         
         Args:
-            text: Document text
-            
+            text: Document text or shared DocumentContext
+            single_pass: Score type and priority hypotheses together in one
+                batched forward pass instead of two separate pipeline calls
+        
         Returns:
             Complete classification results
         """
-        type_result = self.classify_document_type(text)
-        priority_result = self.determine_priority(text)
+        text = DocumentContext.of(text)
+        
+        if single_pass:
+            type_scores, priority_scores = self._score_label_groups(
+                self._sample_text(text),
+                [
+                    (self.document_types, self.type_template),
+                    (self.priority_levels, self.priority_template)
+                ]
+            )
+            type_result = self._type_result(type_scores)
+            priority_result = self._priority_result(text, priority_scores)
+        else:
+            type_result = self.classify_document_type(text)
+            priority_result = self.determine_priority(text)
         
         return {
             "document_type": type_result["document_type"],
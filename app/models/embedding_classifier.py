@@ -0,0 +1,273 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+from app.models.backends import TokenizerCopy
+from app.models.classifier import DocumentClassifier
+from app.utils.batching import MicroBatcher
+from app.utils.document_context import DocumentContext
+
+# Extra prototype sentences per label, embedded alongside the label's hypothesis
+LABEL_DESCRIPTIONS = {
+    "invoice": ["A bill listing goods or services delivered, amounts owed and a payment due date."],
+    "contract": ["An agreement between parties setting out terms, obligations and signatures."],
+    "report": ["A document presenting findings, analysis and results on a topic."],
+    "email": ["An email message with a greeting, a request or update, and a sign-off."],
+    "resume": ["A CV describing a person's work experience, education and skills."],
+    "presentation": ["Slides with short bullet points prepared for a talk or meeting."],
+    "memo": ["An internal memorandum informing staff about a decision or change."],
+    "financial_statement": ["A balance sheet or income statement with assets, liabilities and revenue."],
+    "legal_notice": ["A formal legal notice informing a party of rights, claims or proceedings."],
+    "urgent": ["This needs immediate action, it is an emergency."],
+    "high": ["This is important and should be handled soon."],
+    "medium": ["This should be handled in the normal course of work."],
+    "low": ["This is for information only, no action is needed."]
+}
+
+class EmbeddingClassifier(DocumentClassifier):
+    """
+    Document classifier comparing one document embedding against label embeddings.
+    
+    Every label is represented by prototype sentences, its hypothesis and any
+    descriptions, which are embedded once and cached. Classifying a document
+    embeds it once and scores all labels with a single matrix product, so the
+    cost hardly grows with the number of labels. Results whose top score is
+    below ``escalation_threshold`` are re-scored by an NLI classifier over the
+    ``escalation_top_k`` best labels.
+    
+    Returns results in the same format as DocumentClassifier.
+    """
+    
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 max_batch_size: int = 16, max_batch_wait_ms: float = 5.0,
+                 document_types: Optional[List[str]] = None,
+                 label_descriptions: Optional[Dict[str, List[str]]] = None,
+                 fallback_factory: Optional[Callable[[], DocumentClassifier]] = None,
+                 escalation_threshold: float = 0.0, escalation_top_k: int = 5,
+                 temperature: float = 0.05, max_length: int = 512, sample_words: int = 1024):
+        self.model_id = model_name
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).eval()
+        self.max_tokens = min(max_length, self.tokenizer.model_max_length)
+        # Documents are split into windows on request threads, with a tokenizer of their own
+        self.window_tokenizer = TokenizerCopy(self.tokenizer)
+        
+        self._init_labels(document_types)
+        self.sample_words = sample_words
+        self.label_descriptions = dict(LABEL_DESCRIPTIONS, **(label_descriptions or {}))
+        self.temperature = temperature
+        
+        # Label embeddings by (labels, template), computed on first use
+        self._label_embeddings: Dict[Tuple[Tuple[str, ...], str], Tuple[np.ndarray, np.ndarray]] = {}
+        self._label_lock = threading.Lock()
+        
+        # NLI classifier for low-confidence results, loaded on first escalation
+        self.fallback_factory = fallback_factory
+        self.escalation_threshold = escalation_threshold
+        self.escalation_top_k = escalation_top_k
+        self._fallback: Optional[DocumentClassifier] = None
+        self._fallback_lock = threading.Lock()
+        
+        # Merge texts to embed from concurrent requests into padded batches
+        self.embed_batcher = MicroBatcher(
+            self._embed_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_batch_wait_ms,
+            name="embed-batcher"
+        )
+    
+    def _embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed a batch of texts as L2-normalised mean-pooled token embeddings."""
+        inputs = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_tokens, return_tensors="pt"
+        )
+        self.embed_batcher.record_input_tokens(inputs["input_ids"].shape[1])
+        with torch.no_grad():
+            hidden = self.model(**inputs).last_hidden_state
+        
+        mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        embeddings = ((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)).numpy()
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True).clip(min=1e-12)
+        return list(embeddings)
+    
+    def embed_document(self, text: Union[str, DocumentContext]) -> np.ndarray:
+        """
+        Embed the classification sample of a document.
+        
+        The sample is split into windows that fit the model, which are embedded
+        in one batch and averaged.
+        
+        Args:
+            text: Document text or shared DocumentContext
+        
+        Returns:
+            L2-normalised document embedding
+        """
+        sample = self._sample_text(text)
+        offsets = [
+            (start, end) for start, end in self.window_tokenizer(
+                sample, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+            )["offset_mapping"]
+            if end > start
+        ]
+        window = self.max_tokens - self.window_tokenizer.num_special_tokens_to_add()
+        windows = [
+            sample[offsets[i][0]:offsets[min(i + window, len(offsets)) - 1][1]]
+            for i in range(0, len(offsets), window)
+        ] or [sample]
+        
+        embedding = np.mean(self.embed_batcher.submit(windows), axis=0)
+        return embedding / max(np.linalg.norm(embedding), 1e-12)
+    
+    def _label_matrix(self, labels: Sequence[str], template: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the cached prototype embeddings of a label group.
+        
+        Returns:
+            Tuple containing (prototype embeddings, index of each prototype's label)
+        """
+        key = (tuple(labels), template)
+        with self._label_lock:
+            cached = self._label_embeddings.get(key)
+        if cached is not None:
+            return cached
+        
+        prototypes, owners = [], []
+        for index, label in enumerate(labels):
+            for prototype in [template.format(label.replace("_", " "))] + self.label_descriptions.get(label, []):
+                prototypes.append(prototype)
+                owners.append(index)
+        
+        matrix = (np.stack(self.embed_batcher.submit(prototypes)), np.array(owners))
+        with self._label_lock:
+            self._label_embeddings[key] = matrix
+        return matrix
+    
+    def _embedding_scores(self, document: np.ndarray, labels: Sequence[str], template: str) -> Dict[str, Any]:
+        """Score a label group by the cosine similarity of its best prototype."""
+        prototypes, owners = self._label_matrix(labels, template)
+        similarities = prototypes @ document
+        
+        label_scores = np.full(len(labels), -np.inf)
+        np.maximum.at(label_scores, owners, similarities)
+        
+        # Softmax over similarities, sharpened by the temperature
+        logits = label_scores / self.temperature
+        scores = np.exp(logits - logits.max())
+        scores /= scores.sum()
+        
+        order = np.argsort(-scores)
+        return {
+            "labels": [labels[i] for i in order],
+            "scores": [float(scores[i]) for i in order]
+        }
+    
+    def _get_fallback(self) -> DocumentClassifier:
+        with self._fallback_lock:
+            if self._fallback is None:
+                self._fallback = self.fallback_factory()
+            return self._fallback
+    
+    def _score_label_groups(self, text_sample: str,
+                            label_groups: Sequence[Tuple[List[str], str]]) -> List[Dict[str, Any]]:
+        """
+        Score several groups of candidate labels against one document embedding.
+        
+        Groups whose best score is below the escalation threshold are re-scored
+        by the NLI classifier over their best labels; the remaining labels get
+        a score of 0.0 and the group is marked as escalated.
+        
+        Args:
+            text_sample: Document sample to classify
+            label_groups: Sequence of (candidate_labels, hypothesis_template)
+        
+        Returns:
+            One {"labels": [...], "scores": [...]} dict per group, sorted by score
+        """
+        document = self.embed_document(text_sample)
+        results = [self._embedding_scores(document, labels, template) for labels, template in label_groups]
+        
+        if self.fallback_factory is None:
+            return results
+        
+        uncertain = [i for i, result in enumerate(results) if result["scores"][0] < self.escalation_threshold]
+        if uncertain:
+            rescored = self._get_fallback()._score_label_groups(
+                text_sample,
+                [(results[i]["labels"][:self.escalation_top_k], label_groups[i][1]) for i in uncertain]
+            )
+            for i, result in zip(uncertain, rescored):
+                dropped = results[i]["labels"][self.escalation_top_k:]
+                results[i] = {
+                    "labels": result["labels"] + dropped,
+                    "scores": result["scores"] + [0.0] * len(dropped),
+                    "escalated": True
+                }
+        
+        return results
+    
+    def classify_document_type(self, text: Union[str, DocumentContext]) -> Dict[str, Any]:
+        """
+        Classify document type by label embedding similarity.
+        
+        Args:
+            text: Document text or shared DocumentContext
+        
+        Returns:
+            Classification results with confidence scores
+        """
+        result, = self._score_label_groups(self._sample_text(text), [(self.document_types, self.type_template)])
+        return self._type_result(result)
+    
+    def determine_priority(self, text: Union[str, DocumentContext]) -> Dict[str, Any]:
+        """
+        Determine document priority using keyword matching and label embedding similarity.
+        
+        Args:
+            text: Document text or shared DocumentContext
+        
+        Returns:
+            Priority assessment
+        """
+        result, = self._score_label_groups(self._sample_text(text), [(self.priority_levels, self.priority_template)])
+        return self._priority_result(text, result)
+    
+    def classify_document(self, text: Union[str, DocumentContext], single_pass: bool = True) -> Dict[str, Any]:
+        """
+        Full document classification including type and priority.
+        
+        The document is embedded once for both label groups; single_pass is
+        accepted for compatibility with DocumentClassifier.
+        
+        Args:
+            text: Document text or shared DocumentContext
+        
+        Returns:
+            Complete classification results, with "engine" set to "nli" when
+            a low-confidence result was escalated to the NLI classifier
+        """
+        text = DocumentContext.of(text)
+        type_scores, priority_scores = self._score_label_groups(
+            self._sample_text(text),
+            [
+                (self.document_types, self.type_template),
+                (self.priority_levels, self.priority_template)
+            ]
+        )
+        type_result = self._type_result(type_scores)
+        priority_result = self._priority_result(text, priority_scores)
+        
+        return {
+            "document_type": type_result["document_type"],
+            "type_confidence": type_result["confidence"],
+            "all_types": type_result["all_types"],
+            "priority": priority_result["priority"],
+            "priority_confidence": priority_result["confidence"],
+            "urgency_indicators": {
+                "explicit_terms": priority_result["contains_explicit_urgency"],
+                "deadlines": priority_result["contains_deadline"]
+            },
+            "engine": "nli" if type_scores.get("escalated") or priority_scores.get("escalated") else "embedding"
+        }
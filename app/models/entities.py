@@ -0,0 +1,145 @@
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+# Result categories of extract_key_information
+CATEGORIES = [
+    "people",
+    "organizations",
+    "dates",
+    "monetary_values",
+    "locations",
+    "emails",
+    "phone_numbers",
+    "invoice_numbers",
+    "percentages",
+    "other_entities"
+]
+
+# spaCy label -> result category, any other label goes to "other_entities"
+SPACY_CATEGORIES = {
+    "PERSON": "people",
+    "ORG": "organizations",
+    "DATE": "dates",
+    "MONEY": "monetary_values",
+    "GPE": "locations",
+    "LOC": "locations",
+    "PERCENT": "percentages"
+}
+
+# Transformer entity group -> (result category, reported label)
+TRANSFORMER_CATEGORIES = {
+    "PER": ("people", "PERSON"),
+    "ORG": ("organizations", "ORG"),
+    "LOC": ("locations", "LOC")
+}
+
+# Business field pattern label -> result category, other pattern labels are not entities
+PATTERN_CATEGORIES = {
+    "MONEY": "monetary_values",
+    "DATE": "dates",
+    "EMAIL": "emails",
+    "PHONE": "phone_numbers",
+    "INVOICE_NUMBER": "invoice_numbers",
+    "PERCENT": "percentages"
+}
+
+class Entity:
+    """Compact record of one extracted entity."""
+    
+    __slots__ = ("text", "label", "start", "end", "source")
+    
+    def __init__(self, text: str, label: str, start: int, end: int, source: Optional[str] = None):
+        self.text = text
+        self.label = label
+        self.start = start
+        self.end = end
+        self.source = source
+    
+    def to_dict(self) -> Dict[str, Any]:
+        entity = {"text": self.text, "label": self.label, "start": self.start, "end": self.end}
+        if self.source is not None:
+            entity["source"] = self.source
+        return entity
+
+def normalize_entity_text(text: str) -> str:
+    """Normalize entity text for duplicate detection."""
+    return " ".join(text.split()).casefold()
+
+class _SpanIndex:
+    """Sorted, non-overlapping spans supporting O(log n) overlap queries."""
+    
+    def __init__(self, spans: List[Tuple[int, int]]):
+        spans = sorted(spans)
+        self.starts = [start for start, _ in spans]
+        # Running maximum keeps the lookup correct even if spans do overlap
+        self.max_ends = []
+        max_end = float("-inf")
+        for _, end in spans:
+            max_end = max(max_end, end)
+            self.max_ends.append(max_end)
+    
+    def overlaps(self, start: int, end: int) -> bool:
+        # Only spans starting before end can overlap, the furthest reaching
+        # of them decides
+        index = bisect_right(self.starts, end - 1) - 1
+        return index >= 0 and self.max_ends[index] > start
+
+def merge_entities(spacy_entities: List[Entity], transformer_entities: List[Entity],
+                   pattern_entities: Sequence[Entity] = ()) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Categorize spaCy entities and add transformer and pattern entities that spaCy missed.
+    
+    spaCy entities are always kept. A transformer or pattern entity is dropped
+    when its category already holds an entity with the same normalized text,
+    or a spaCy entity whose character span overlaps it. Lookups are hashed and
+    interval-indexed, so merging is linear in the number of entities up to
+    a log factor, and the outcome only depends on the input order.
+    
+    Args:
+        spacy_entities: Entities from spaCy, labelled with spaCy labels
+        transformer_entities: Entities from the transformer, labelled with entity groups
+        pattern_entities: Business fields from scan_fields, labelled with pattern labels
+    
+    Returns:
+        Dictionary with categorized entity dicts
+    """
+    result: Dict[str, List[Entity]] = {category: [] for category in CATEGORIES}
+    seen_texts: Dict[str, Set[str]] = {category: set() for category in CATEGORIES}
+    spacy_spans: Dict[str, List[Tuple[int, int]]] = {category: [] for category in CATEGORIES}
+    
+    for entity in spacy_entities:
+        category = SPACY_CATEGORIES.get(entity.label, "other_entities")
+        result[category].append(entity)
+        seen_texts[category].add(normalize_entity_text(entity.text))
+        spacy_spans[category].append((entity.start, entity.end))
+    
+    span_indexes = {category: _SpanIndex(spans) for category, spans in spacy_spans.items()}
+    
+    for entity in transformer_entities:
+        if entity.label not in TRANSFORMER_CATEGORIES:
+            continue
+        category, label = TRANSFORMER_CATEGORIES[entity.label]
+        
+        key = normalize_entity_text(entity.text)
+        if key in seen_texts[category] or span_indexes[category].overlaps(entity.start, entity.end):
+            continue
+        
+        seen_texts[category].add(key)
+        result[category].append(Entity(entity.text, label, entity.start, entity.end, "transformer"))
+    
+    for entity in pattern_entities:
+        if entity.label not in PATTERN_CATEGORIES:
+            continue
+        category = PATTERN_CATEGORIES[entity.label]
+        
+        key = normalize_entity_text(entity.text)
+        if key in seen_texts[category] or span_indexes[category].overlaps(entity.start, entity.end):
+            continue
+        
+        seen_texts[category].add(key)
+        result[category].append(Entity(entity.text, entity.label, entity.start, entity.end, "pattern"))
+    
+    return {
+        category: [entity.to_dict() for entity in entities]
+        for category, entities in result.items()
+    }
@@ -1,141 +1,272 @@
-from typing import Dict, List, Tuple, Any
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple, Any, Union
 import spacy
-from transformers import pipeline
+
+from app.models.backends import TokenizerCopy, backend_model_id, build_pipeline
+from app.models.entities import Entity, merge_entities
+from app.models.fields import document_fields
+from app.utils.batching import MicroBatcher
+from app.utils.chunking import owned_ranges, token_windows
+from app.utils.document_context import DocumentContext
+
+# spaCy pipelines by name, shared by the extractors of every model profile
+_spacy_models: Dict[str, Any] = {}
+_spacy_lock = threading.Lock()
+
+# spaCy components that set doc.ents, the only spaCy output the extractor reads
+SPACY_ENTITY_COMPONENTS = ("ner", "entity_ruler")
+
+def trim_spacy_pipeline(nlp):
+    """
+    Disable the spaCy components entity recognition does not need.
+    
+    The tagger, parser, lemmatizer and the like are disabled; shared embedding
+    layers (tok2vec, transformer) stay enabled when an entity component
+    listens to them.
+    
+    Returns:
+        The same pipeline, trimmed in place
+    """
+    needed = {name for name in nlp.pipe_names if name in SPACY_ENTITY_COMPONENTS}
+    for name, component in nlp.pipeline:
+        if needed & set(getattr(component, "listening_components", [])):
+            needed.add(name)
+    
+    unneeded = [name for name in nlp.pipe_names if name not in needed]
+    if unneeded:
+        nlp.select_pipes(disable=unneeded)
+    return nlp
+
+def load_spacy(name: str):
+    """Load a spaCy pipeline trimmed to entity recognition once per process."""
+    with _spacy_lock:
+        if name not in _spacy_models:
+            _spacy_models[name] = trim_spacy_pipeline(spacy.load(name))
+        return _spacy_models[name]
 
 class EntityExtractor:
-    def __init__(self):
+    def __init__(self, spacy_model: str = "en_core_web_sm", ner_model: Optional[str] = "dslim/bert-base-NER",
+                 max_batch_size: int = 16, max_batch_wait_ms: float = 5.0, ner_stride: int = 64,
+                 backend: str = "eager", onnx_cache_dir: Optional[str] = None,
+                 spacy_batch_size: int = 64, spacy_n_process: int = 1, spacy_max_piece_chars: int = 5000,
+                 ner_max_length: int = 512):
         # Load spaCy model
-        self.nlp = spacy.load("en_core_web_sm")
+        self.spacy_model = spacy_model
+        self.nlp = load_spacy(self.spacy_model)
+        
+        # Long documents go through nlp.pipe as sentence-aligned pieces
+        self.spacy_batch_size = spacy_batch_size
+        self.spacy_n_process = spacy_n_process
+        self.spacy_max_piece_chars = min(spacy_max_piece_chars, self.nlp.max_length)
+        
+        # Without a transformer NER model only spaCy entities are extracted
+        self.ner_model = ner_model
+        self.transformer_ner = None
+        self.ner_batcher = None
+        self.model_id = self.spacy_model
+        if self.ner_model is None:
+            return
         
         # Load Hugging Face transformer for NER
-        self.transformer_ner = pipeline(
+        self.transformer_ner = build_pipeline(
             "token-classification",
-            model="dslim/bert-base-NER",
+            self.ner_model,
+            backend,
+            onnx_cache_dir,
             aggregation_strategy="simple"
         )
+        
+        # Windows are built on request threads, with a tokenizer of their own
+        tokenizer = self.window_tokenizer = TokenizerCopy(self.transformer_ner.tokenizer)
+        
+        # Token budget per NER window, leaving room for special tokens
+        self.ner_max_tokens = min(ner_max_length, tokenizer.model_max_length) - tokenizer.num_special_tokens_to_add()
+        self.ner_stride = ner_stride
+        
+        # Identity of the models producing extraction results
+        self.model_id += f"+{backend_model_id(self.ner_model, backend)}"
+        
+        # Merge NER inputs from concurrent requests into padded batches
+        self.ner_batcher = MicroBatcher(
+            self._run_ner_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_batch_wait_ms,
+            name="ner-batcher"
+        )
+    
+    def _run_ner_batch(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        """Run the transformer NER pipeline over a batch of texts."""
+        # The pipeline tokenizer is only used on the batcher thread
+        self.ner_batcher.record_input_tokens(max(
+            len(ids) for ids in self.transformer_ner.tokenizer(texts, truncation=True, verbose=False)["input_ids"]
+        ))
+        return self.transformer_ner(texts, batch_size=len(texts))
     
-    def extract_entities_spacy(self, text: str) -> List[Dict[str, Any]]:
+    def spacy_pieces(self, text: Union[str, DocumentContext]) -> List[Tuple[int, int]]:
         """
-        Extract entities using spaCy.
+        Split a document into sentence-aligned pieces for spaCy.
+        
+        Consecutive sentences are packed into pieces of at most
+        spacy_max_piece_chars characters. A longer sentence is cut at the last
+        whitespace that fits, so no piece exceeds spaCy's max_length.
         
         Args:
-            text: Document text
+            text: Document text or shared DocumentContext
+        
+        Returns:
+            List of (start, end) character offsets, one per piece
+        """
+        context = DocumentContext.of(text)
+        text = context.text
+        max_chars = self.spacy_max_piece_chars
+        if len(text) <= max_chars:
+            return [(0, len(text))] if text else []
+        
+        pieces = []
+        piece_start = piece_end = None
+        for start, end in context.sentence_spans:
+            if piece_start is not None and end - piece_start > max_chars:
+                pieces.append((piece_start, piece_end))
+                piece_start = None
+            
+            while end - start > max_chars:
+                cut = text.rfind(" ", start + 1, start + max_chars)
+                cut = cut if cut > start else start + max_chars
+                pieces.append((start, cut))
+                start = cut
             
+            if piece_start is None:
+                piece_start = start
+            piece_end = end
+        
+        if piece_start is not None:
+            pieces.append((piece_start, piece_end))
+        return pieces
+    
+    def _run_spacy(self, context: DocumentContext) -> List[Entity]:
+        pieces = self.spacy_pieces(context)
+        docs = self.nlp.pipe(
+            (context.text[start:end] for start, end in pieces),
+            batch_size=self.spacy_batch_size,
+            n_process=self.spacy_n_process
+        )
+        
+        # Shift entity offsets from their piece back to the full text
+        return [
+            Entity(ent.text, ent.label_, offset + ent.start_char, offset + ent.end_char)
+            for (offset, _), doc in zip(pieces, docs)
+            for ent in doc.ents
+        ]
+    
+    def _spacy_entities(self, context: DocumentContext) -> List[Entity]:
+        """Run spaCy over the document and return compact entity records."""
+        return context.cached(("spacy", self.spacy_model), lambda: self._run_spacy(context))
+    
+    def extract_entities_spacy(self, text: Union[str, DocumentContext]) -> List[Dict[str, Any]]:
+        """
+        Extract entities using spaCy.
+        
+        Args:
+            text: Document text or shared DocumentContext
+        
         Returns:
             List of extracted entities with type and position
         """
-        doc = self.nlp(text)
-        entities = []
-        
-        for ent in doc.ents:
-            entities.append({
-                "text": ent.text,
-                "label": ent.label_,
-                "start": ent.start_char,
-                "end": ent.end_char
-            })
-        
-        return entities
+        return [entity.to_dict() for entity in self._spacy_entities(DocumentContext.of(text))]
     
-    def extract_entities_transformer(self, text: str) -> List[Dict[str, Any]]:
+    def extract_entities_transformer(self, text: Union[str, DocumentContext]) -> List[Dict[str, Any]]:
         """
         Extract entities using Hugging Face transformers.
         
         Args:
-            text: Document text
-            
+            text: Document text or shared DocumentContext
+        
         Returns:
             List of extracted entities with type and position
         """
-        # For longer texts, we need to process in chunks
-        max_length = 512
-        text_chunks = [text[i:i+max_length] for i in range(0, len(text), max_length)]
+        if self.transformer_ner is None:
+            return []
         
-        all_entities = []
-        offset = 0
+        context = DocumentContext.of(text)
+        text = context.text
         
-        for chunk in text_chunks:
-            # Get predictions from transformer model
-            results = self.transformer_ner(chunk)
-            
-            # Adjust positions based on chunk offset
+        # Pack sentence-aligned windows close to the model's token limit
+        windows = self.ner_windows(context)
+        window_texts = [text[start:end] for start, end in windows]
+        
+        # Get predictions from transformer model for all windows at once
+        window_results = self.ner_batcher.submit(window_texts)
+        
+        # Entities found in the overlap of two windows are kept from the window
+        # where they are furthest from the edge
+        all_entities = []
+        for (offset, _), (own_start, own_end), results in zip(windows, owned_ranges(windows), window_results):
             for entity in results:
+                # Adjust positions based on window offset
                 entity["start"] += offset
                 entity["end"] += offset
-                all_entities.append(entity)
-            
-            offset += len(chunk)
+                if own_start <= entity["start"] < own_end:
+                    all_entities.append(entity)
         
         return all_entities
     
-    def extract_key_information(self, text: str) -> Dict[str, Any]:
+    def ner_windows(self, text: Union[str, DocumentContext]) -> List[Tuple[int, int]]:
+        """
+        Compute sentence-aligned, overlapping character windows for transformer NER.
+        
+        Args:
+            text: Document text or shared DocumentContext
+        
+        Returns:
+            List of (start, end) character offsets, one per window
+        """
+        if self.transformer_ner is None:
+            return []
+        
+        context = DocumentContext.of(text)
+        offsets = [
+            (start, end) for start, end in context.tokenize(self.window_tokenizer)["offset_mapping"]
+            if end > start
+        ]
+        if not offsets:
+            return []
+        
+        token_starts = [start for start, _ in offsets]
+        sentence_starts = sorted({
+            bisect_left(token_starts, start) for start, _ in context.sentence_spans
+        })
+        
+        return [
+            (offsets[start][0], offsets[end - 1][1])
+            for start, end in token_windows(len(offsets), sentence_starts, self.ner_max_tokens, self.ner_stride)
+        ]
+    
+    def extract_key_information(self, text: Union[str, DocumentContext],
+                                patterns_only: bool = False) -> Dict[str, Any]:
         """
         Extract key business information like dates, amounts, names, etc.
         
         Args:
-            text: Document text
-            
+            text: Document text or shared DocumentContext
+            patterns_only: Only extract the business fields found by patterns
+                (money, dates, emails, phone numbers, invoice numbers and
+                percentages), skipping the spaCy and transformer passes
+        
         Returns:
             Dictionary with categorized entities
         """
+        context = DocumentContext.of(text)
+        fields = document_fields(context)
+        if patterns_only:
+            return merge_entities([], [], fields)
+        
         # Get entities from both models
-        spacy_entities = self.extract_entities_spacy(text)
-        transformer_entities = self.extract_entities_transformer(text)
-        
-        # Categorize and structure the information
-        result = {
-            "people": [],
-            "organizations": [],
-            "dates": [],
-            "monetary_values": [],
-            "locations": [],
-            "other_entities": []
-        }
-        
-        # Process spaCy entities
-        for entity in spacy_entities:
-            if entity["label"] == "PERSON":
-                result["people"].append(entity)
-            elif entity["label"] == "ORG":
-                result["organizations"].append(entity)
-            elif entity["label"] == "DATE":
-                result["dates"].append(entity)
-            elif entity["label"] == "MONEY":
-                result["monetary_values"].append(entity)
-            elif entity["label"] == "GPE" or entity["label"] == "LOC":
-                result["locations"].append(entity)
-            else:
-                result["other_entities"].append(entity)
-        
-        # Add transformer entities that might have been missed
-        for entity in transformer_entities:
-            if entity["entity_group"] == "PER":
-                # Check if already present in people
-                if not any(e["text"] == entity["word"] for e in result["people"]):
-                    result["people"].append({
-                        "text": entity["word"],
-                        "label": "PERSON",
-                        "start": entity["start"],
-                        "end": entity["end"],
-                        "source": "transformer"
-                    })
-            elif entity["entity_group"] == "ORG":
-                if not any(e["text"] == entity["word"] for e in result["organizations"]):
-                    result["organizations"].append({
-                        "text": entity["word"],
-                        "label": "ORG",
-                        "start": entity["start"],
-                        "end": entity["end"],
-                        "source": "transformer"
-                    })
-            elif entity["entity_group"] == "LOC":
-                if not any(e["text"] == entity["word"] for e in result["locations"]):
-                    result["locations"].append({
-                        "text": entity["word"],
-                        "label": "LOC",
-                        "start": entity["start"],
-                        "end": entity["end"],
-                        "source": "transformer"
-                    })
-        
-        return result
\ No newline at end of file
+        spacy_entities = self._spacy_entities(context)
+        transformer_entities = [
+            Entity(entity["word"], entity["entity_group"], entity["start"], entity["end"])
+            for entity in self.extract_entities_transformer(context)
+        ]
+        
+        # Categorize spaCy entities and add transformer and pattern entities that might have been missed
+        return merge_entities(spacy_entities, transformer_entities, fields)
\ No newline at end of file
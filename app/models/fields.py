@@ -0,0 +1,97 @@
+import re
+from typing import Any, Dict, List, Union
+
+from app.models.entities import Entity, merge_entities
+from app.utils.document_context import DocumentContext
+
+_MONTH = (
+    r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+)
+_AMOUNT = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?"
+_SCALE = r"(?:\s?(?:thousand|million|billion|bn|[km])\b)?"
+
+# Business field patterns, tried in this order where several match at the same position
+FIELD_PATTERNS = [
+    ("EMAIL", r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b"),
+    # An "Invoice #" or "Invoice No." marker followed by the number, or an INV-style number
+    ("INVOICE_NUMBER", r"\b(?:invoice|inv)(?:\s*#|\s+(?:no|number|num)\b\.?\s*[:#]?)\s*"
+                       r"(?P<invoice_id>(?=[\w/-]*\d)[a-z0-9][\w/-]{2,})"
+                       r"|\b(?P<invoice_code>inv[-#/]?\d[\w/-]*)"),
+    ("MONEY", rf"(?:[$€£¥]|\b(?:usd|eur|gbp|chf|cad|aud)\s?)\s?(?:{_AMOUNT}){_SCALE}"
+              rf"|\b(?:{_AMOUNT}){_SCALE}\s?(?:usd|eur|gbp|chf|cad|aud|dollars|euros|pounds)\b"),
+    ("PERCENT", rf"\b(?:{_AMOUNT})\s?(?:%|percent\b|per cent\b)"),
+    # Numeric dates with dots need a four-digit year, so version numbers are not dates
+    ("DATE", rf"\b\d{{4}}-\d{{2}}-\d{{2}}\b"
+             rf"|\b\d{{1,2}}(?P<date_separator>[/-])\d{{1,2}}(?P=date_separator)(?:\d{{4}}|\d{{2}})\b"
+             rf"|\b\d{{1,2}}\.\d{{1,2}}\.\d{{4}}\b"
+             rf"|\b{_MONTH}\s\d{{1,2}}(?:st|nd|rd|th)?(?:,?\s\d{{4}})?\b"
+             rf"|\b\d{{1,2}}(?:st|nd|rd|th)?\s(?:of\s)?{_MONTH}(?:,?\s\d{{4}})?\b"),
+    # A country code with at least 8 digits in all, a parenthesized area code, or
+    # 3-3-4 digits joined by dashes or dots, so runs of plain numbers are not phones
+    ("PHONE", r"\+(?=(?:[\s.()-]{0,2}\d){8})\d{1,3}[\s.-]?(?:\(\d{1,4}\)[\s.-]?)?\d{2,4}(?:[\s.-]\d{2,4}){1,3}\b"
+              r"|\(\d{3}\)[\s.-]?\d{3}[\s.-]\d{4}\b"
+              r"|\b\d{3}(?P<phone_separator>[.-])\d{3}(?P=phone_separator)\d{4}\b")
+]
+
+# Priority cues of DocumentClassifier, each found wherever it occurs, even
+# inside a business field such as an email address
+PRIORITY_PATTERNS = [
+    ("DEADLINE", r"\b(?:today|tomorrow|next week|due by|due date|deadline)\b"),
+    ("URGENCY", r"urgent|asap|immediately|emergency|deadline|critical")
+]
+
+# Every business field pattern in one alternation, so the text is scanned once for all of them
+_FIELD_SCANNER = re.compile(
+    "|".join(f"(?P<{label}>{pattern})" for label, pattern in FIELD_PATTERNS),
+    re.IGNORECASE
+)
+_PRIORITY_SCANNERS = [(label, re.compile(pattern, re.IGNORECASE)) for label, pattern in PRIORITY_PATTERNS]
+
+def scan_fields(text: str) -> List[Entity]:
+    """
+    Find business fields and priority cues in the text.
+    
+    Business fields are found in one pass and never overlap each other;
+    priority cues are scanned separately and may overlap fields.
+    
+    Args:
+        text: Text to scan
+    
+    Returns:
+        Matches in text order, labelled with FIELD_PATTERNS and PRIORITY_PATTERNS labels
+    """
+    fields = []
+    for match in _FIELD_SCANNER.finditer(text):
+        label = match.lastgroup
+        group = label
+        if label == "INVOICE_NUMBER":
+            # Report the invoice number itself, without its "Invoice No." prefix
+            group = "invoice_id" if match.group("invoice_id") is not None else "invoice_code"
+        start, end = match.span(group)
+        fields.append(Entity(match.group(group), label, start, end, "pattern"))
+    
+    for label, scanner in _PRIORITY_SCANNERS:
+        fields.extend(
+            Entity(match.group(), label, match.start(), match.end(), "pattern") for match in scanner.finditer(text)
+        )
+    
+    fields.sort(key=lambda field: field.start)
+    return fields
+
+def document_fields(text: Union[str, DocumentContext]) -> List[Entity]:
+    """Scan a document once, sharing the matches between every stage of a request."""
+    context = DocumentContext.of(text)
+    return context.cached("fields", lambda: scan_fields(context.text))
+
+def extract_fields(text: Union[str, DocumentContext]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Extract business fields without running any model.
+    
+    Args:
+        text: Document text or shared DocumentContext
+    
+    Returns:
+        Dictionary with categorized entities, in the format of extract_key_information
+    """
+    return merge_entities([], [], document_fields(text))
@@ -0,0 +1,362 @@
+import functools
+import itertools
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import Settings
+from app.models.backends import backend_model_id, configure_torch_threads
+from app.utils.cache import content_hash
+
+logger = logging.getLogger(__name__)
+
+class ModelDisabledError(RuntimeError):
+    """Raised when a model that is disabled in this deployment is requested."""
+
+class UnknownProfileError(ValueError):
+    """Raised when a request asks for a model profile that does not exist."""
+
+def torch_memory_bytes(model: Any, depth: int = 3) -> int:
+    """
+    Bytes held by the PyTorch parameters and buffers a loaded model refers to.
+    
+    Modules are looked up through the model's attributes, such as a pipeline's
+    ``model``, up to depth levels deep. Tensors shared by several modules are
+    counted once, weights outside of PyTorch (ONNX, spaCy) are not counted.
+    """
+    try:
+        import torch
+    except ImportError:
+        return 0
+    
+    tensors: Dict[int, int] = {}
+    seen = set()
+    pending = [(model, 0)]
+    while pending:
+        obj, level = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, torch.nn.Module):
+            for tensor in itertools.chain(obj.parameters(), obj.buffers()):
+                tensors[tensor.data_ptr()] = tensor.numel() * tensor.element_size()
+        elif level < depth and hasattr(obj, "__dict__"):
+            pending += [(value, level + 1) for value in vars(obj).values() if hasattr(value, "__dict__")]
+    return sum(tensors.values())
+
+class ModelSpec:
+    """How to load, identify and warm up one model of a profile."""
+    
+    def __init__(self, name: str, factory: Callable[[], Any], model_id: str,
+                 warm: Optional[Callable[[Any], Any]] = None, profile: Optional[str] = None):
+        self.name = name
+        self.factory = factory
+        self.model_id = model_id
+        self.warm = warm
+        self.profile = profile
+
+class ModelRegistry:
+    """
+    Loads models lazily on first use, or eagerly during a warmup step.
+    
+    Every model is loaded at most once, even when several requests ask for it
+    at the same time. Models that are not enabled are never loaded.
+    
+    Each model can come in several profiles trading accuracy for speed. Models
+    of the default profile are keyed by their name, others by
+    ``"<name>:<profile>"``, and only the default profile is warmed up. Profiles
+    using the same model id share one loaded instance.
+    """
+    
+    def __init__(self, specs: Iterable[ModelSpec], enabled: Iterable[str],
+                 default_profile: Optional[str] = None):
+        self.default_profile = default_profile
+        self.specs: Dict[str, ModelSpec] = {
+            self._key(spec.name, spec.profile): spec for spec in specs
+        }
+        self.profiles = list(dict.fromkeys(spec.profile for spec in self.specs.values()))
+        self.enabled = list(dict.fromkeys(
+            name for name in enabled if any(spec.name == name for spec in self.specs.values())
+        ))
+        # Loaded models and their state, by (name, model id) so profiles can share them
+        self._models: Dict[Tuple[str, str], Any] = {}
+        self._errors: Dict[Tuple[str, str], str] = {}
+        self._loading: Dict[Tuple[str, str], bool] = {}
+        self._locks = {self._identity(key): threading.Lock() for key in self.specs}
+        self.warmup_started = False
+        self.warmup_finished = False
+    
+    def _key(self, name: str, profile: Optional[str] = None) -> str:
+        if profile is None or profile == self.default_profile:
+            return name
+        return f"{name}:{profile}"
+    
+    def _identity(self, key: str) -> Tuple[str, str]:
+        spec = self.specs[key]
+        return spec.name, spec.model_id
+    
+    def resolve_profile(self, profile: Optional[str] = None) -> Optional[str]:
+        """Return the profile to use, raising UnknownProfileError for unknown profiles."""
+        if profile is None:
+            return self.default_profile
+        if profile not in self.profiles:
+            raise UnknownProfileError(
+                f"Unknown model profile '{profile}', expected one of: {', '.join(map(str, self.profiles))}"
+            )
+        return profile
+    
+    def is_enabled(self, name: str) -> bool:
+        return name in self.enabled
+    
+    def require(self, name: str, profile: Optional[str] = None) -> None:
+        """Raise ModelDisabledError if the model is not served by this deployment."""
+        self.resolve_profile(profile)
+        if not self.is_enabled(name):
+            raise ModelDisabledError(f"Model '{name}' is disabled in this deployment")
+    
+    def model_id(self, name: str, profile: Optional[str] = None) -> str:
+        """Identity of a model, available without loading it."""
+        return self.specs[self._key(name, self.resolve_profile(profile))].model_id
+    
+    def get(self, name: str, profile: Optional[str] = None) -> Any:
+        """Return a loaded model, loading it first if needed."""
+        self.require(name, profile)
+        key = self._key(name, profile)
+        identity = self._identity(key)
+        model = self._models.get(identity)
+        if model is not None:
+            return model
+        
+        with self._locks[identity]:
+            if identity not in self._models:
+                self._loading[identity] = True
+                try:
+                    logger.info("Loading model %s", key)
+                    self._models[identity] = self.specs[key].factory()
+                    self._errors.pop(identity, None)
+                except Exception as e:
+                    self._errors[identity] = str(e)
+                    raise
+                finally:
+                    self._loading[identity] = False
+            return self._models[identity]
+    
+    def warmup(self, names: Optional[List[str]] = None) -> None:
+        """Load the given (default: all enabled) models and run a small inference with each."""
+        self.warmup_started = True
+        try:
+            for name in names or self.enabled:
+                try:
+                    model = self.get(name)
+                    warm = self.specs[name].warm
+                    if warm is not None:
+                        warm(model)
+                except Exception:
+                    logger.exception("Warmup of model %s failed", name)
+        finally:
+            self.warmup_finished = True
+    
+    def start_warmup(self) -> threading.Thread:
+        """Run warmup in a background thread, so the server can bind its port right away."""
+        self.warmup_started = True
+        thread = threading.Thread(target=self.warmup, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+    
+    def status(self) -> Dict[str, str]:
+        """Loading state of every known model."""
+        states = {}
+        for key, spec in self.specs.items():
+            identity = self._identity(key)
+            if not self.is_enabled(spec.name):
+                states[key] = "disabled"
+            elif identity in self._models:
+                states[key] = "ready"
+            elif self._loading.get(identity):
+                states[key] = "loading"
+            elif identity in self._errors:
+                states[key] = "failed"
+            else:
+                states[key] = "not_loaded"
+        return states
+    
+    def memory_bytes(self) -> Dict[Tuple[str, str], int]:
+        """PyTorch memory of every loaded model, by (name, model id)."""
+        return {identity: torch_memory_bytes(model) for identity, model in list(self._models.items())}
+    
+    def is_ready(self) -> bool:
+        """
+        Whether the deployment can serve requests.
+        
+        Without warmup, models load on first use and the deployment is ready
+        right away. With warmup, it is ready once every enabled model loaded.
+        """
+        if not self.warmup_started:
+            return True
+        return self.warmup_finished and all(self._identity(name) in self._models for name in self.enabled)
+
+# Short text used to run every model once during warmup
+WARMUP_TEXT = (
+    "John Smith from ABC Corporation in New York signed the contract on January 15, 2023. "
+    "XYZ Ltd. will pay $5,000 per month for consulting services."
+)
+
+# Models the lighter profiles use instead of the configured ones, which make up
+# the accurate profile. A ner_model of None runs spaCy NER only.
+MODEL_PROFILES = {
+    "fast": {
+        "ner_model": None,
+        "classifier_model": "valhalla/distilbart-mnli-12-1",
+        "summarizer_model": "sshleifer/distilbart-cnn-6-6"
+    },
+    "balanced": {
+        "classifier_model": "valhalla/distilbart-mnli-12-3",
+        "summarizer_model": "sshleifer/distilbart-cnn-12-6"
+    }
+}
+
+def profile_models(settings: Settings) -> Dict[str, Dict[str, Optional[str]]]:
+    """Model names of every enabled profile."""
+    accurate = {
+        "spacy_model": settings.spacy_model,
+        "ner_model": settings.ner_model,
+        "classifier_model": settings.classifier_model,
+        "summarizer_model": settings.summarizer_model
+    }
+    profiles = {"accurate": accurate}
+    profiles.update({name: dict(accurate, **models) for name, models in MODEL_PROFILES.items()})
+    if settings.model_profile not in profiles:
+        raise ValueError(f"Unknown default model profile: {settings.model_profile}")
+    return {name: profiles[name] for name in settings.enabled_profile_names if name in profiles}
+
+def load_document_types(path: Optional[str]) -> Dict[str, List[str]]:
+    """
+    Load custom document types from a JSON file.
+    
+    The file holds a list of type names, or an object mapping each type name
+    to descriptions used as extra prototypes by the embedding classifier.
+    
+    Returns:
+        Mapping of document type to descriptions, empty without a path
+    """
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as file:
+        types = json.load(file)
+    if isinstance(types, list):
+        return {name: [] for name in types}
+    return {name: list(descriptions) for name, descriptions in types.items()}
+
+def create_model_registry(settings: Settings) -> ModelRegistry:
+    """
+    Create the registry of the extractor, classifier and summarizer of every profile.
+    
+    Model modules are imported inside the factories, so torch, transformers
+    and spaCy are only imported once a model is actually loaded. Input
+    limits that differ from the defaults change the results, so they are part
+    of the model identities.
+    """
+    configure_torch_threads(settings.torch_num_threads, settings.torch_interop_threads)
+    
+    batching = {
+        "max_batch_size": settings.batch_max_size,
+        "max_batch_wait_ms": settings.batch_max_wait_ms
+    }
+    
+    def backend_options(name: str) -> Dict[str, Any]:
+        return {"backend": settings.backend_for(name), "onnx_cache_dir": settings.onnx_cache_dir}
+    
+    def load_extractor(models: Dict[str, Optional[str]]):
+        from app.models.extractor import EntityExtractor
+        return EntityExtractor(
+            models["spacy_model"], models["ner_model"], **batching, **backend_options("extractor"),
+            spacy_batch_size=settings.spacy_batch_size,
+            spacy_n_process=settings.spacy_n_process,
+            spacy_max_piece_chars=settings.spacy_max_piece_chars,
+            ner_max_length=settings.ner_max_length
+        )
+    
+    document_types = load_document_types(settings.document_types_path)
+    
+    def load_classifier(models: Dict[str, Optional[str]]):
+        from app.models.classifier import DocumentClassifier
+        nli_classifier = functools.partial(
+            DocumentClassifier, models["classifier_model"], **batching, **backend_options("classifier"),
+            document_types=list(document_types) or None,
+            sample_words=settings.classifier_sample_words
+        )
+        if settings.classifier_engine != "embedding":
+            return nli_classifier()
+        
+        from app.models.embedding_classifier import EmbeddingClassifier
+        return EmbeddingClassifier(
+            settings.embedding_model,
+            **batching,
+            document_types=list(document_types) or None,
+            label_descriptions=document_types,
+            fallback_factory=nli_classifier if settings.embedding_escalation_threshold > 0 else None,
+            escalation_threshold=settings.embedding_escalation_threshold,
+            escalation_top_k=settings.embedding_escalation_top_k,
+            max_length=settings.embedding_max_length,
+            sample_words=settings.classifier_sample_words
+        )
+    
+    def classifier_id(models: Dict[str, Optional[str]]) -> str:
+        model_id = backend_model_id(models["classifier_model"], settings.backend_for("classifier"))
+        if settings.classifier_engine == "embedding":
+            embedding_id = f"embedding:{settings.embedding_model}"
+            if settings.embedding_escalation_threshold > 0:
+                embedding_id += (
+                    f"|{model_id}@{settings.embedding_escalation_threshold}"
+                    f"/top{settings.embedding_escalation_top_k}"
+                )
+            model_id = embedding_id
+            if settings.embedding_max_length != 512:
+                model_id += f"/window{settings.embedding_max_length}"
+        if settings.classifier_sample_words != 1024:
+            model_id += f"/sample{settings.classifier_sample_words}"
+        if document_types:
+            # Custom labels change the results, so they are part of the identity
+            model_id += "#" + content_hash(json.dumps(document_types, sort_keys=True).encode("utf-8"))[:12]
+        return model_id
+    
+    def load_summarizer(models: Dict[str, Optional[str]]):
+        from app.models.summarizer import DocumentSummarizer
+        return DocumentSummarizer(
+            models["summarizer_model"], **batching, **backend_options("summarizer"),
+            chunk_words=settings.summary_chunk_words
+        )
+    
+    def summarizer_id(models: Dict[str, Optional[str]]) -> str:
+        model_id = backend_model_id(models["summarizer_model"], settings.backend_for("summarizer"))
+        if settings.summary_chunk_words != 1024:
+            model_id += f"/chunk{settings.summary_chunk_words}"
+        return model_id
+    
+    specs = []
+    for profile, models in profile_models(settings).items():
+        extractor_id = models["spacy_model"]
+        if settings.spacy_max_piece_chars != 5000:
+            # spaCy results depend on where long documents are cut into pieces
+            extractor_id += f"/piece{settings.spacy_max_piece_chars}"
+        if models["ner_model"]:
+            extractor_id += "+" + backend_model_id(models["ner_model"], settings.backend_for("extractor"))
+            if settings.ner_max_length != 512:
+                extractor_id += f"/window{settings.ner_max_length}"
+        
+        specs += [
+            ModelSpec(
+                "extractor", functools.partial(load_extractor, models), extractor_id,
+                warm=lambda model: model.extract_key_information(WARMUP_TEXT), profile=profile
+            ),
+            ModelSpec(
+                "classifier", functools.partial(load_classifier, models), classifier_id(models),
+                warm=lambda model: model.classify_document(WARMUP_TEXT), profile=profile
+            ),
+            ModelSpec(
+                "summarizer", functools.partial(load_summarizer, models), summarizer_id(models),
+                warm=lambda model: model.generate_summary(WARMUP_TEXT), profile=profile
+            )
+        ]
+    return ModelRegistry(specs, settings.enabled_model_names, default_profile=settings.model_profile)
@@ -0,0 +1,207 @@
+"""
+Offline stand-ins for the transformer pipelines and the spaCy model.
+
+Inside ``stub_models()``, the extractor, classifier and summarizer are built
+as usual, with their chunking, windowing, micro-batching and label scoring,
+but around pipelines that answer from simple rules instead of a model. No
+model is downloaded, so benchmarks of the surrounding code run anywhere.
+Results are deterministic but meaningless.
+"""
+import contextlib
+import copy
+import os
+import re
+import shutil
+import string
+import tempfile
+import threading
+from types import SimpleNamespace
+from typing import Any, Iterator, List, Union
+from unittest import mock
+
+import torch
+
+from app.utils.synthetic import CITIES, MONTHS, ORGANIZATIONS, PEOPLE, VOCABULARY
+
+# Entity labels of the stub NER pipeline for the names used by synthetic documents
+_NER_LABELS = dict(
+    [(name, "PER") for name in PEOPLE]
+    + [(name, "ORG") for name in ORGANIZATIONS]
+    + [(name, "LOC") for name in CITIES]
+)
+_NER_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(name) for name in sorted(_NER_LABELS, key=len, reverse=True)) + r")\b"
+)
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+_stub_lock = threading.Lock()
+_stub_tokenizer = None
+_stub_spacy = None
+
+def stub_tokenizer():
+    """
+    Fast WordPiece tokenizer over the synthetic vocabulary, built without a download.
+    
+    Synthetic words are single tokens, other words fall back to characters,
+    so token counts stay close to those of a real tokenizer. Every call
+    returns a new copy, as fast tokenizers cannot be shared between threads.
+    """
+    global _stub_tokenizer
+    with _stub_lock:
+        if _stub_tokenizer is None:
+            from transformers import BertTokenizerFast
+            
+            characters = string.ascii_letters + string.digits + string.punctuation
+            vocabulary = (
+                ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+                + list(dict.fromkeys(list(characters) + VOCABULARY))
+                + ["##" + character for character in characters]
+            )
+            directory = tempfile.mkdtemp()
+            try:
+                vocab_file = os.path.join(directory, "vocab.txt")
+                with open(vocab_file, "w", encoding="utf-8") as file:
+                    file.write("\n".join(vocabulary))
+                _stub_tokenizer = BertTokenizerFast(vocab_file, do_lower_case=False, model_max_length=1024)
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+        return copy.deepcopy(_stub_tokenizer)
+
+def stub_spacy():
+    """Blank English spaCy pipeline with an entity ruler for synthetic names, dates and amounts."""
+    global _stub_spacy
+    with _stub_lock:
+        if _stub_spacy is None:
+            import spacy
+            
+            nlp = spacy.blank("en")
+            ruler = nlp.add_pipe("entity_ruler")
+            months = [month.lower() for month in MONTHS]
+            ruler.add_patterns(
+                [{"label": "PERSON", "pattern": name} for name in PEOPLE]
+                + [{"label": "ORG", "pattern": name} for name in ORGANIZATIONS]
+                + [{"label": "GPE", "pattern": name} for name in CITIES]
+                + [
+                    {"label": "MONEY", "pattern": [{"TEXT": "$"}, {"LIKE_NUM": True}]},
+                    {"label": "DATE", "pattern": [
+                        {"LOWER": {"IN": months}}, {"IS_DIGIT": True}, {"TEXT": ",", "OP": "?"},
+                        {"IS_DIGIT": True, "OP": "?"}
+                    ]}
+                ]
+            )
+            _stub_spacy = nlp
+        return _stub_spacy
+
+class StubNLIModel(torch.nn.Module):
+    """NLI head whose entailment logit is derived from the input ids."""
+    
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor = None, **_: Any) -> Any:
+        if attention_mask is None:
+            attention_mask = torch.ones_like(input_ids)
+        entailment = ((input_ids * attention_mask).sum(dim=-1) % 97).float() / 97
+        zeros = torch.zeros_like(entailment)
+        return SimpleNamespace(logits=torch.stack([zeros, zeros, entailment], dim=-1))
+
+class StubPipeline:
+    """
+    Rule-based stand-in for a transformers pipeline of one task.
+    
+    - ``token-classification``: synthetic people, organizations and cities,
+      after tokenizing the input like the real pipeline
+    - ``zero-shot-classification``: candidate labels scored by a StubNLIModel,
+      the same model the classifier's batched NLI pass uses
+    - ``summarization``: the leading words of every input, failing on inputs
+      longer than the tokenizer's model_max_length unless truncated
+    """
+    
+    entailment_id = 2
+    
+    def __init__(self, task: str, tokenizer: Any):
+        self.task = task
+        self.tokenizer = tokenizer
+        self.device = torch.device("cpu")
+        self.model = StubNLIModel() if task == "zero-shot-classification" else None
+    
+    def __call__(self, inputs: Union[str, List[str]], **kwargs: Any) -> Any:
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        outputs = [self._run(text, **kwargs) for text in texts]
+        return outputs[0] if isinstance(inputs, str) else outputs
+    
+    def _run(self, text: str, candidate_labels: List[str] = (), hypothesis_template: str = "This example is {}.",
+             max_length: int = 130, min_length: int = 30, truncation: bool = False, **_: Any) -> Any:
+        if self.task == "token-classification":
+            # Tokenized like the real pipeline's preprocessing, which truncates
+            self.tokenizer(text, truncation=True, return_special_tokens_mask=True, return_offsets_mapping=True)
+            return [
+                {"entity_group": _NER_LABELS[match.group()], "score": 0.99, "word": match.group(),
+                 "start": match.start(), "end": match.end()}
+                for match in _NER_PATTERN.finditer(text)
+            ]
+        if self.task == "zero-shot-classification":
+            # Softmax over the entailment logits of every label, like the real pipeline
+            labels = list(candidate_labels)
+            inputs = self.tokenizer(
+                [text] * len(labels),
+                [hypothesis_template.format(label) for label in labels],
+                padding=True,
+                truncation="only_first",
+                return_tensors="pt"
+            )
+            with torch.no_grad():
+                entailment = self.model(**inputs).logits[:, self.entailment_id]
+            ranked = sorted(zip(labels, torch.softmax(entailment, dim=-1).tolist()),
+                            key=lambda pair: pair[1], reverse=True)
+            return {
+                "sequence": text,
+                "labels": [label for label, _ in ranked],
+                "scores": [score for _, score in ranked]
+            }
+        if self.task == "summarization":
+            # Inputs longer than the model input fail like BART's position embeddings do
+            if len(self.tokenizer(text, truncation=truncation)["input_ids"]) > self.tokenizer.model_max_length:
+                raise IndexError("index out of range in self")
+            words = text.split()[:max(min_length, max_length // 2)]
+            return {"summary_text": " ".join(words)}
+        raise ValueError(f"Unsupported stub pipeline task: {self.task}")
+
+def build_stub_pipeline(task: str, model_name: str, backend: str = "eager", onnx_cache_dir: str = None,
+                        **kwargs: Any) -> StubPipeline:
+    """Drop-in for build_pipeline returning a StubPipeline."""
+    return StubPipeline(task, stub_tokenizer())
+
+def punkt_available() -> bool:
+    """Whether NLTK's sentence tokenizer data is installed."""
+    from nltk.tokenize import sent_tokenize
+    
+    try:
+        sent_tokenize("Punkt is installed. It splits sentences.")
+    except LookupError:
+        return False
+    return True
+
+def split_sentences(text: str) -> List[str]:
+    """Split sentences at terminal punctuation, standing in for sent_tokenize."""
+    return [sentence for sentence in _SENTENCE_BOUNDARY.split(text.strip()) if sentence]
+
+@contextlib.contextmanager
+def stub_models() -> Iterator[None]:
+    """
+    Build models around stub pipelines and a stub spaCy model while active.
+    
+    Only models loaded inside the block are stubs. Without NLTK's punkt data,
+    sentences are split at terminal punctuation instead of downloading it.
+    """
+    patches = [
+        mock.patch(f"app.models.{module}.build_pipeline", build_stub_pipeline)
+        for module in ("extractor", "classifier", "summarizer")
+    ]
+    patches.append(mock.patch("app.models.extractor.load_spacy", lambda name: stub_spacy()))
+    if not punkt_available():
+        patches.append(mock.patch("app.utils.document_context.sent_tokenize", split_sentences))
+        for module in ("app.utils.document_context", "app.models.summarizer"):
+            patches.append(mock.patch(f"{module}.ensure_punkt", lambda: None))
+    
+    with contextlib.ExitStack() as stack:
+        for patch in patches:
+            stack.enter_context(patch)
+        yield
@@ -1,35 +1,82 @@
-from typing import Dict, List, Any
-from transformers import pipeline
-import nltk
-from nltk.tokenize import sent_tokenize
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Union
 
-# Download NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+from app.models.backends import TokenizerCopy, backend_model_id, build_pipeline
+from app.utils.batching import MicroBatcher
+from app.utils.document_context import DocumentContext, ensure_punkt
+from app.utils.extractive import select_sentences
+
+# abstractive: BART over the document, chunk by chunk when it is long
+# extractive: the best-scoring sentences of the document, no model pass
+# hybrid: extractive selection shrinks long documents to one abstractive pass
+SUMMARY_MODES = ("abstractive", "extractive", "hybrid")
 
 class DocumentSummarizer:
-    def __init__(self):
+    def __init__(self, model_name: str = "facebook/bart-large-cnn",
+                 max_batch_size: int = 16, max_batch_wait_ms: float = 5.0,
+                 backend: str = "eager", onnx_cache_dir: Optional[str] = None, chunk_words: int = 1024):
+        # Download NLTK data
+        ensure_punkt()
+        
         # Load summarization pipeline
-        self.summarizer = pipeline(
+        self.model_id = backend_model_id(model_name, backend)
+        self.summarizer = build_pipeline(
             "summarization",
-            model="facebook/bart-large-cnn"
+            model_name,
+            backend,
+            onnx_cache_dir
+        )
+        
+        # Words per chunk of long documents; shorter documents are summarized in one pass
+        self.chunk_words = chunk_words
+        
+        # Hybrid selections are measured on request threads, with a tokenizer of their own
+        self.input_tokenizer = TokenizerCopy(self.summarizer.tokenizer)
+        self.max_input_tokens = (
+            self.input_tokenizer.model_max_length - self.input_tokenizer.num_special_tokens_to_add()
+        )
+        
+        # Merge summarization inputs from concurrent requests into padded batches
+        self.summary_batcher = MicroBatcher(
+            self._run_summary_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_batch_wait_ms,
+            name="summary-batcher"
         )
     
-    def chunk_text(self, text: str, max_chunk_size: int = 1024) -> List[str]:
+    def _run_summary_batch(self, texts: List[str], **generate_kwargs: Any) -> List[str]:
+        """Run the summarization pipeline over a batch of texts, truncated to the model input."""
+        # The pipeline tokenizer is only used on the batcher thread
+        self.summary_batcher.record_input_tokens(max(
+            len(ids) for ids in self.summarizer.tokenizer(texts, truncation=True, verbose=False)["input_ids"]
+        ))
+        outputs = self.summarizer(texts, batch_size=len(texts), truncation=True, **generate_kwargs)
+        return [
+            (output[0] if isinstance(output, list) else output)["summary_text"]
+            for output in outputs
+        ]
+    
+    def summarize_texts(self, texts: List[str], max_length: int, min_length: int) -> List[str]:
         """
-        Split text into chunks for processing by the summarizer.
+        Summarize several texts with the same length limits as one batch.
         
         Args:
-            text: Document text
-            max_chunk_size: Maximum token count per chunk
-            
+            texts: Texts to summarize
+            max_length: Maximum length of each summary
+            min_length: Minimum length of each summary
+        
         Returns:
-            List of text chunks
+            One summary per text
         """
-        sentences = sent_tokenize(text)
-        chunks = []
+        return self.summary_batcher.submit(
+            texts,
+            max_length=max_length,
+            min_length=min_length,
+            do_sample=False
+        )
+    
+    def _pack_sentences(self, sentences: Iterable[str], max_chunk_size: Optional[int] = None) -> Iterator[str]:
+        """Greedily pack consecutive sentences into chunks of at most max_chunk_size words."""
+        max_chunk_size = max_chunk_size or self.chunk_words
         current_chunk = []
         current_size = 0
         
@@ -39,7 +86,7 @@ class DocumentSummarizer:
             
             if current_size + sentence_size > max_chunk_size:
                 # Current chunk is full, start a new one
-                chunks.append(" ".join(current_chunk))
+                yield " ".join(current_chunk)
                 current_chunk = [sentence]
                 current_size = sentence_size
             else:
@@ -48,73 +95,169 @@ class DocumentSummarizer:
         
         # Add the last chunk if not empty
         if current_chunk:
-            chunks.append(" ".join(current_chunk))
+            yield " ".join(current_chunk)
+    
+    def chunk_text(self, text: Union[str, DocumentContext], max_chunk_size: Optional[int] = None) -> List[str]:
+        """
+        Split text into chunks for processing by the summarizer.
         
-        return chunks
+        Args:
+            text: Document text or shared DocumentContext
+            max_chunk_size: Maximum token count per chunk, defaults to chunk_words
+        
+        Returns:
+            List of text chunks
+        """
+        return list(self._pack_sentences(DocumentContext.of(text).sentences, max_chunk_size))
     
-    def generate_summary(self, text: str, max_length: int = 150, min_length: int = 40) -> Dict[str, Any]:
+    def summarize_chunks(self, chunks: List[str],
+                         on_summary: Optional[Callable[[int, str], None]] = None) -> List[str]:
+        """
+        Summarize document chunks as one batch with per-chunk length limits.
+        
+        Chunks that end up with the same length limits (typically every full
+        chunk) share padded batches; very short chunks are skipped.
+        
+        Args:
+            chunks: Text chunks produced by chunk_text
+            on_summary: Called with (index, summary) as soon as each summary is
+                ready, index counting the summarized chunks in document order
+        
+        Returns:
+            Chunk summaries in document order
+        """
+        # Skip very short chunks
+        chunks = [chunk for chunk in chunks if len(chunk.split()) >= 50]
+        
+        generate_kwargs = []
+        for chunk in chunks:
+            chunk_length = len(chunk.split())
+            generate_kwargs.append({
+                "max_length": max(30, min(100, chunk_length // 4)),
+                "min_length": min(20, chunk_length // 8),
+                "do_sample": False
+            })
+        
+        return self.summary_batcher.submit_each(chunks, generate_kwargs, on_summary)
+    
+    def extractive_summary(self, text: Union[str, DocumentContext], max_words: int = 150) -> str:
+        """
+        Summarize a document by its best sentences, without running the model.
+        
+        Sentences are scored with TextRank over their TF-IDF similarities.
+        
+        Args:
+            text: Document text or shared DocumentContext
+            max_words: Maximum number of words of the summary
+        
+        Returns:
+            The selected sentences in document order
+        """
+        return " ".join(select_sentences(DocumentContext.of(text).sentences, max_words))
+    
+    def hybrid_selection(self, text: Union[str, DocumentContext]) -> str:
+        """
+        Select the best sentences of a document that fit the model input together.
+        
+        Sentences are measured in tokens of the summarization model, so the
+        selection is not truncated in the abstractive pass.
+        
+        Args:
+            text: Document text or shared DocumentContext
+        
+        Returns:
+            The selected sentences in document order
+        """
+        sentences = DocumentContext.of(text).sentences
+        if not sentences:
+            return ""
+        # Sentences are joined with spaces, counted as one token each
+        lengths = [
+            len(input_ids) + 1
+            for input_ids in self.input_tokenizer(sentences, add_special_tokens=False, verbose=False)["input_ids"]
+        ]
+        return " ".join(select_sentences(sentences, self.max_input_tokens, lengths=lengths))
+    
+    def generate_summary(self, text: Union[str, DocumentContext], max_length: int = 150, min_length: int = 40,
+                         hierarchical: bool = False, max_reduce_depth: int = 2,
+                         mode: str = "abstractive",
+                         on_chunk_summary: Optional[Callable[[int, str], None]] = None) -> Dict[str, Any]:
         """
         Generate summary for document text.
         
         Args:
-            text: Document text
+            text: Document text or shared DocumentContext
             max_length: Maximum length of the summary
             min_length: Minimum length of the summary
-            
+            hierarchical: Keep re-chunking and summarizing the combined chunk
+                summaries while they exceed the model input size, instead of
+                letting the final pass truncate them
+            max_reduce_depth: Maximum number of extra reduce levels in hierarchical mode
+            mode: One of SUMMARY_MODES
+            on_chunk_summary: Called with (index, summary) for every chunk
+                summary of a long document as soon as it is ready
+        
         Returns:
             Dictionary with summary and metadata
         """
+        if mode not in SUMMARY_MODES:
+            raise ValueError(f"Unknown summary mode: {mode}, expected one of {', '.join(SUMMARY_MODES)}")
+        
+        context = DocumentContext.of(text)
+        
         # For short texts, adjust min_length
-        text_length = len(text.split())
+        text_length = context.word_count
         if text_length < 100:
             min_length = min(20, text_length // 2)
             max_length = min(60, text_length)
         
+        if mode == "extractive":
+            summary = self.extractive_summary(context, max_words=max_length)
+        elif mode == "hybrid" and text_length > self.chunk_words:
+            # Keep the best sentences that fit the model input, then summarize them once
+            selection = self.hybrid_selection(context)
+            summary = self.summarize_texts(
+                [selection],
+                max_length=max_length,
+                min_length=min_length
+            )[0]
         # Handle long documents by chunking
-        if text_length > 1024:
-            chunks = self.chunk_text(text)
-            chunk_summaries = []
-            
-            for i, chunk in enumerate(chunks):
-                # Skip very short chunks
-                if len(chunk.split()) < 50:
-                    continue
-                    
-                chunk_result = self.summarizer(
-                    chunk, 
-                    max_length=max(30, min(100, len(chunk.split()) // 4)),
-                    min_length=min(20, len(chunk.split()) // 8),
-                    do_sample=False
-                )
-                chunk_summaries.append(chunk_result[0]["summary_text"])
+        elif text_length > self.chunk_words:
+            chunk_summaries = self.summarize_chunks(self.chunk_text(context), on_chunk_summary)
             
             # Combine chunk summaries and summarize again if needed
             combined_summary = " ".join(chunk_summaries)
             
+            if hierarchical:
+                depth = 0
+                while len(combined_summary.split()) > self.chunk_words and depth < max_reduce_depth:
+                    chunk_summaries = self.summarize_chunks(self.chunk_text(combined_summary))
+                    if not chunk_summaries:
+                        break
+                    combined_summary = " ".join(chunk_summaries)
+                    depth += 1
+            
             # If the combined summary is still long, summarize it again
             if len(combined_summary.split()) > max_length * 1.5:
-                final_result = self.summarizer(
-                    combined_summary,
+                summary = self.summarize_texts(
+                    [combined_summary],
                     max_length=max_length,
-                    min_length=min_length,
-                    do_sample=False
-                )
-                summary = final_result[0]["summary_text"]
+                    min_length=min_length
+                )[0]
             else:
                 summary = combined_summary
         else:
             # For shorter documents, summarize directly
-            result = self.summarizer(
-                text,
+            summary = self.summarize_texts(
+                [context.text],
                 max_length=max_length,
-                min_length=min_length,
-                do_sample=False
-            )
-            summary = result[0]["summary_text"]
+                min_length=min_length
+            )[0]
         
         return {
             "summary": summary,
             "original_length": text_length,
             "summary_length": len(summary.split()),
-            "compression_ratio": len(summary.split()) / max(1, text_length)
+            "compression_ratio": len(summary.split()) / max(1, text_length),
+            "mode": mode
         }
\ No newline at end of file
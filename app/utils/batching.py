@@ -0,0 +1,208 @@
+import json
+import logging
+import queue
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.metrics import (
+    PIPELINE_BATCH_SIZE, PIPELINE_INPUT_CHARS, PIPELINE_INPUT_TOKENS, PIPELINE_SECONDS, current_request_timings, metrics,
+    record_request_timing
+)
+
+logger = logging.getLogger(__name__)
+
+class _BatchRequest:
+    """Items submitted by one caller, completed once every item has a result."""
+    
+    def __init__(self, size: int, on_result: Optional[Callable[[int, Any], None]] = None):
+        self.results: List[Any] = [None] * size
+        self.remaining = size
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+        self.on_result = on_result
+        # Timing breakdown of the submitting request, which pipeline time is added to
+        self.timings = current_request_timings()
+        self._lock = threading.Lock()
+    
+    def set_result(self, index: int, result: Any) -> None:
+        if self.on_result is not None:
+            # A failing callback must not take down the batching thread
+            try:
+                self.on_result(index, result)
+            except Exception:
+                logger.exception("Batch result callback failed")
+        with self._lock:
+            self.results[index] = result
+            self.remaining -= 1
+            if self.remaining == 0:
+                self.done.set()
+    
+    def set_error(self, error: BaseException) -> None:
+        with self._lock:
+            self.error = error
+            self.done.set()
+
+# Live batchers, for the queue depth gauge
+_batchers: "weakref.WeakSet[MicroBatcher]" = weakref.WeakSet()
+
+def _queue_depths() -> Dict[Tuple[str, ...], float]:
+    depths: Dict[Tuple[str, ...], float] = {}
+    for batcher in list(_batchers):
+        depths[(batcher.name,)] = depths.get((batcher.name,), 0) + batcher._queue.qsize()
+    return depths
+
+metrics.gauge("docintel_batch_queue_depth", "Inputs waiting for a micro-batch", ["batcher"], _queue_depths)
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching in front of a batched model call.
+    
+    Callers on any thread submit lists of inputs and block until their results
+    are ready. A background thread collects inputs from concurrent callers for
+    up to ``max_wait_ms`` milliseconds or ``max_batch_size`` items, sorts them by
+    length so inputs of similar size share a padded batch, and runs them
+    through ``batch_fn``. Inputs submitted with different keyword arguments are
+    never mixed in the same batch.
+    """
+    
+    def __init__(self, batch_fn: Callable[..., List[Any]], max_batch_size: int = 16,
+                 max_wait_ms: float = 5.0, length_fn: Callable[[Any], int] = len,
+                 name: str = "batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.length_fn = length_fn
+        self.name = name
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        _batchers.add(self)
+    
+    def submit(self, items: Sequence[Any], **kwargs: Any) -> List[Any]:
+        """
+        Run items through the batched model call and wait for their results.
+        
+        Args:
+            items: Inputs for the model
+            **kwargs: Keyword arguments passed to the batch function
+        
+        Returns:
+            One result per input, in input order
+        """
+        return self.submit_each(items, [kwargs] * len(items))
+    
+    def submit_each(self, items: Sequence[Any], kwargs_list: Sequence[Dict[str, Any]],
+                    on_result: Optional[Callable[[int, Any], None]] = None) -> List[Any]:
+        """
+        Like submit, but with separate keyword arguments for every input.
+        
+        All inputs are queued at once, so inputs sharing the same keyword
+        arguments still end up in the same batches.
+        
+        Args:
+            items: Inputs for the model
+            kwargs_list: Keyword arguments for each input
+            on_result: Called from the batching thread with (index, result) as
+                soon as the batch holding an input has run, before this returns
+        
+        Returns:
+            One result per input, in input order
+        """
+        if not items:
+            return []
+        
+        self._ensure_worker()
+        
+        request = _BatchRequest(len(items), on_result)
+        for index, (item, kwargs) in enumerate(zip(items, kwargs_list)):
+            group = json.dumps(kwargs, sort_keys=True, default=str)
+            self._queue.put((group, kwargs, item, request, index))
+        
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.results
+    
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+    
+    def _collect(self) -> List[Any]:
+        """Block for the first entry, then gather more until the window closes."""
+        entries = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        
+        while len(entries) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entries.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        # Take whatever else is already waiting so it can be sorted into
+        # batches together, but never block for it
+        while len(entries) < self.max_batch_size * 4:
+            try:
+                entries.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        return entries
+    
+    def _run(self) -> None:
+        while True:
+            entries = self._collect()
+            
+            groups: Dict[str, List[Any]] = {}
+            for entry in entries:
+                groups.setdefault(entry[0], []).append(entry)
+            
+            for group_entries in groups.values():
+                group_entries.sort(key=lambda entry: self.length_fn(entry[2]))
+                for start in range(0, len(group_entries), self.max_batch_size):
+                    self._run_batch(group_entries[start:start + self.max_batch_size])
+    
+    def _run_batch(self, entries: List[Any]) -> None:
+        kwargs = entries[0][1]
+        started = time.perf_counter()
+        try:
+            results = self.batch_fn([entry[2] for entry in entries], **kwargs)
+        except Exception as error:
+            for entry in entries:
+                entry[3].set_error(error)
+            return
+        
+        if metrics.enabled:
+            self._record_batch(entries, time.perf_counter() - started)
+        
+        for entry, result in zip(entries, results):
+            entry[3].set_result(entry[4], result)
+    
+    def record_input_tokens(self, tokens: int) -> None:
+        """
+        Record the token length of the longest input of a batch.
+        
+        Called by batch functions, which know how their model tokenizes its
+        inputs; the padded token length is what a pipeline call costs.
+        """
+        metrics.observe(PIPELINE_INPUT_TOKENS, tokens, batcher=self.name)
+    
+    def _record_batch(self, entries: List[Any], seconds: float) -> None:
+        metrics.observe(PIPELINE_SECONDS, seconds, batcher=self.name)
+        metrics.observe(PIPELINE_BATCH_SIZE, len(entries), batcher=self.name)
+        # Entries are sorted by length, so the last one sets the padded length
+        metrics.observe(PIPELINE_INPUT_CHARS, self.length_fn(entries[-1][2]), batcher=self.name)
+        
+        # Every request with inputs in the batch waited for all of it
+        requests = {id(entry[3]): entry[3] for entry in entries}
+        for request in requests.values():
+            if request.timings is not None:
+                record_request_timing(self.name, seconds, request.timings)
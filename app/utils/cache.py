@@ -0,0 +1,148 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+def content_hash(content: bytes) -> str:
+    """Return the SHA-256 hex digest of raw document bytes."""
+    return hashlib.sha256(content).hexdigest()
+
+def make_cache_key(document_hash: str, stage: str, model_id: str, params: Dict[str, Any]) -> str:
+    """
+    Build a cache key from the document hash, processing stage, model identity and parameters.
+    
+    Args:
+        document_hash: Content hash of the uploaded bytes
+        stage: Processing stage name (e.g. "extract", "classify", "summarize")
+        model_id: Identity of the model(s) producing the result
+        params: Parameters that influence the result
+        
+    Returns:
+        Hex digest identifying the result
+    """
+    payload = json.dumps(
+        {"document": document_hash, "stage": stage, "model": model_id, "params": params},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LRUCache:
+    """In-memory LRU store of serialized results bounded by entry count and total size."""
+    
+    def __init__(self, max_entries: int = 512, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: str) -> None:
+        size = len(value)
+        if size > self.max_bytes:
+            # Never let a single oversized result flush the whole cache
+            return
+        
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            
+            self._entries[key] = value
+            self._size += size
+            
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteCache:
+    """On-disk store of serialized results backed by a SQLite database."""
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", (key, value)
+            )
+
+class ResultCache:
+    """
+    Two-tier result cache: an in-memory LRU in front of an optional SQLite store.
+    
+    Results are stored as JSON so every hit returns a fresh copy that callers
+    are free to mutate.
+    """
+    
+    def __init__(self, memory: LRUCache, disk: Optional[SQLiteCache] = None, enabled: bool = True):
+        self.memory = memory
+        self.disk = disk
+        self.enabled = enabled
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached result for key, or None on a miss."""
+        if not self.enabled:
+            return None
+        
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                # Promote disk hits to the memory tier
+                self.memory.set(key, value)
+        
+        return json.loads(value) if value is not None else None
+    
+    def set(self, key: str, result: Any) -> None:
+        """Store a JSON-serializable result under key."""
+        if not self.enabled:
+            return
+        
+        value = json.dumps(result)
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+    
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Return the cached result for key, computing and storing it on a miss.
+        
+        Returns:
+            Tuple containing (result, cache_hit)
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached, True
+        
+        result = compute()
+        self.set(key, result)
+        return result, False
+
+def create_result_cache(enabled: bool = True, max_entries: int = 512,
+                        max_bytes: int = 64 * 1024 * 1024, db_path: Optional[str] = None) -> ResultCache:
+    """Create a result cache with an optional SQLite tier."""
+    disk = SQLiteCache(db_path) if db_path else None
+    return ResultCache(LRUCache(max_entries, max_bytes), disk, enabled=enabled)
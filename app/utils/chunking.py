@@ -0,0 +1,72 @@
+from bisect import bisect_left, bisect_right
+from typing import List, Sequence, Tuple
+
+def token_windows(token_count: int, sentence_starts: Sequence[int],
+                  max_tokens: int, stride: int) -> List[Tuple[int, int]]:
+    """
+    Split a token sequence into sentence-aligned, overlapping windows.
+    
+    Each window is packed with as many tokens as fit in max_tokens and is cut
+    at the last sentence boundary that fits. Consecutive windows overlap by
+    up to stride tokens; when a window ends on a sentence boundary the overlap
+    is made of whole sentences, otherwise (a single sentence longer than
+    max_tokens) it is exactly stride tokens.
+    
+    Args:
+        token_count: Number of tokens in the document
+        sentence_starts: Sorted token indices at which sentences start
+        max_tokens: Maximum number of tokens per window
+        stride: Maximum number of tokens shared by consecutive windows
+        
+    Returns:
+        List of (start_token, end_token) ranges, end exclusive
+    """
+    stride = min(stride, max_tokens // 2)
+    windows = []
+    start = 0
+    
+    while start < token_count:
+        end = min(start + max_tokens, token_count)
+        aligned = end == token_count
+        
+        if end < token_count:
+            # Cut at the last sentence boundary inside the window, if any
+            index = bisect_right(sentence_starts, end) - 1
+            if index >= 0 and sentence_starts[index] > start:
+                end = sentence_starts[index]
+                aligned = True
+        
+        windows.append((start, end))
+        if end >= token_count:
+            break
+        
+        if aligned:
+            # Overlap with the whole sentences that fit in the stride
+            next_start = sentence_starts[bisect_left(sentence_starts, end - stride)]
+        else:
+            next_start = end - stride
+        
+        start = next_start if next_start > start else end
+    
+    return windows
+
+def owned_ranges(spans: Sequence[Tuple[int, int]]) -> List[Tuple[float, float]]:
+    """
+    Assign every position of a sequence of overlapping spans to exactly one span.
+    
+    Overlapping regions are split at their midpoint, so a result found in an
+    overlap is kept from the span where it is furthest from the edge.
+    
+    Args:
+        spans: Sorted (start, end) spans
+        
+    Returns:
+        One (own_start, own_end) range per span, end exclusive
+    """
+    cuts = []
+    for (start, _), (_, previous_end) in zip(spans[1:], spans[:-1]):
+        cuts.append((start + previous_end) / 2 if previous_end > start else start)
+    
+    lower = [float("-inf")] + cuts
+    upper = cuts + [float("inf")]
+    return list(zip(lower, upper))
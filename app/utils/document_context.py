@@ -0,0 +1,155 @@
+import re
+import threading
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+import nltk
+from nltk.tokenize import sent_tokenize
+
+from app.core.metrics import TOKENIZATION_SECONDS, TOKENIZED_TOKENS, metrics
+
+_WORD_PATTERN = re.compile(r"\S+")
+
+_punkt_checked = False
+
+def ensure_punkt() -> None:
+    """Download the NLTK sentence tokenizer data on first use if it is missing."""
+    global _punkt_checked
+    if _punkt_checked:
+        return
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        nltk.download('punkt')
+    _punkt_checked = True
+
+class memoized:
+    """
+    Like functools.cached_property, but memoized through DocumentContext.cached.
+    
+    cached_property takes one lock per class before Python 3.12, so computing
+    a value for one document would block every other document.
+    """
+    
+    def __init__(self, compute: Callable[[Any], Any]):
+        self.compute = compute
+        self.__doc__ = compute.__doc__
+    
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+    
+    def __get__(self, instance: Any, owner: type = None) -> Any:
+        if instance is None:
+            return self
+        return instance.cached(self.name, lambda: self.compute(instance))
+    
+    def __set__(self, instance: Any, value: Any) -> None:
+        with instance._lock:
+            instance._cache[self.name] = value
+
+class DocumentContext:
+    """
+    Per-request analysis of a document's text.
+    
+    Word splits, word spans, sentence boundaries and subword tokenizations are
+    computed lazily on first use and memoized, so the extractor, classifier
+    and summarizer can share them instead of each re-tokenizing the text.
+    """
+    
+    def __init__(self, text: str):
+        self.text = text
+        self._cache: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+        # One lock per key being computed, so concurrent readers compute it once
+        self._key_locks: Dict[Any, threading.Lock] = {}
+    
+    @classmethod
+    def of(cls, text: Union[str, "DocumentContext"]) -> "DocumentContext":
+        """Return text unchanged if it already is a context, otherwise wrap it."""
+        return text if isinstance(text, DocumentContext) else cls(text)
+    
+    @memoized
+    def words(self) -> List[str]:
+        """Whitespace-separated words, identical to ``text.split()``."""
+        return self.text.split()
+    
+    @property
+    def word_count(self) -> int:
+        return len(self.words)
+    
+    @memoized
+    def word_spans(self) -> List[Tuple[int, int]]:
+        """Character (start, end) offsets of every word."""
+        return [match.span() for match in _WORD_PATTERN.finditer(self.text)]
+    
+    @memoized
+    def sentences(self) -> List[str]:
+        """Sentences as returned by NLTK's ``sent_tokenize``."""
+        ensure_punkt()
+        return sent_tokenize(self.text)
+    
+    @memoized
+    def sentence_spans(self) -> List[Tuple[int, int]]:
+        """Character (start, end) offsets of every sentence."""
+        spans = []
+        position = 0
+        for sentence in self.sentences:
+            start = self.text.find(sentence, position)
+            if start < 0:
+                # The tokenizer altered the sentence, fall back to the current position
+                start = position
+            position = min(start + len(sentence), len(self.text))
+            spans.append((start, position))
+        return spans
+    
+    @memoized
+    def lower(self) -> str:
+        """Lower-cased text."""
+        return self.text.lower()
+    
+    def leading_words(self, count: int) -> str:
+        """Return the first count words joined by single spaces."""
+        return self.cached(("leading_words", count), lambda: " ".join(self.words[:count]))
+    
+    def tokenize(self, tokenizer: Any) -> Any:
+        """
+        Tokenize the full text with a Hugging Face tokenizer, once per tokenizer.
+        
+        Returns:
+            The tokenizer encoding, including character offsets
+        """
+        name = getattr(tokenizer, "name_or_path", id(tokenizer))
+        
+        def compute() -> Any:
+            with metrics.timer(TOKENIZATION_SECONDS, "tokenize", tokenizer=name):
+                encoding = tokenizer(
+                    self.text,
+                    add_special_tokens=False,
+                    return_offsets_mapping=True,
+                    verbose=False
+                )
+            metrics.observe(TOKENIZED_TOKENS, len(encoding["input_ids"]), tokenizer=name)
+            return encoding
+        
+        return self.cached(("tokens", name), compute)
+    
+    def cached(self, key: Any, compute: Callable[[], Any]) -> Any:
+        """
+        Return the memoized value for key, computing it on first use.
+        
+        Concurrent callers of the same key wait for the first computation
+        instead of repeating it; different keys are computed independently.
+        """
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        
+        with key_lock:
+            with self._lock:
+                if key in self._cache:
+                    return self._cache[key]
+            value = compute()
+            with self._lock:
+                self._cache[key] = value
+                self._key_locks.pop(key, None)
+            return value
@@ -1,80 +1,270 @@
+import hashlib
+import io
+import multiprocessing
 import os
+import shutil
 import tempfile
-from typing import Dict, Optional, List, Tuple
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, List, Tuple, Union
 import PyPDF2
 import docx
 from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
 
-def extract_text_from_pdf(file_path: str) -> str:
-    """Extract text content from a PDF file."""
-    text = ""
-    with open(file_path, "rb") as file:
+from app.core.config import get_settings
+from app.core.metrics import TEXT_EXTRACTION_SECONDS, UPLOAD_READ_SECONDS, metrics
+
+# Documents can be loaded from a path or from a binary file-like object
+DocumentSource = Union[str, BinaryIO]
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+def _get_pdf_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the shared process pool used for parallel PDF extraction."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # Spawn fresh interpreters instead of forking a process that holds loaded models
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pdf_pool
+
+@contextmanager
+def _open_binary(source: DocumentSource) -> Iterator[BinaryIO]:
+    """Open a path for binary reading, or rewind an already open file-like object."""
+    if isinstance(source, str):
+        with open(source, "rb") as file:
+            yield file
+    else:
+        source.seek(0)
+        yield source
+
+def iter_pdf_pages(source: DocumentSource, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield the text of a PDF one page at a time.
+    
+    Args:
+        source: Path to the PDF file or binary file-like object
+        start: Index of the first page to extract
+        end: Index after the last page to extract, defaults to the last page
+    
+    Returns:
+        Iterator over page texts
+    """
+    with _open_binary(source) as file:
         pdf_reader = PyPDF2.PdfReader(file)
-        for page_num in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_num]
-            text += page.extract_text()
-    return text
+        end = len(pdf_reader.pages) if end is None else min(end, len(pdf_reader.pages))
+        for page_num in range(start, end):
+            yield pdf_reader.pages[page_num].extract_text()
 
-def extract_text_from_docx(file_path: str) -> str:
-    """Extract text content from a DOCX file."""
-    doc = docx.Document(file_path)
-    text = ""
+def count_pdf_pages(source: DocumentSource) -> int:
+    """Return the number of pages in a PDF file."""
+    with _open_binary(source) as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+def _extract_pdf_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """Extract a range of pages in a worker process."""
+    return list(iter_pdf_pages(file_path, start, end))
+
+@contextmanager
+def _disk_path(source: DocumentSource) -> Iterator[str]:
+    """
+    Path worker processes can open: the source's own path, or a temporary copy.
+    
+    File-like sources without a path on disk, such as spooled uploads, are
+    copied to a temporary file that is removed afterwards.
+    """
+    if isinstance(source, str):
+        yield source
+        return
+    name = getattr(source, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        yield name
+        return
+    
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            source.seek(0)
+            shutil.copyfileobj(source, file)
+        yield path
+    finally:
+        os.remove(path)
+
+def iter_pdf_pages_parallel(source: DocumentSource, workers: int, min_pages: int = 50) -> Iterator[str]:
+    """
+    Yield PDF page texts in order, extracting page ranges in parallel worker processes.
+    
+    Small PDFs are extracted in-process. Large file-like sources, which worker
+    processes cannot reopen, are copied to a temporary file first.
+    
+    Args:
+        source: Path to the PDF file or binary file-like object
+        workers: Number of worker processes
+        min_pages: Minimum page count before worker processes are used
+    
+    Returns:
+        Iterator over page texts
+    """
+    if workers <= 1:
+        yield from iter_pdf_pages(source)
+        return
+    
+    page_count = count_pdf_pages(source)
+    if page_count < min_pages:
+        yield from iter_pdf_pages(source)
+        return
+    
+    pool = _get_pdf_pool(workers)
+    # Several ranges per worker keeps the pool busy while early ranges are consumed
+    range_size = max(1, -(-page_count // (workers * 4)))
+    with _disk_path(source) as path:
+        futures = [
+            pool.submit(_extract_pdf_page_range, path, start, min(start + range_size, page_count))
+            for start in range(0, page_count, range_size)
+        ]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # Ranges nobody will read are dropped before their file goes away
+            for future in futures:
+                future.cancel()
+
+def extract_text_from_pdf(source: DocumentSource, workers: int = 0, min_pages: int = 50) -> str:
+    """Extract text content from a PDF file."""
+    return "".join(iter_pdf_pages_parallel(source, workers, min_pages))
+
+def iter_docx_paragraphs(source: DocumentSource) -> Iterator[str]:
+    """Yield the text of a DOCX file one paragraph at a time."""
+    with _open_binary(source) as file:
+        doc = docx.Document(file)
     for paragraph in doc.paragraphs:
-        text += paragraph.text + "\n"
-    return text
+        yield paragraph.text + "\n"
+
+def extract_text_from_docx(source: DocumentSource) -> str:
+    """Extract text content from a DOCX file."""
+    return "".join(iter_docx_paragraphs(source))
+
+def iter_txt_blocks(source: DocumentSource, block_size: int = 64 * 1024) -> Iterator[str]:
+    """Yield the text of a TXT file in blocks of at most block_size characters."""
+    with _open_binary(source) as file:
+        reader = io.TextIOWrapper(file, encoding="utf-8", errors="replace")
+        try:
+            while True:
+                block = reader.read(block_size)
+                if not block:
+                    break
+                yield block
+        finally:
+            # Leave the underlying file open for its owner
+            reader.detach()
 
-def extract_text_from_txt(file_path: str) -> str:
+def extract_text_from_txt(source: DocumentSource) -> str:
     """Extract text content from a TXT file."""
-    with open(file_path, "r", encoding="utf-8", errors="replace") as file:
-        text = file.read()
-    return text
+    return "".join(iter_txt_blocks(source))
 
-def load_document(file_path: str) -> Tuple[str, str]:
+def iter_document_text(source: DocumentSource, file_extension: Optional[str] = None) -> Iterator[str]:
     """
-    Load document and extract text based on file extension.
+    Yield document text incrementally based on file extension.
+    
+    PDFs are yielded page by page, DOCX files paragraph by paragraph and TXT
+    files in blocks. Joining the segments gives the same text as load_document.
     
     Args:
-        file_path: Path to the document file
-        
+        source: Path to the document file or binary file-like object
+        file_extension: File extension, required when source is not a path
+    
     Returns:
-        Tuple containing (extracted_text, file_extension)
+        Iterator over text segments
     """
-    _, file_extension = os.path.splitext(file_path)
+    if file_extension is None:
+        file_extension = os.path.splitext(source)[1]
     file_extension = file_extension.lower()
     
     if file_extension == ".pdf":
-        text = extract_text_from_pdf(file_path)
+        settings = get_settings()
+        return iter_pdf_pages_parallel(source, settings.pdf_workers, settings.pdf_parallel_min_pages)
     elif file_extension == ".docx":
-        text = extract_text_from_docx(file_path)
+        return iter_docx_paragraphs(source)
     elif file_extension == ".txt":
-        text = extract_text_from_txt(file_path)
+        return iter_txt_blocks(source)
     else:
         raise ValueError(f"Unsupported file extension: {file_extension}")
+
+def load_document(source: DocumentSource, file_extension: Optional[str] = None,
+                  on_segment: Optional[Callable[[str], None]] = None) -> Tuple[str, str]:
+    """
+    Load document and extract text based on file extension.
+    
+    Args:
+        source: Path to the document file or binary file-like object
+        file_extension: File extension, required when source is not a path
+        on_segment: Called with every segment from iter_document_text as soon
+            as it is extracted, e.g. to report progress on long PDFs
+    
+    Returns:
+        Tuple containing (extracted_text, file_extension)
+    """
+    if file_extension is None:
+        _, file_extension = os.path.splitext(source)
+    file_extension = file_extension.lower()
+    
+    with metrics.timer(TEXT_EXTRACTION_SECONDS, "extract_text", format=file_extension.lstrip(".")):
+        segments = []
+        for segment in iter_document_text(source, file_extension):
+            segments.append(segment)
+            if on_segment is not None:
+                on_segment(segment)
+        text = "".join(segments)
     
     return text, file_extension
 
+async def hash_uploaded_file(upload_file: UploadFile, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Compute the SHA-256 content hash of an uploaded file.
+    
+    The upload is read in chunks and rewound afterwards so it can still be
+    processed normally.
+    
+    Args:
+        upload_file: FastAPI UploadFile object
+        chunk_size: Number of bytes read per chunk
+    
+    Returns:
+        Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with metrics.timer(UPLOAD_READ_SECONDS, "upload"):
+        await upload_file.seek(0)
+        while True:
+            chunk = await upload_file.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+        await upload_file.seek(0)
+    return digest.hexdigest()
+
 async def process_uploaded_file(upload_file: UploadFile) -> Tuple[str, str]:
     """
     Process an uploaded file and extract its text content.
     
+    The loaders read the upload's spooled file directly, so the content is
+    not copied into memory. Only PDFs large enough for parallel extraction
+    are copied to a temporary file the worker processes can open.
+    
     Args:
         upload_file: FastAPI UploadFile object
-        
+    
     Returns:
         Tuple containing (extracted_text, file_extension)
     """
-    # Create a temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(upload_file.filename)[1]) as temp:
-        # Read uploaded file content
-        content = await upload_file.read()
-        # Write to temporary file
-        temp.write(content)
-        temp_path = temp.name
+    file_extension = os.path.splitext(upload_file.filename or "")[1]
     
-    try:
-        # Extract text from the temporary file
-        text, extension = load_document(temp_path)
-        return text, extension
-    finally:
-        # Clean up the temporary file
-        os.unlink(temp_path)
\ No newline at end of file
+    # Extract text from the spooled upload without blocking the event loop
+    return await run_in_threadpool(load_document, upload_file.file, file_extension)
\ No newline at end of file
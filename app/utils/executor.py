@@ -0,0 +1,73 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+class InferenceQueueFullError(RuntimeError):
+    """Raised when the inference executor cannot accept more work."""
+
+class InferenceTimeoutError(RuntimeError):
+    """Raised when an inference call does not finish within its timeout."""
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for running blocking model inference from async handlers.
+    
+    PyTorch and spaCy release the GIL inside their heavy kernels, so a small
+    thread pool keeps the event loop responsive while sharing the already
+    loaded models. At most ``max_workers`` calls run at once and at most
+    ``max_queue`` more may wait; further calls are rejected immediately.
+    """
+    
+    def __init__(self, max_workers: int = 2, max_queue: int = 8, timeout: Optional[float] = None):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._pending = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def pending(self) -> int:
+        """Number of calls currently running or waiting for a worker."""
+        return self._pending
+    
+    def _release(self, _future: Any) -> None:
+        with self._lock:
+            self._pending -= 1
+    
+    async def run(self, func: Callable[..., Any], *args: Any,
+                  timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """
+        Run a blocking function on the pool and await its result.
+        
+        Args:
+            func: Blocking callable to run
+            timeout: Seconds to wait for the result, defaults to the executor timeout
+        
+        Returns:
+            The return value of func
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise InferenceQueueFullError("Inference queue is full, try again later")
+            self._pending += 1
+        
+        # The slot is released when the work really finishes, not when the
+        # caller stops waiting, so timed-out calls still count against the limit.
+        # The worker runs in a copy of the caller's context, which carries the
+        # request's timing breakdown.
+        context = contextvars.copy_context()
+        future = self._pool.submit(context.run, functools.partial(func, *args, **kwargs))
+        future.add_done_callback(self._release)
+        
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            raise InferenceTimeoutError(f"Inference did not finish within {timeout} seconds")
+    
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
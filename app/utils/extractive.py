@@ -0,0 +1,164 @@
+import re
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_TERM_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Above this many sentences the n x n similarity graph gets too large for TextRank
+MAX_TEXTRANK_SENTENCES = 1000
+
+def tfidf_vectors(sentences: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Build L2-normalised TF-IDF vectors of sentences in sparse coordinate form.
+    
+    Args:
+        sentences: Sentences to vectorize
+    
+    Returns:
+        Tuple containing (sentence index, term index, weight) arrays of the
+        non-zero entries and the vocabulary size
+    """
+    vocabulary = {}
+    rows, cols = [], []
+    for index, sentence in enumerate(sentences):
+        for term in _TERM_PATTERN.findall(sentence.lower()):
+            rows.append(index)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+    
+    n_terms = len(vocabulary)
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0), n_terms
+    
+    # Merge repeated (sentence, term) pairs into term frequencies
+    keys, counts = np.unique(np.array(rows) * n_terms + np.array(cols), return_counts=True)
+    rows, cols = keys // n_terms, keys % n_terms
+    
+    # Smoothed inverse document frequency, terms in every sentence keep a small weight
+    document_frequency = np.bincount(cols, minlength=n_terms)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    weights = counts * idf[cols]
+    
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=len(sentences)))
+    weights /= norms[rows]
+    return rows, cols, weights, n_terms
+
+def cosine_similarities(rows: np.ndarray, cols: np.ndarray, weights: np.ndarray,
+                        n_terms: int, n_sentences: int, dense_document_frequency: int = 32) -> np.ndarray:
+    """
+    Compute the sentence x sentence dot products of sparse TF-IDF vectors.
+    
+    Only terms shared by many sentences are expanded into a dense sentence x
+    term matrix; every other term adds the products of its posting list, the
+    entries of the sentences containing it. Memory stays proportional to the
+    similarity matrix instead of the vocabulary.
+    
+    Args:
+        rows, cols, weights, n_terms: Sparse vectors as returned by tfidf_vectors
+        n_sentences: Number of sentences
+        dense_document_frequency: Terms in more sentences than this are
+            multiplied as a dense matrix
+    
+    Returns:
+        n_sentences x n_sentences similarity matrix
+    """
+    n = n_sentences
+    document_frequency = np.bincount(cols, minlength=n_terms)
+    frequent = document_frequency[cols] > dense_document_frequency
+    
+    # Frequent terms: a dense matrix over those terms only
+    frequent_terms, frequent_cols = np.unique(cols[frequent], return_inverse=True)
+    vectors = np.zeros((n, len(frequent_terms)))
+    vectors[rows[frequent], frequent_cols] = weights[frequent]
+    similarity = vectors @ vectors.T
+    
+    # Rare terms: every pair of entries in a term's posting list
+    rare_rows, rare_cols, rare_weights = rows[~frequent], cols[~frequent], weights[~frequent]
+    order = np.argsort(rare_cols, kind="stable")
+    rare_rows, rare_cols, rare_weights = rare_rows[order], rare_cols[order], rare_weights[order]
+    postings = document_frequency[rare_cols]
+    # Position of every entry's posting list in the sorted entries
+    starts = np.searchsorted(rare_cols, rare_cols)
+    left = np.repeat(np.arange(len(rare_cols)), postings)
+    right = np.repeat(starts, postings) + np.arange(len(left)) - np.repeat(np.cumsum(postings) - postings, postings)
+    similarity += np.bincount(
+        rare_rows[left] * n + rare_rows[right], weights=rare_weights[left] * rare_weights[right], minlength=n * n
+    ).reshape(n, n)
+    return similarity
+
+def centroid_scores(sentences: Sequence[str]) -> np.ndarray:
+    """Score sentences by the cosine similarity of their TF-IDF vector to the document centroid."""
+    rows, cols, weights, n_terms = tfidf_vectors(sentences)
+    centroid = np.bincount(cols, weights=weights, minlength=n_terms)
+    centroid /= max(np.linalg.norm(centroid), 1e-12)
+    return np.bincount(rows, weights=weights * centroid[cols], minlength=len(sentences))
+
+def textrank_scores(sentences: Sequence[str], damping: float = 0.85,
+                    max_iterations: int = 50, tolerance: float = 1e-6) -> np.ndarray:
+    """
+    Score sentences with TextRank over their TF-IDF cosine similarity graph.
+    
+    Args:
+        sentences: Sentences to score
+        damping: PageRank damping factor
+        max_iterations: Maximum number of power iterations
+        tolerance: Stop once the scores change less than this in total
+    
+    Returns:
+        One score per sentence, summing to 1
+    """
+    n = len(sentences)
+    similarity = cosine_similarities(*tfidf_vectors(sentences), n)
+    np.fill_diagonal(similarity, 0.0)
+    
+    # Row-normalise into transition probabilities, isolated sentences link everywhere
+    totals = similarity.sum(axis=1, keepdims=True)
+    transitions = np.where(totals > 0, similarity / np.where(totals > 0, totals, 1), 1.0 / n)
+    
+    scores = np.full(n, 1.0 / n)
+    for _ in range(max_iterations):
+        updated = (1 - damping) / n + damping * (transitions.T @ scores)
+        converged = np.abs(updated - scores).sum() < tolerance
+        scores = updated
+        if converged:
+            break
+    return scores
+
+def score_sentences(sentences: Sequence[str]) -> np.ndarray:
+    """Score sentences with TextRank, or by centroid similarity when there are too many for TextRank."""
+    if len(sentences) > MAX_TEXTRANK_SENTENCES:
+        return centroid_scores(sentences)
+    return textrank_scores(sentences)
+
+def select_sentences(sentences: Sequence[str], max_words: int,
+                     scores: Optional[np.ndarray] = None, lengths: Optional[Sequence[int]] = None) -> List[str]:
+    """
+    Pick the best-scoring sentences that fit a word budget.
+    
+    Args:
+        sentences: Sentences of the document, in order
+        max_words: Maximum number of words of the selection, or of the units of lengths
+        scores: Sentence scores, computed with score_sentences when not given
+        lengths: Size of every sentence counted against the budget, such as
+            its number of tokens, defaults to its number of words
+    
+    Returns:
+        Selected sentences in document order; at least the best sentence is
+        returned even when it alone exceeds the budget
+    """
+    if not sentences:
+        return []
+    if scores is None:
+        scores = score_sentences(sentences)
+    
+    selected, budget = [], max_words
+    # Stable sort keeps earlier sentences first among equal scores
+    for index in np.argsort(-scores, kind="stable"):
+        size = len(sentences[index].split()) if lengths is None else lengths[index]
+        if size <= budget or not selected:
+            selected.append(index)
+            budget -= size
+        if budget <= 0:
+            break
+    
+    return [sentences[index] for index in sorted(selected)]
@@ -0,0 +1,249 @@
+import asyncio
+import ipaddress
+import itertools
+import json
+import logging
+import socket
+import sqlite3
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Job states, in the order a job moves through them
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# Priority levels as reported by DocumentClassifier.determine_priority, most urgent first
+PRIORITY_RANKS = {"urgent": 0, "high": 1, "medium": 2, "low": 3}
+
+def new_job(**fields: Any) -> Dict[str, Any]:
+    """Create a queued job record with a fresh id."""
+    return dict(
+        fields,
+        id=uuid.uuid4().hex,
+        status=JOB_QUEUED,
+        created_at=time.time(),
+        started_at=None,
+        finished_at=None
+    )
+
+def job_priority(level: str, size: int) -> Tuple[int, int]:
+    """
+    Queue priority of a job, lower values run first.
+    
+    Args:
+        level: Priority level, one of PRIORITY_RANKS
+        size: Document size in bytes, so small documents run before large ones
+    
+    Returns:
+        Sortable priority tuple
+    """
+    return PRIORITY_RANKS.get(level, PRIORITY_RANKS["medium"]), size
+
+class InvalidWebhookError(ValueError):
+    """Raised for webhook URLs that jobs may not call."""
+
+def _is_public_address(address: str) -> bool:
+    """Return True for globally routable unicast addresses."""
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    # is_global excludes loopback, private, link-local, reserved and shared ranges
+    return ip.is_global and not ip.is_multicast
+
+def validate_webhook_url(url: str, allowed_hosts: Iterable[str] = ()) -> str:
+    """
+    Check that a client-supplied webhook URL is safe to POST to.
+    
+    Hosts in allowed_hosts are trusted as they are. When no hosts are
+    allowed, the host is resolved and every address it resolves to must be
+    public: loopback, private, link-local and reserved addresses are refused,
+    so webhooks cannot reach the server itself or its internal network.
+    
+    Args:
+        url: Webhook URL
+        allowed_hosts: Host names webhooks may call, any public host when empty
+    
+    Returns:
+        The URL
+    
+    Raises:
+        InvalidWebhookError: If the URL is not http or https, or its host is not allowed
+    """
+    parsed = urllib.parse.urlsplit(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise InvalidWebhookError(f"Webhook URL must be an http or https URL: {url}")
+    allowed = {host.lower() for host in allowed_hosts}
+    if allowed:
+        if parsed.hostname.lower() not in allowed:
+            raise InvalidWebhookError(f"Webhook host is not allowed: {parsed.hostname}")
+        return url
+    
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, parsed.port or None)}
+    except (socket.gaierror, UnicodeError, ValueError):
+        raise InvalidWebhookError(f"Webhook host cannot be resolved: {parsed.hostname}")
+    if not all(_is_public_address(address) for address in addresses):
+        raise InvalidWebhookError(f"Webhook host is not allowed: {parsed.hostname} resolves to a non-public address")
+    return url
+
+class _RefuseRedirects(urllib.request.HTTPRedirectHandler):
+    """Fail on redirects, which could lead a webhook to a host or scheme that was never validated."""
+    
+    def redirect_request(self, *args: Any, **kwargs: Any) -> None:
+        return None
+
+_webhook_opener = urllib.request.build_opener(_RefuseRedirects)
+
+def send_webhook(url: str, payload: Dict[str, Any], timeout: float = 10.0,
+                 allowed_hosts: Iterable[str] = ()) -> bool:
+    """
+    POST a JSON payload to a webhook URL.
+    
+    Delivery is best effort: failures, invalid URLs and redirects are logged
+    and reported, never raised.
+    
+    Returns:
+        True if the webhook answered with a 2xx status
+    """
+    try:
+        validate_webhook_url(url, allowed_hosts)
+    except InvalidWebhookError as e:
+        logger.warning("Webhook not sent: %s", e)
+        return False
+    
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    try:
+        with _webhook_opener.open(request, timeout=timeout) as response:
+            return 200 <= response.status < 300
+    except Exception as e:
+        logger.warning("Webhook %s failed: %s", url, e)
+        return False
+
+class InMemoryJobStore:
+    """Job records kept in process memory, lost on restart."""
+    
+    def __init__(self):
+        self._jobs: Dict[str, str] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._jobs.get(job_id)
+        return json.loads(value) if value is not None else None
+    
+    def save(self, job: Dict[str, Any]) -> None:
+        value = json.dumps(job)
+        with self._lock:
+            self._jobs[job["id"]] = value
+    
+    def unfinished(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            values = list(self._jobs.values())
+        jobs = [json.loads(value) for value in values]
+        return [job for job in jobs if job["status"] in (JOB_QUEUED, JOB_RUNNING)]
+
+class SQLiteJobStore:
+    """Job records persisted in a SQLite database, surviving restarts."""
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs "
+                "(id TEXT PRIMARY KEY, status TEXT NOT NULL, value TEXT NOT NULL)"
+            )
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def save(self, job: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, value) VALUES (?, ?, ?)",
+                (job["id"], job["status"], json.dumps(job))
+            )
+    
+    def unfinished(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value FROM jobs WHERE status IN (?, ?)", (JOB_QUEUED, JOB_RUNNING)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+def create_job_store(db_path: Optional[str] = None):
+    """Create a SQLite job store when a database path is given, else an in-memory one."""
+    return SQLiteJobStore(db_path) if db_path else InMemoryJobStore()
+
+class JobQueueFullError(RuntimeError):
+    """Raised when no more jobs can be queued."""
+
+class JobQueue:
+    """
+    Priority queue of jobs worked off by a pool of asyncio worker tasks.
+    
+    A job is handed to ``handler`` one step at a time. The handler returns the
+    job's new priority when it has more steps to run, or None when it is done,
+    so a job can be re-prioritized between steps and small or urgent jobs are
+    not stuck behind a large one.
+    """
+    
+    def __init__(self, handler: Callable[[str], Awaitable[Optional[Tuple[int, int]]]],
+                 workers: int = 2, max_size: int = 1000):
+        self.handler = handler
+        self.workers = workers
+        self.max_size = max_size
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Breaks ties in FIFO order
+        self._counter = itertools.count()
+    
+    def __len__(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+    
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop."""
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+    
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    def submit(self, job_id: str, priority: Tuple[int, int], force: bool = False) -> None:
+        """Queue a job step, raising JobQueueFullError when the queue is full."""
+        if not force and len(self) >= self.max_size:
+            raise JobQueueFullError("Job queue is full, try again later")
+        self._queue.put_nowait((priority, next(self._counter), job_id))
+    
+    async def _worker(self) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            try:
+                priority = await self.handler(job_id)
+                if priority is not None:
+                    self.submit(job_id, priority, force=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job %s failed in its handler", job_id)
+            finally:
+                self._queue.task_done()
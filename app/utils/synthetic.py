@@ -0,0 +1,237 @@
+"""
+Synthetic business documents for benchmarks and tests.
+
+Documents are generated from fixed templates with a seeded random generator,
+so the same seed always gives the same corpus. PDFs are written by a minimal
+PDF writer, so no extra dependency is needed to produce them.
+"""
+import os
+import random
+from typing import Any, Dict, Iterable, List, Optional
+
+import docx
+
+PEOPLE = [
+    "John Smith", "Jane Doe", "Maria Garcia", "David Chen", "Sarah Johnson",
+    "Ahmed Khan", "Laura Rossi", "Peter Novak", "Emma Wilson", "Kenji Tanaka"
+]
+ORGANIZATIONS = [
+    "ABC Corporation", "XYZ Ltd", "Northwind Traders", "Globex Industries", "Initech",
+    "Acme Logistics", "Blue Harbor Capital", "Summit Health", "Vertex Software", "Oakridge Partners"
+]
+CITIES = ["New York", "San Francisco", "London", "Berlin", "Tokyo", "Toronto", "Madrid", "Chicago"]
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+
+# Sentence templates per document type, filled in by synthetic_text
+TEMPLATES = {
+    "invoice": [
+        "Invoice No. INV-{number} was issued by {org} to {org2} on {date}.",
+        "The total amount due is ${amount} and payment is due by {date}.",
+        "Please transfer {percent}% of the balance to the account of {org} in {city}.",
+        "Questions about this invoice can be sent to {email} or {phone}.",
+        "Late payments incur a fee of ${small_amount} per month."
+    ],
+    "contract": [
+        "This agreement is made on {date} between {org}, located in {city}, and {org2}.",
+        "{org} will provide consulting services to {org2} for a period of {months} months.",
+        "{org2} will pay ${amount} per month for these services.",
+        "This agreement can be terminated with {days} days notice by either party.",
+        "The agreement was signed by {person} on behalf of {org}."
+    ],
+    "email": [
+        "Hi {first}, I hope this email finds you well.",
+        "I am writing to remind you about our meeting in {city} on {date}.",
+        "Please bring the quarterly results and the market analysis for {org}.",
+        "{person} from {org} will also join us, please reply to {email}.",
+        "This is urgent, the deadline for the proposal is tomorrow."
+    ],
+    "report": [
+        "Revenue of {org} grew by {percent}% in the quarter ending {date}.",
+        "Operating costs in {city} reached ${amount}, mostly from logistics.",
+        "{person} presented the results to the board of {org}.",
+        "The team expects growth of {percent}% next year across all regions.",
+        "Customer satisfaction improved after the launch of the new platform."
+    ],
+    "memo": [
+        "To all staff of {org}: the office in {city} will close on {date}.",
+        "{person} will coordinate the move to the new building.",
+        "Please return all equipment by {date} and contact {email} with questions.",
+        "The budget for the move is ${amount}, approved by {org2}.",
+        "Thank you for your cooperation during this transition."
+    ]
+}
+
+DOCUMENT_TYPES = list(TEMPLATES)
+
+# Named corpus sizes, in words per document
+CORPUS_SIZES = {"small": 250, "medium": 2500, "large": 25000}
+CORPUS_FORMATS = ("txt", "docx", "pdf")
+
+# Every word the templates can produce, for building stub tokenizer vocabularies
+VOCABULARY = sorted({
+    word.strip(".,:%$")
+    for sentences in TEMPLATES.values()
+    for sentence in sentences
+    for word in sentence.split()
+    if "{" not in word
+} | {word for names in (PEOPLE, ORGANIZATIONS, CITIES, MONTHS) for name in names for word in name.split()})
+
+def _fill(template: str, rng: random.Random) -> str:
+    person = rng.choice(PEOPLE)
+    org, org2 = rng.sample(ORGANIZATIONS, 2)
+    return template.format(
+        person=person,
+        first=person.split()[0],
+        org=org,
+        org2=org2,
+        city=rng.choice(CITIES),
+        date=f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, {rng.randint(2019, 2025)}",
+        amount=f"{rng.randint(1, 999)},{rng.randint(0, 999):03d}",
+        small_amount=rng.randint(10, 500),
+        percent=rng.randint(1, 40),
+        number=rng.randint(10000, 99999),
+        months=rng.randint(3, 36),
+        days=rng.choice([14, 30, 60, 90]),
+        email=f"{person.split()[0].lower()}@{org.split()[0].lower()}.com",
+        phone=f"({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}"
+    )
+
+def synthetic_text(words: int, document_type: str = "report", seed: int = 0) -> str:
+    """
+    Generate a business document of about the given number of words.
+    
+    Args:
+        words: Target word count, the last sentence may overshoot it
+        document_type: One of DOCUMENT_TYPES, deciding the sentence templates
+        seed: Random seed, the same seed gives the same text
+    
+    Returns:
+        Paragraphs of template sentences separated by blank lines
+    """
+    rng = random.Random(f"{document_type}:{words}:{seed}")
+    templates = TEMPLATES[document_type]
+    paragraphs: List[str] = []
+    sentences: List[str] = []
+    count = 0
+    while count < words:
+        sentence = _fill(rng.choice(templates), rng)
+        sentences.append(sentence)
+        count += len(sentence.split())
+        if len(sentences) == 5:
+            paragraphs.append(" ".join(sentences))
+            sentences = []
+    if sentences:
+        paragraphs.append(" ".join(sentences))
+    return "\n\n".join(paragraphs)
+
+def _wrap(text: str, width: int) -> List[str]:
+    lines: List[str] = []
+    for paragraph in text.split("\n\n"):
+        line = ""
+        for word in paragraph.split():
+            if line and len(line) + 1 + len(word) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.append(line)
+        lines.append("")
+    return lines[:-1]
+
+def _pdf_string(line: str) -> str:
+    return "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+def write_pdf(path: str, text: str, lines_per_page: int = 60, width: int = 90) -> None:
+    """
+    Write text to a PDF with one Helvetica text object per page.
+    
+    Args:
+        path: Output path
+        text: Text to write, paragraphs separated by blank lines
+        lines_per_page: Lines of text per page
+        width: Maximum characters per line
+    """
+    lines = _wrap(text, width)
+    pages = [lines[start:start + lines_per_page] for start in range(0, len(lines), lines_per_page)] or [[]]
+    
+    # Objects 1-3 are the catalog, the page tree and the font, then a page
+    # object and a content stream per page
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{4 + 2 * index} 0 R" for index in range(len(pages))), len(pages)
+        ),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    for index, page in enumerate(pages):
+        content = "BT /F1 10 Tf 12 TL 50 780 Td " + " T* ".join(f"{_pdf_string(line)} Tj" for line in page) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * index} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(content.encode('latin-1'))} >>\nstream\n{content}\nendstream")
+    
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    
+    with open(path, "wb") as file:
+        file.write(bytes(output))
+
+def write_docx(path: str, text: str) -> None:
+    """Write text to a DOCX file with one paragraph per text paragraph."""
+    document = docx.Document()
+    for paragraph in text.split("\n\n"):
+        document.add_paragraph(paragraph)
+    document.save(path)
+
+def write_txt(path: str, text: str) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+def generate_corpus(directory: str, sizes: Optional[Iterable[str]] = None, formats: Iterable[str] = CORPUS_FORMATS,
+                    documents_per_size: int = 3, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Write a synthetic corpus of every format and size to a directory.
+    
+    Documents of the same size and index hold the same text in every format,
+    and cycle through DOCUMENT_TYPES.
+    
+    Args:
+        directory: Output directory, created if needed
+        sizes: Names of CORPUS_SIZES to generate, all of them by default
+        formats: File formats, any of CORPUS_FORMATS
+        documents_per_size: Documents per size and format
+        seed: Random seed of the generated texts
+    
+    Returns:
+        One {"path", "format", "size", "document_type", "words"} entry per document
+    """
+    os.makedirs(directory, exist_ok=True)
+    corpus = []
+    for size in sizes or CORPUS_SIZES:
+        for index in range(documents_per_size):
+            document_type = DOCUMENT_TYPES[index % len(DOCUMENT_TYPES)]
+            text = synthetic_text(CORPUS_SIZES[size], document_type, seed + index)
+            for file_format in formats:
+                path = os.path.join(directory, f"{size}-{index:03d}-{document_type}.{file_format}")
+                WRITERS[file_format](path, text)
+                corpus.append({
+                    "path": path,
+                    "format": file_format,
+                    "size": size,
+                    "document_type": document_type,
+                    "words": len(text.split())
+                })
+    return corpus
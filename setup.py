@@ -0,0 +1,32 @@
+from setuptools import find_packages, setup
+
+setup(
+    name="document-intelligence-system",
+    version="0.1.0",
+    description="NLP-powered document processing API",
+    packages=find_packages(exclude=["tests", "tests.*"]),
+    python_requires=">=3.9",
+    install_requires=[
+        "fastapi",
+        "uvicorn",
+        "pydantic",
+        "python-docx",
+        "PyPDF2",
+        "python-multipart",
+        "transformers",
+        "torch",
+        "spacy",
+        "nltk",
+        "numpy",
+        "python-dotenv",
+    ],
+    extras_require={
+        "parquet": ["pyarrow"],
+    },
+    entry_points={
+        "console_scripts": [
+            "document-intelligence-ingest=app.ingest:main",
+            "document-intelligence-benchmark=app.benchmark:main",
+        ],
+    },
+)
@@ -0,0 +1,344 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import zipfile
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings
+from app.main import STAGES, UploadedDocument, app, classify_text, run_job_step, settings
+from app.models.stubs import stub_models
+from app.utils.document_loader import extract_text_from_pdf
+from app.utils.jobs import PRIORITY_RANKS
+from app.utils.synthetic import synthetic_text, write_pdf
+from ui.sse import iter_server_sent_events
+
+class RecordingPool(ThreadPoolExecutor):
+    """Thread pool standing in for the PDF worker processes, recording the paths it gets."""
+    
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.paths = []
+    
+    def submit(self, fn, path, *args):
+        self.paths.append((path, os.path.isfile(path)))
+        return super().submit(fn, path, *args)
+
+class TestUploadedDocument(unittest.TestCase):
+    def test_large_pdf_uploads_use_pdf_workers(self):
+        """Spooled PDF uploads should be extracted by the worker pool from a file on disk"""
+        text = synthetic_text(1500, "report")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "report.pdf")
+            write_pdf(path, text, lines_per_page=10)
+            with open(path, "rb") as file:
+                content = file.read()
+            expected = extract_text_from_pdf(path)
+        
+        upload = tempfile.SpooledTemporaryFile()
+        upload.write(content)
+        pool = RecordingPool()
+        settings = Settings(pdf_workers=2, pdf_parallel_min_pages=4)
+        with mock.patch("app.utils.document_loader.get_settings", return_value=settings), \
+                mock.patch("app.utils.document_loader._get_pdf_pool", return_value=pool):
+            document = UploadedDocument("report.pdf", upload, "hash")
+            context = asyncio.run(document.get_context())
+        pool.shutdown()
+        
+        self.assertGreater(len(pool.paths), 1)
+        self.assertTrue(all(exists for _, exists in pool.paths))
+        # The temporary copy is removed once the text is extracted
+        self.assertFalse(any(os.path.exists(path) for path, _ in pool.paths))
+        self.assertEqual(context.text, expected)
+
+class StubAPITestCase(unittest.TestCase):
+    """Calls the API in-process, with every model loaded around stub pipelines."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.stubs = contextlib.ExitStack()
+        cls.stubs.enter_context(stub_models())
+        cls.client = TestClient(app)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.stubs.close()
+    
+    def document(self, document_type: str, seed: int, words: int = 300) -> bytes:
+        # Tests use seeds of their own, so they never reuse results cached by other tests
+        return synthetic_text(words, document_type, seed).encode("utf-8")
+
+class TestProcessEndpoint(StubAPITestCase):
+    def test_stage_subset(self):
+        """Only the requested stages should run, each with its own timing"""
+        response = self.client.post(
+            "/process", files={"file": ("memo.txt", self.document("memo", 1))}, data={"stages": "classify, extract"}
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertIn("classification", result)
+        self.assertIn("entities", result)
+        self.assertNotIn("summary", result)
+        self.assertEqual(result["text_length"], len(self.document("memo", 1).split()))
+        self.assertEqual(sorted(result["timings"]), ["classify", "extract"])
+        self.assertTrue(all(seconds >= 0 for seconds in result["timings"].values()))
+    
+    def test_all_stages_by_default(self):
+        """Without stages every stage should run and be timed"""
+        response = self.client.post("/process", files={"file": ("report.txt", self.document("report", 2))})
+        
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(sorted(result["timings"]), ["classify", "extract", "summarize"])
+        self.assertEqual(result["text_length"], result["summary"]["original_length"])
+    
+    def test_unknown_stage_is_rejected(self):
+        """Unknown stages should fail the request with a 400 naming them"""
+        response = self.client.post(
+            "/process", files={"file": ("memo.txt", self.document("memo", 3))}, data={"stages": "extract,translate"}
+        )
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("translate", response.json()["detail"])
+    
+    def test_cached_stages_are_reused(self):
+        """Stages cached by the single-stage endpoints should not run again"""
+        files = {"file": ("invoice.txt", self.document("invoice", 4))}
+        classified = self.client.post("/classify", files=files)
+        
+        response = self.client.post("/process", files=files, data={"stages": "classify,extract"})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-Cache"], "classify=HIT, extract=MISS")
+        self.assertEqual(response.json()["classification"], classified.json()["classification"])
+
+class TestProcessStreamEndpoint(StubAPITestCase):
+    def stream(self, filename, content, stages="extract,classify,summarize"):
+        """Post a document to /process/stream and return its parsed events."""
+        with self.client.stream(
+            "POST", "/process/stream", files={"file": (filename, content)}, data={"stages": stages}
+        ) as response:
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+            lines = list(response.iter_lines())
+        return list(iter_server_sent_events(SimpleNamespace(iter_lines=lambda decode_unicode: iter(lines))))
+    
+    def test_event_order(self):
+        """Text should come first, each stage once and done last with every timing"""
+        content = self.document("report", 401, words=3000)
+        events = self.stream("report.txt", content)
+        names = [event for event, _ in events]
+        
+        self.assertEqual(names[:2], ["text_progress", "text"])
+        self.assertEqual(events[0][1], {"segments": 1, "characters": len(content.decode("utf-8"))})
+        self.assertEqual(events[1][1]["text_length"], len(content.split()))
+        self.assertEqual(names[-1], "done")
+        self.assertEqual(sorted(name for name in names[2:-1] if name != "summary_chunk"),
+                         ["classification", "entities", "summary"])
+        self.assertIn("summary_chunk", names)
+        self.assertLess(names.index("summary_chunk"), names.index("summary"))
+        
+        done = events[-1][1]
+        self.assertEqual(done["status"], "success")
+        self.assertEqual(sorted(done["timings"]), ["classify", "extract", "summarize"])
+        for event, data in events[2:-1]:
+            if event != "summary_chunk":
+                self.assertGreaterEqual(data["seconds"], 0)
+    
+    def test_stage_error_event(self):
+        """A failing stage should send an error event while the other stages finish"""
+        def fail(classifier, context):
+            raise RuntimeError("classifier crashed")
+        
+        with mock.patch.dict(STAGES, {"classify": ("classifier", {}, fail, "classification")}):
+            events = self.stream("memo.txt", self.document("memo", 402), stages="extract,classify")
+        
+        self.assertEqual(
+            [event for event, _ in events if event != "entities"], ["text_progress", "text", "error", "done"]
+        )
+        error = dict(events)["error"]
+        self.assertEqual(error["stage"], "classify")
+        self.assertIn("classifier crashed", error["detail"])
+        self.assertEqual(events[-1][1], {"status": "error", "timings": {"extract": mock.ANY}})
+    
+    def test_pdf_pages_report_progress(self):
+        """Pages of a PDF should be reported as they are extracted, before the text event"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "filing.pdf")
+            write_pdf(path, synthetic_text(2000, "report", 403), lines_per_page=10)
+            with open(path, "rb") as file:
+                content = file.read()
+            text = extract_text_from_pdf(path)
+        
+        with mock.patch("app.main.TEXT_PROGRESS_INTERVAL", 0):
+            events = self.stream("filing.pdf", content, stages="classify")
+        progress = [data for event, data in events if event == "text_progress"]
+        
+        self.assertGreater(len(progress), 1)
+        self.assertEqual([data["segments"] for data in progress], list(range(1, len(progress) + 1)))
+        self.assertEqual(progress[-1]["characters"], len(text))
+        self.assertEqual([event for event, _ in events[len(progress):]], ["text", "classification", "done"])
+    
+    def test_load_error_event(self):
+        """A document that cannot be read should send a load error and done"""
+        events = self.stream("broken.pdf", b"not a pdf", stages="extract")
+        
+        self.assertEqual([event for event, _ in events], ["error", "done"])
+        self.assertEqual(events[0][1]["stage"], "load")
+        self.assertEqual(events[1][1], {"status": "error", "timings": {}})
+
+class TestBatchEndpoint(StubAPITestCase):
+    def test_zip_archives_expand_to_one_line_per_document(self):
+        """Every document, including zip members, should get one NDJSON line"""
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zip_file:
+            zip_file.writestr("contracts/first.txt", self.document("contract", 101))
+            zip_file.writestr("contracts/second.txt", self.document("invoice", 102))
+            zip_file.writestr("contracts/", "")
+            zip_file.writestr("contracts/image.xyz", b"not a document")
+        
+        response = self.client.post("/process/batch", files=[
+            ("files", ("memo.txt", self.document("memo", 103))),
+            ("files", ("documents.zip", archive.getvalue()))
+        ])
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        results = {line["filename"]: line for line in lines}
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(
+            sorted(results), ["contracts/first.txt", "contracts/image.xyz", "contracts/second.txt", "memo.txt"]
+        )
+        for name in ("contracts/first.txt", "contracts/second.txt"):
+            self.assertEqual(results[name]["archive"], "documents.zip")
+            self.assertIn("entities", results[name])
+            self.assertIn("classification", results[name])
+            self.assertIn("summary", results[name])
+        self.assertNotIn("archive", results["memo.txt"])
+        self.assertIn("summary", results["memo.txt"])
+        
+        # An unsupported member fails on its own line without failing the batch
+        self.assertEqual(results["contracts/image.xyz"]["status"], "error")
+        self.assertIn("Unsupported file extension", results["contracts/image.xyz"]["detail"])
+    
+    def test_archive_limits(self):
+        """Archives with too many files should be rejected, oversized files fail without being decompressed"""
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr("small.txt", self.document("memo", 104, words=50))
+            zip_file.writestr("bomb.txt", b"0" * 200000)
+        files = [("files", ("documents.zip", archive.getvalue()))]
+        
+        with mock.patch.object(settings, "batch_max_archive_members", 1):
+            response = self.client.post("/process/batch", files=files)
+        self.assertEqual(response.status_code, 413)
+        self.assertIn("at most 1 allowed", response.json()["detail"])
+        
+        with mock.patch.object(settings, "batch_max_member_bytes", 100000), \
+                mock.patch("zipfile.ZipExtFile.read", autospec=True, side_effect=zipfile.ZipExtFile.read) as read:
+            response = self.client.post("/process/batch", files=files)
+        
+        self.assertEqual(response.status_code, 200)
+        results = {line["filename"]: line for line in map(json.loads, response.text.splitlines())}
+        self.assertEqual(results["bomb.txt"]["status"], "error")
+        self.assertIn("200000 bytes uncompressed", results["bomb.txt"]["detail"])
+        self.assertEqual(results["small.txt"]["status"], "success")
+        self.assertEqual(read.call_count, 1)
+    
+    def test_invalid_zip_is_rejected(self):
+        """A corrupt archive should fail the request with a 400"""
+        response = self.client.post("/process/batch", files=[("files", ("broken.zip", b"not a zip"))])
+        
+        self.assertEqual(response.status_code, 400)
+
+class TestJobsEndpoint(StubAPITestCase):
+    def test_unsafe_callback_urls_are_rejected(self):
+        """Callback URLs other than http(s), or on hosts that are not allowed, should get a 400"""
+        for callback_url in ["file:///etc/passwd", "ftp://hooks.example.com/done"]:
+            response = self.client.post(
+                "/jobs", files={"file": ("memo.txt", self.document("memo", 201))}, data={"callback_url": callback_url}
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("http or https", response.json()["detail"])
+        
+        with mock.patch.object(settings, "job_webhook_allowed_hosts", "hooks.example.com"):
+            response = self.client.post(
+                "/jobs", files={"file": ("memo.txt", self.document("memo", 201))},
+                data={"callback_url": "http://10.0.0.1/admin"}
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("not allowed", response.json()["detail"])
+        
+        # Without allowed hosts, hosts resolving to internal addresses are refused
+        for callback_url in ["http://127.0.0.1:8000/jobs", "http://169.254.169.254/latest/meta-data"]:
+            response = self.client.post(
+                "/jobs", files={"file": ("memo.txt", self.document("memo", 201))}, data={"callback_url": callback_url}
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("non-public", response.json()["detail"])
+    
+    def test_job_status_and_reprioritization(self):
+        """A job should report running during its first stage and take the classifier's priority after it"""
+        started, release = threading.Event(), threading.Event()
+        
+        def blocking_classify(classifier, context):
+            started.set()
+            release.wait(5)
+            return classify_text(classifier, context)
+        
+        def run_step(job_id, steps):
+            steps.append(asyncio.run(run_job_step(job_id)))
+        
+        with mock.patch("app.main.job_queue.submit") as submit:
+            response = self.client.post(
+                "/jobs", files={"file": ("memo.txt", self.document("memo", 202))}, data={"stages": "extract,classify"}
+            )
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["id"]
+        self.assertEqual(response.headers["Location"], f"/jobs/{job_id}")
+        self.assertEqual(submit.call_args[0][1][0], PRIORITY_RANKS["medium"])
+        self.assertEqual(self.client.get(f"/jobs/{job_id}").json()["status"], "queued")
+        
+        steps = []
+        with mock.patch.dict(STAGES, {"classify": ("classifier", {}, blocking_classify, "classification")}):
+            thread = threading.Thread(target=run_step, args=(job_id, steps))
+            thread.start()
+            try:
+                self.assertTrue(started.wait(5))
+                running = self.client.get(f"/jobs/{job_id}").json()
+            finally:
+                release.set()
+                thread.join()
+        self.assertEqual(running["status"], "running")
+        self.assertEqual(running["pending_stages"], ["classify", "extract"])
+        
+        job = self.client.get(f"/jobs/{job_id}").json()
+        priority = job["result"]["classification"]["priority"]
+        self.assertEqual(job["priority"], priority)
+        self.assertEqual(job["pending_stages"], ["extract"])
+        self.assertEqual(steps[0][0], PRIORITY_RANKS[priority])
+        
+        run_step(job_id, steps)
+        job = self.client.get(f"/jobs/{job_id}").json()
+        self.assertIsNone(steps[1])
+        self.assertEqual(job["status"], "completed")
+        self.assertEqual(sorted(job["result"]), ["classification", "entities"])
+        self.assertNotIn("source_path", job)
+
+if __name__ == "__main__":
+    unittest.main()
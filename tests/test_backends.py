@@ -0,0 +1,49 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import Settings
+from app.models.backends import (
+    backend_model_id, build_pipeline, entity_agreement, label_agreement, summary_agreement
+)
+from app.models.registry import create_model_registry
+
+class TestBackends(unittest.TestCase):
+    def test_backend_selection(self):
+        """Per-model backends should override the global backend and change model ids"""
+        settings = Settings(model_backend="quantized", classifier_backend="eager")
+        self.assertEqual(settings.backend_for("extractor"), "quantized")
+        self.assertEqual(settings.backend_for("classifier"), "eager")
+        
+        registry = create_model_registry(settings)
+        self.assertEqual(registry.model_id("classifier"), settings.classifier_model)
+        self.assertEqual(registry.model_id("summarizer"), backend_model_id(settings.summarizer_model, "quantized"))
+        self.assertTrue(registry.model_id("extractor").endswith("@quantized"))
+    
+    def test_unknown_backend(self):
+        """Unknown backends should be rejected before any model is loaded"""
+        with self.assertRaises(ValueError):
+            build_pipeline("summarization", "facebook/bart-large-cnn", "tensorrt")
+    
+    def test_agreement_metrics(self):
+        """Parity metrics should be 1.0 for identical outputs and drop with differences"""
+        entities = [
+            {"entity_group": "PER", "start": 0, "end": 10},
+            {"entity_group": "ORG", "start": 16, "end": 31}
+        ]
+        self.assertEqual(entity_agreement(entities, entities), 1.0)
+        self.assertEqual(entity_agreement(entities, entities[:1]), 2 / 3)
+        self.assertEqual(entity_agreement([], []), 1.0)
+        
+        self.assertEqual(label_agreement({"labels": ["invoice", "memo"]}, {"labels": ["invoice", "memo"]}), 1.0)
+        self.assertEqual(label_agreement({"labels": ["invoice", "memo"]}, {"labels": ["memo", "invoice"]}), 0.0)
+        
+        reference = [{"summary_text": "The contract was signed"}]
+        self.assertEqual(summary_agreement(reference, reference), 1.0)
+        self.assertEqual(summary_agreement(reference, [{"summary_text": "The invoice was paid"}]), 0.5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils.batching import MicroBatcher
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_concurrent_submissions_share_batches(self):
+        """Inputs from concurrent callers should be merged and returned in order"""
+        batches = []
+        
+        def batch_fn(items, suffix=""):
+            batches.append(list(items))
+            return [item.upper() + suffix for item in items]
+        
+        batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=50)
+        results = {}
+        
+        def submit(name, items):
+            results[name] = batcher.submit(items, suffix="!")
+        
+        threads = [
+            threading.Thread(target=submit, args=("first", ["ccc", "a"])),
+            threading.Thread(target=submit, args=("second", ["bb"]))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(results["first"], ["CCC!", "A!"])
+        self.assertEqual(results["second"], ["BB!"])
+        self.assertEqual(batches, [["a", "bb", "ccc"]])
+    
+    def test_different_kwargs_are_not_mixed(self):
+        """Inputs submitted with different keyword arguments need separate batches"""
+        batches = []
+        
+        def batch_fn(items, max_length=0):
+            batches.append((max_length, list(items)))
+            return items
+        
+        batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=1)
+        self.assertEqual(batcher.submit(["a", "b", "c"], max_length=10), ["a", "b", "c"])
+        self.assertEqual(batches, [(10, ["a", "b"]), (10, ["c"])])
+    
+    def test_results_are_reported_per_batch(self):
+        """on_result should see every result as its batch finishes, before submit_each returns"""
+        batcher = MicroBatcher(lambda items: [item.upper() for item in items], max_batch_size=2, max_wait_ms=1)
+        reported = []
+        
+        def on_result(index, result):
+            reported.append((index, result))
+            if index == 0:
+                raise RuntimeError("callback failure")
+        
+        results = batcher.submit_each(["a", "b", "c"], [{}] * 3, on_result)
+        
+        self.assertEqual(results, ["A", "B", "C"])
+        self.assertEqual(sorted(reported), [(0, "A"), (1, "B"), (2, "C")])
+    
+    def test_errors_propagate_to_callers(self):
+        """Exceptions raised by the batch function should reach the caller"""
+        def batch_fn(items):
+            raise ValueError("model failure")
+        
+        batcher = MicroBatcher(batch_fn, max_wait_ms=1)
+        with self.assertRaises(ValueError):
+            batcher.submit(["a"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.benchmark import compare_results, latency_stats, machine_info, machine_mismatches
+from app.core.config import Settings
+from app.models.registry import create_model_registry
+from app.models.stubs import stub_models
+from app.utils.document_loader import load_document
+from app.utils.synthetic import generate_corpus, synthetic_text
+
+class TestSyntheticCorpus(unittest.TestCase):
+    def test_corpus_is_reproducible_in_every_format(self):
+        """Every format should hold the same seeded text, readable by load_document"""
+        with tempfile.TemporaryDirectory() as directory:
+            corpus = generate_corpus(directory, ["small"], documents_per_size=1, seed=7)
+            texts = {document["format"]: load_document(document["path"])[0] for document in corpus}
+        
+        expected = synthetic_text(250, "invoice", 7)
+        self.assertEqual(sorted(texts), ["docx", "pdf", "txt"])
+        self.assertEqual(texts["txt"], expected)
+        self.assertEqual(texts["docx"].split(), expected.split())
+        self.assertEqual(texts["pdf"].split(), expected.split())
+        self.assertEqual(synthetic_text(250, "invoice", 7), expected)
+
+class TestBenchmarkStatistics(unittest.TestCase):
+    def test_latency_stats(self):
+        """Percentiles and throughput should be reported in milliseconds and calls per second"""
+        stats = latency_stats([0.01] * 98 + [0.5, 1.0], words=1000)
+        
+        self.assertEqual(stats["runs"], 100)
+        self.assertEqual(stats["p50_ms"], 10.0)
+        self.assertGreater(stats["p99_ms"], stats["p95_ms"])
+        self.assertAlmostEqual(stats["per_second"], 100 / 2.48, places=2)
+        self.assertAlmostEqual(stats["words_per_second"], 1000 / 2.48, places=0)
+    
+    def test_compare_results_flags_regressions(self):
+        """Only benchmarks slower than the tolerance allows should count as regressions"""
+        baseline = {"load/pdf/small": {"p50_ms": 10.0}, "load/txt/small": {"p50_ms": 1.0}}
+        results = {
+            "load/pdf/small": {"p50_ms": 15.0},
+            "load/txt/small": {"p50_ms": 1.1},
+            "load/docx/small": {"p50_ms": 5.0}
+        }
+        
+        comparison = {entry["benchmark"]: entry for entry in compare_results(results, baseline, tolerance=0.2)}
+        
+        self.assertEqual(sorted(comparison), ["load/pdf/small", "load/txt/small"])
+        self.assertTrue(comparison["load/pdf/small"]["regression"])
+        self.assertFalse(comparison["load/txt/small"]["regression"])
+    def test_round_medians(self):
+        """Every timed round should report its own p50 latency"""
+        stats = latency_stats([0.01, 0.02, 0.03, 0.02, 0.04, 0.06], rounds=2)
+        
+        self.assertEqual(stats["round_p50_ms"], [20.0, 40.0])
+        self.assertNotIn("round_p50_ms", latency_stats([0.01, 0.02]))
+    
+    def test_compare_results_ignores_overlapping_rounds(self):
+        """A slower p50 within the spread of the rounds should not count as a regression"""
+        baseline = {
+            "load/pdf/small": {"p50_ms": 10.0, "round_p50_ms": [9.0, 10.0, 14.0]},
+            "load/pdf/large": {"p50_ms": 100.0, "round_p50_ms": [98.0, 100.0, 103.0]}
+        }
+        results = {
+            "load/pdf/small": {"p50_ms": 15.0, "round_p50_ms": [12.0, 15.0, 16.0]},
+            "load/pdf/large": {"p50_ms": 140.0, "round_p50_ms": [130.0, 140.0, 150.0]}
+        }
+        
+        comparison = {entry["benchmark"]: entry for entry in compare_results(results, baseline, tolerance=0.2)}
+        
+        self.assertEqual(comparison["load/pdf/small"]["change"], 0.5)
+        self.assertFalse(comparison["load/pdf/small"]["regression"])
+        self.assertTrue(comparison["load/pdf/large"]["regression"])
+    
+    def test_machine_mismatches(self):
+        """Baselines from another machine or mode should be reported"""
+        meta = machine_info("stub")
+        
+        self.assertEqual(machine_mismatches(meta, dict(meta, commit="abc")), [])
+        self.assertEqual(
+            machine_mismatches(meta, dict(meta, cpu_count=-1, mode="real")),
+            ["mode: real != stub", f"cpu_count: -1 != {meta['cpu_count']}"]
+        )
+
+class TestStubModels(unittest.TestCase):
+    def test_models_run_offline(self):
+        """Every model class should run end to end around stub pipelines"""
+        text = synthetic_text(600, "contract")
+        with stub_models():
+            registry = create_model_registry(Settings(classifier_engine="nli", enabled_profiles="accurate"))
+            entities = registry.get("extractor").extract_key_information(text)
+            classification = registry.get("classifier").classify_document(text)
+            summary = registry.get("summarizer").generate_summary(text)
+        
+        self.assertTrue(entities["organizations"])
+        self.assertTrue(entities["monetary_values"])
+        self.assertIn(classification["document_type"], registry.get("classifier").document_types)
+        self.assertTrue(summary["summary"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils.cache import LRUCache, ResultCache, SQLiteCache, content_hash, make_cache_key
+
+class TestResultCache(unittest.TestCase):
+    def test_cache_key_depends_on_model_and_params(self):
+        """Keys should change with the model identity and parameters"""
+        document_hash = content_hash(b"document bytes")
+        key = make_cache_key(document_hash, "summarize", "model-a", {"max_length": 150})
+        
+        self.assertEqual(key, make_cache_key(document_hash, "summarize", "model-a", {"max_length": 150}))
+        self.assertNotEqual(key, make_cache_key(document_hash, "summarize", "model-b", {"max_length": 150}))
+        self.assertNotEqual(key, make_cache_key(document_hash, "summarize", "model-a", {"max_length": 60}))
+    
+    def test_lru_eviction_by_entries_and_size(self):
+        """The memory tier should evict least recently used entries"""
+        cache = LRUCache(max_entries=2, max_bytes=10)
+        cache.set("a", "1111")
+        cache.set("b", "2222")
+        cache.get("a")
+        cache.set("c", "3333")
+        
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        
+        cache.set("d", "44444444")
+        self.assertEqual(len(cache), 1)
+        self.assertIsNotNone(cache.get("d"))
+    
+    def test_disk_tier_survives_new_memory_tier(self):
+        """Results stored on disk should be served after the memory tier is lost"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "cache.db")
+            cache = ResultCache(LRUCache(), SQLiteCache(db_path))
+            
+            result, hit = cache.get_or_compute("key", lambda: {"summary": "text"})
+            self.assertFalse(hit)
+            
+            restarted = ResultCache(LRUCache(), SQLiteCache(db_path))
+            result, hit = restarted.get_or_compute("key", lambda: {"summary": "other"})
+            self.assertTrue(hit)
+            self.assertEqual(result, {"summary": "text"})
+
+if __name__ == "__main__":
+    unittest.main()
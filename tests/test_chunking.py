@@ -0,0 +1,40 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils.chunking import owned_ranges, token_windows
+
+class TestTokenWindows(unittest.TestCase):
+    def test_windows_align_to_sentences(self):
+        """Windows should be cut at the last sentence boundary that fits"""
+        windows = token_windows(25, [0, 4, 8, 12, 16, 20], max_tokens=10, stride=3)
+        
+        self.assertEqual(windows, [(0, 8), (8, 16), (16, 25)])
+    
+    def test_overlap_uses_whole_sentences_within_stride(self):
+        """Consecutive windows should share the sentences that fit in the stride"""
+        windows = token_windows(30, [0, 8, 9, 18, 19, 27], max_tokens=10, stride=2)
+        
+        # The one-token sentence starting at 8 fits in the stride, the
+        # nine-token sentence starting at 9 does not
+        self.assertEqual(windows, [(0, 9), (8, 18), (18, 27), (27, 30)])
+    
+    def test_long_sentence_is_split_with_stride(self):
+        """A sentence longer than the window should be split with token overlap"""
+        windows = token_windows(25, [0], max_tokens=10, stride=3)
+        
+        self.assertEqual(windows, [(0, 10), (7, 17), (14, 24), (21, 25)])
+    
+    def test_owned_ranges_split_overlaps_at_midpoint(self):
+        """Every position should belong to exactly one window"""
+        ranges = owned_ranges([(0, 10), (8, 20), (20, 30)])
+        
+        self.assertEqual(ranges[0][1], 9)
+        self.assertEqual(ranges[1], (9, 20))
+        self.assertEqual(ranges[2][0], 20)
+
+if __name__ == "__main__":
+    unittest.main()
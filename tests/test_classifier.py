@@ -0,0 +1,75 @@
+import contextlib
+import re
+import sys
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.classifier import DocumentClassifier
+from app.models.stubs import stub_models
+
+class TestDocumentClassifier(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Stub pipelines, so the label scoring runs without downloading a model
+        cls.stubs = contextlib.ExitStack()
+        cls.stubs.enter_context(stub_models())
+        cls.classifier = DocumentClassifier()
+        
+        cls.email_text = """
+        From: john.smith@example.com
+        To: jane.doe@company.com
+        Subject: Urgent: Meeting Tomorrow
+        
+        Hi Jane, please bring the quarterly results to our meeting tomorrow at 10:00 AM.
+        
+        Best regards,
+        John Smith
+        """
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.stubs.close()
+    
+    def test_single_pass_matches_separate_passes(self):
+        """Single-pass classification should match the two pipeline calls"""
+        combined = self.classifier.classify_document(self.email_text, single_pass=True)
+        separate = self.classifier.classify_document(self.email_text, single_pass=False)
+        
+        self.assertEqual(combined.keys(), separate.keys())
+        self.assertEqual(combined["document_type"], separate["document_type"])
+        self.assertEqual(combined["priority"], separate["priority"])
+        self.assertEqual(combined["urgency_indicators"], separate["urgency_indicators"])
+        self.assertAlmostEqual(combined["type_confidence"], separate["type_confidence"], places=4)
+        self.assertAlmostEqual(combined["priority_confidence"], separate["priority_confidence"], places=4)
+        
+        for combined_type, separate_type in zip(combined["all_types"], separate["all_types"]):
+            self.assertEqual(combined_type["type"], separate_type["type"])
+            self.assertAlmostEqual(combined_type["score"], separate_type["score"], places=4)
+    
+    def test_urgency_cues_match_keyword_checks(self):
+        """Urgency and deadline flags should match plain keyword checks over the text"""
+        texts = [
+            self.email_text,
+            "Escalations go to critical-alerts@corp.com.",
+            "The deadlines for invoice #4411 are listed below.",
+            "Payment is due by 12/31/2023, call 555-123-4567.",
+            "Quarterly results are attached for information."
+        ]
+        scores = {"labels": ["low", "medium", "high", "urgent"], "scores": [0.4, 0.3, 0.2, 0.1]}
+        for text in texts:
+            result = self.classifier._priority_result(text, scores)
+            lower = text.lower()
+            explicit = any(
+                term in lower for term in ["urgent", "asap", "immediately", "emergency", "deadline", "critical"]
+            )
+            deadline = bool(re.search(r"\b(today|tomorrow|next week|due by|due date|deadline)\b", lower))
+            
+            self.assertEqual(result["contains_explicit_urgency"], explicit, text)
+            self.assertEqual(result["contains_deadline"], deadline, text)
+            self.assertEqual(result["priority"], "high" if explicit else "low", text)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from pydantic import ValidationError
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import Settings
+from app.models.registry import create_model_registry
+
+class TestSettings(unittest.TestCase):
+    def test_env_file_and_environment(self):
+        """Values should come from the .env file, with environment variables taking precedence"""
+        with tempfile.TemporaryDirectory() as directory:
+            env_file = os.path.join(directory, ".env")
+            with open(env_file, "w") as file:
+                file.write("SUMMARY_CHUNK_WORDS=800\nSERVER_WORKERS=4\nTORCH_NUM_THREADS=2\n")
+            
+            with mock.patch.dict(os.environ, {"ENV_FILE": env_file, "SERVER_WORKERS": "2"}):
+                settings = Settings.from_env()
+        
+        self.assertEqual(settings.summary_chunk_words, 800)
+        self.assertEqual(settings.server_workers, 2)
+        self.assertEqual(settings.torch_num_threads, 2)
+        self.assertEqual(settings.classifier_sample_words, 1024)
+    
+    def test_unknown_classifier_engine_is_rejected(self):
+        """An invalid CLASSIFIER_ENGINE should fail instead of falling back to nli"""
+        self.assertEqual(Settings(classifier_engine="embedding").classifier_engine, "embedding")
+        with self.assertRaises(ValidationError):
+            Settings(classifier_engine="embeddings")
+        with mock.patch.dict(os.environ, {"CLASSIFIER_ENGINE": "bert"}), self.assertRaises(ValidationError):
+            Settings.from_env(env_file=os.devnull)
+    
+    def test_per_model_workers(self):
+        """Models without their own worker count should use inference_workers"""
+        settings = Settings(inference_workers=3, summarizer_workers=1)
+        
+        self.assertEqual(settings.workers_for("summarizer"), 1)
+        self.assertEqual(settings.workers_for("extractor"), 3)
+    
+    def test_input_limits_are_part_of_model_ids(self):
+        """Changed input limits should give new model ids, so cached results are not reused"""
+        default = create_model_registry(Settings(enabled_profiles="accurate"))
+        tuned = create_model_registry(Settings(
+            enabled_profiles="accurate", ner_max_length=256, classifier_sample_words=512, summary_chunk_words=800
+        ))
+        pieces = create_model_registry(Settings(enabled_profiles="fast,accurate", spacy_max_piece_chars=2000))
+        
+        for name in ("extractor", "classifier", "summarizer"):
+            self.assertNotEqual(default.model_id(name), tuned.model_id(name))
+        self.assertEqual(default.model_id("summarizer"), "facebook/bart-large-cnn")
+        self.assertNotEqual(pieces.model_id("extractor"), default.model_id("extractor"))
+        self.assertIn("/piece2000", pieces.model_id("extractor", "fast"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils.document_context import DocumentContext
+
+class TestDocumentContext(unittest.TestCase):
+    def setUp(self):
+        self.text = "Invoice  #42\nTotal due:\t$1,200 by Friday."
+        self.context = DocumentContext(self.text)
+    
+    def test_words_and_spans(self):
+        """Word splits and spans should match str.split on the original text"""
+        self.assertEqual(self.context.words, self.text.split())
+        self.assertEqual(self.context.word_count, 7)
+        self.assertEqual(
+            [self.text[start:end] for start, end in self.context.word_spans],
+            self.text.split()
+        )
+        self.assertEqual(self.context.leading_words(3), "Invoice #42 Total")
+    
+    def test_values_are_memoized(self):
+        """Cached values should only be computed once per context"""
+        calls = []
+        
+        def compute():
+            calls.append(1)
+            return "value"
+        
+        self.assertEqual(self.context.cached("key", compute), "value")
+        self.assertEqual(self.context.cached("key", compute), "value")
+        self.assertEqual(len(calls), 1)
+        self.assertIs(DocumentContext.of(self.context), self.context)
+    
+    def test_contexts_compute_independently(self):
+        """Computing a value for one document should not block other documents"""
+        release = threading.Event()
+        started = threading.Event()
+        
+        def split(text):
+            if text.startswith("Slow"):
+                started.set()
+                release.wait(5)
+            return text.split(". ")
+        
+        slow = DocumentContext("Slow document. Second sentence.")
+        with mock.patch("app.utils.document_context.sent_tokenize", split), \
+                mock.patch("app.utils.document_context.ensure_punkt", lambda: None):
+            thread = threading.Thread(target=lambda: slow.sentences)
+            thread.start()
+            started.wait(5)
+            try:
+                sentences = DocumentContext("Fast document. Done.").sentences
+                blocked = thread.is_alive()
+            finally:
+                release.set()
+                thread.join()
+        
+        self.assertEqual(sentences, ["Fast document", "Done."])
+        self.assertTrue(blocked)
+        self.assertEqual(slow.sentences, ["Slow document", "Second sentence."])
+    def test_concurrent_readers_compute_once(self):
+        """Readers of one context racing for a value should share a single computation"""
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+        
+        def split(text):
+            calls.append(text)
+            started.set()
+            release.wait(5)
+            return text.split(". ")
+        
+        results = []
+        with mock.patch("app.utils.document_context.sent_tokenize", split), \
+                mock.patch("app.utils.document_context.ensure_punkt", lambda: None):
+            threads = [
+                threading.Thread(target=lambda: results.append(self.context.sentences)) for _ in range(3)
+            ]
+            for thread in threads:
+                thread.start()
+            # Let every reader reach the cache before the first computation finishes
+            started.wait(5)
+            time.sleep(0.1)
+            release.set()
+            for thread in threads:
+                thread.join()
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(result is results[0] for result in results))
+
+if __name__ == "__main__":
+    unittest.main()
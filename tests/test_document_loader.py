@@ -0,0 +1,53 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import docx
+
+from app.utils.document_loader import iter_document_text, load_document
+
+class TestDocumentLoader(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_docx_streams_paragraphs(self):
+        """DOCX text should be yielded paragraph by paragraph"""
+        path = os.path.join(self.tmp_dir.name, "memo.docx")
+        document = docx.Document()
+        document.add_paragraph("First paragraph.")
+        document.add_paragraph("Second paragraph.")
+        document.save(path)
+        
+        segments = list(iter_document_text(path))
+        text, extension = load_document(path)
+        
+        self.assertEqual(segments, ["First paragraph.\n", "Second paragraph.\n"])
+        self.assertEqual(text, "".join(segments))
+        self.assertEqual(extension, ".docx")
+    
+    def test_file_like_source(self):
+        """Loaders should read binary file-like objects without closing them"""
+        source = io.BytesIO("Caf\u00e9 invoice total: $120".encode("utf-8"))
+        
+        text, extension = load_document(source, ".TXT")
+        
+        self.assertEqual(text, "Caf\u00e9 invoice total: $120")
+        self.assertEqual(extension, ".txt")
+        self.assertFalse(source.closed)
+    
+    def test_unsupported_extension(self):
+        """Unsupported file types should raise ValueError"""
+        with self.assertRaises(ValueError):
+            load_document(os.path.join(self.tmp_dir.name, "image.png"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import string
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import torch
+from transformers import BertConfig, BertModel, BertTokenizerFast
+
+from app.models.embedding_classifier import EmbeddingClassifier
+
+class StubNLIClassifier:
+    """Records the label groups it is asked to re-score."""
+    
+    def __init__(self):
+        self.groups = []
+    
+    def _score_label_groups(self, text_sample, label_groups):
+        self.groups.extend(label_groups)
+        return [{"labels": list(labels), "scores": [1.0] + [0.0] * (len(labels) - 1)} for labels, _ in label_groups]
+
+class TestEmbeddingClassifier(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # A tiny randomly initialised encoder, so the test runs without downloads
+        cls.tmp = tempfile.TemporaryDirectory()
+        vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + list(string.ascii_lowercase + string.digits + ".,$")
+        vocab_path = Path(cls.tmp.name) / "vocab.txt"
+        vocab_path.write_text("\n".join(vocab))
+        BertTokenizerFast(str(vocab_path), model_max_length=64).save_pretrained(cls.tmp.name)
+        torch.manual_seed(0)
+        config = BertConfig(
+            vocab_size=len(vocab), hidden_size=16, num_hidden_layers=1,
+            num_attention_heads=2, intermediate_size=32, max_position_embeddings=64
+        )
+        BertModel(config).save_pretrained(cls.tmp.name)
+        
+        cls.document_types = [f"type_{i}" for i in range(40)]
+        cls.text = "Invoice 42 for consulting services is due by Friday. " * 50
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+    
+    def test_label_embeddings_are_cached(self):
+        """Label prototypes should be embedded once, later documents only embed themselves"""
+        classifier = EmbeddingClassifier(self.tmp.name, document_types=self.document_types)
+        embedded = []
+        embed_batch = classifier._embed_batch
+        classifier.embed_batcher.batch_fn = lambda texts: embedded.append(len(texts)) or embed_batch(texts)
+        
+        result = classifier.classify_document(self.text)
+        first_call = sum(embedded)
+        embedded.clear()
+        classifier.classify_document(self.text)
+        
+        self.assertEqual(result["engine"], "embedding")
+        self.assertIn(result["document_type"], self.document_types)
+        self.assertEqual(len(result["all_types"]), 40)
+        self.assertAlmostEqual(sum(entry["score"] for entry in result["all_types"]), 1.0, places=5)
+        self.assertIn(result["priority"], ["urgent", "high", "medium", "low"])
+        # Only the document windows are embedded once the labels are cached
+        self.assertLess(sum(embedded), first_call - 40)
+    
+    def test_low_confidence_escalates_to_nli(self):
+        """Uncertain results should be re-scored by the NLI classifier over the top labels"""
+        fallback = StubNLIClassifier()
+        classifier = EmbeddingClassifier(
+            self.tmp.name,
+            document_types=self.document_types,
+            fallback_factory=lambda: fallback,
+            escalation_threshold=1.1,
+            escalation_top_k=3
+        )
+        
+        result = classifier.classify_document(self.text)
+        
+        self.assertEqual(result["engine"], "nli")
+        self.assertEqual(len(fallback.groups[0][0]), 3)
+        self.assertEqual(result["document_type"], fallback.groups[0][0][0])
+        self.assertEqual(result["type_confidence"], 1.0)
+        self.assertEqual(len(result["all_types"]), 40)
+    
+    def test_concurrent_documents_share_the_tokenizer(self):
+        """Windows built on request threads should not race the batcher thread's tokenizer"""
+        classifier = EmbeddingClassifier(self.tmp.name, document_types=self.document_types, max_batch_wait_ms=0)
+        texts = [f"Invoice {i} for consulting services is due by Friday. " * (20 + i) for i in range(4)]
+        errors = []
+        
+        def embed(text):
+            try:
+                for _ in range(10):
+                    classifier.embed_document(text)
+            except Exception as error:
+                errors.append(error)
+        
+        threads = [threading.Thread(target=embed, args=(text,)) for text in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(errors, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.entities import CATEGORIES, Entity, merge_entities
+
+class TestMergeEntities(unittest.TestCase):
+    def test_spacy_entities_are_categorized(self):
+        """spaCy entities should be kept and sorted into categories"""
+        result = merge_entities(
+            [
+                Entity("John Smith", "PERSON", 0, 10),
+                Entity("$5,000", "MONEY", 20, 26),
+                Entity("Paris", "GPE", 30, 35),
+                Entity("12 months", "DATE", 40, 49),
+                Entity("first", "ORDINAL", 50, 55)
+            ],
+            []
+        )
+        
+        self.assertEqual(list(result), CATEGORIES)
+        self.assertEqual(result["people"], [{"text": "John Smith", "label": "PERSON", "start": 0, "end": 10}])
+        self.assertEqual(result["monetary_values"][0]["text"], "$5,000")
+        self.assertEqual(result["locations"][0]["text"], "Paris")
+        self.assertEqual(result["dates"][0]["text"], "12 months")
+        self.assertEqual(result["other_entities"][0]["label"], "ORDINAL")
+    
+    def test_transformer_duplicates_are_dropped(self):
+        """Transformer entities matching spaCy text or spans should not be added twice"""
+        result = merge_entities(
+            [Entity("ABC Corporation", "ORG", 10, 25)],
+            [
+                Entity("abc  corporation", "ORG", 100, 115),
+                Entity("ABC", "ORG", 10, 13),
+                Entity("XYZ Ltd", "ORG", 40, 47),
+                Entity("XYZ Ltd", "ORG", 200, 207),
+                Entity("Jane Doe", "PER", 60, 68),
+                Entity("misc", "MISC", 70, 74)
+            ]
+        )
+        
+        self.assertEqual(
+            [entity["text"] for entity in result["organizations"]],
+            ["ABC Corporation", "XYZ Ltd"]
+        )
+        self.assertEqual(
+            result["organizations"][1],
+            {"text": "XYZ Ltd", "label": "ORG", "start": 40, "end": 47, "source": "transformer"}
+        )
+        self.assertEqual(result["people"][0]["label"], "PERSON")
+        self.assertEqual(result["other_entities"], [])
+    
+    def test_pattern_entities_fill_missing_fields(self):
+        """Pattern fields should only be added where spaCy did not already find them"""
+        result = merge_entities(
+            [Entity("$5,000 per month", "MONEY", 20, 36)],
+            [],
+            [
+                Entity("$5,000", "MONEY", 20, 26, "pattern"),
+                Entity("$700", "MONEY", 50, 54, "pattern"),
+                Entity("a@b.com", "EMAIL", 60, 67, "pattern"),
+                Entity("tomorrow", "DEADLINE", 70, 78, "pattern")
+            ]
+        )
+        
+        self.assertEqual([e["text"] for e in result["monetary_values"]], ["$5,000 per month", "$700"])
+        self.assertEqual(result["emails"], [{"text": "a@b.com", "label": "EMAIL", "start": 60, "end": 67, "source": "pattern"}])
+        self.assertEqual(result["other_entities"], [])
+
+if __name__ == "__main__":
+    unittest.main()
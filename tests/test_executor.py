@@ -0,0 +1,42 @@
+import asyncio
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils.executor import InferenceExecutor, InferenceQueueFullError, InferenceTimeoutError
+
+class TestInferenceExecutor(unittest.IsolatedAsyncioTestCase):
+    async def test_rejects_work_beyond_queue_limit(self):
+        """Calls beyond workers + queue depth should be rejected immediately"""
+        executor = InferenceExecutor(max_workers=1, max_queue=1)
+        release = threading.Event()
+        
+        running = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        
+        with self.assertRaises(InferenceQueueFullError):
+            await executor.run(lambda: None)
+        
+        release.set()
+        self.assertEqual(await asyncio.gather(running, queued), [True, True])
+        self.assertEqual(executor.pending, 0)
+        executor.shutdown()
+    
+    async def test_timeout(self):
+        """Calls exceeding the timeout should raise InferenceTimeoutError"""
+        executor = InferenceExecutor(max_workers=1, max_queue=0, timeout=0.05)
+        release = threading.Event()
+        
+        with self.assertRaises(InferenceTimeoutError):
+            await executor.run(release.wait)
+        
+        release.set()
+        executor.shutdown()
+
+if __name__ == "__main__":
+    unittest.main()
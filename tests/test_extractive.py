@@ -0,0 +1,69 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from app.utils import extractive
+from app.utils.extractive import (
+    centroid_scores, cosine_similarities, select_sentences, textrank_scores, tfidf_vectors
+)
+
+class TestExtractive(unittest.TestCase):
+    def setUp(self):
+        self.sentences = [
+            "The company reported quarterly revenue growth of twelve percent.",
+            "Revenue growth came from the new product line and higher sales.",
+            "The office kitchen will be cleaned on Friday.",
+            "Sales of the new product line drove quarterly revenue.",
+            "Parking permits expire next month."
+        ]
+    
+    def test_central_sentences_rank_first(self):
+        """Sentences sharing terms with the rest of the document should outrank unrelated ones"""
+        for scores in (textrank_scores(self.sentences), centroid_scores(self.sentences)):
+            top = set(np.argsort(-scores)[:3])
+            self.assertEqual(top, {0, 1, 3})
+        self.assertAlmostEqual(textrank_scores(self.sentences).sum(), 1.0, places=6)
+    
+    def test_sparse_similarities_match_dense_product(self):
+        """Posting-list and dense products should give the same similarities, whatever the split"""
+        sentences = self.sentences * 3
+        rows, cols, weights, n_terms = tfidf_vectors(sentences)
+        vectors = np.zeros((len(sentences), n_terms))
+        vectors[rows, cols] = weights
+        
+        for dense_document_frequency in (0, 3, 100):
+            np.testing.assert_allclose(
+                cosine_similarities(rows, cols, weights, n_terms, len(sentences), dense_document_frequency),
+                vectors @ vectors.T, atol=1e-12
+            )
+        self.assertEqual(cosine_similarities(*tfidf_vectors(["", "?"]), 2).tolist(), [[0.0, 0.0], [0.0, 0.0]])
+    
+    def test_selection_fits_budget_in_document_order(self):
+        """Selected sentences should fit the word budget and keep their original order"""
+        selected = select_sentences(self.sentences, max_words=20)
+        
+        self.assertLessEqual(sum(len(sentence.split()) for sentence in selected), 20)
+        self.assertEqual(selected, [s for s in self.sentences if s in selected])
+        # The best sentence is kept even when it exceeds the budget on its own
+        self.assertEqual(len(select_sentences(self.sentences, max_words=1)), 1)
+        self.assertEqual(select_sentences([], max_words=10), [])
+    
+    def test_long_documents_use_centroid_scores(self):
+        """Documents with too many sentences for TextRank should fall back to centroid scoring"""
+        sentences = self.sentences * 3
+        original = extractive.MAX_TEXTRANK_SENTENCES
+        extractive.MAX_TEXTRANK_SENTENCES = 10
+        try:
+            scores = extractive.score_sentences(sentences)
+        finally:
+            extractive.MAX_TEXTRANK_SENTENCES = original
+        
+        np.testing.assert_allclose(scores, centroid_scores(sentences))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import spacy
+
+from app.models.extractor import EntityExtractor
+from app.models.stubs import stub_models
+from app.utils.document_context import DocumentContext
+from app.utils.synthetic import synthetic_text
+
+class TestEntityExtractor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # A small rule-based pipeline, so the test runs without downloading a model
+        cls.tmp = tempfile.TemporaryDirectory()
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        ruler = nlp.add_pipe("entity_ruler")
+        ruler.add_patterns([
+            {"label": "ORG", "pattern": "Acme Corporation"},
+            {"label": "GPE", "pattern": "Chicago"}
+        ])
+        nlp.to_disk(cls.tmp.name)
+        
+        cls.extractor = EntityExtractor(cls.tmp.name, ner_model=None, spacy_max_piece_chars=120)
+        
+        cls.sentences = [
+            f"Acme Corporation opened office number {i} in Chicago last week." for i in range(20)
+        ]
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+    
+    def make_context(self, sentences):
+        context = DocumentContext(" ".join(sentences))
+        # Sentences as NLTK would split them, so the test does not need the punkt data
+        context.sentences = sentences
+        return context
+    
+    def test_unneeded_components_are_disabled(self):
+        """Only the components producing entities should run"""
+        self.assertEqual(self.extractor.nlp.pipe_names, ["entity_ruler"])
+        self.assertIn("sentencizer", self.extractor.nlp.disabled)
+    
+    def test_pieces_are_sentence_aligned_and_bounded(self):
+        """Pieces should cover whole sentences and never exceed the piece size"""
+        context = self.make_context(self.sentences)
+        pieces = self.extractor.spacy_pieces(context)
+        
+        self.assertGreater(len(pieces), 1)
+        self.assertTrue(all(end - start <= 120 for start, end in pieces))
+        sentence_starts = {start for start, _ in context.sentence_spans}
+        self.assertTrue(all(start in sentence_starts for start, _ in pieces))
+        
+        # A sentence longer than a piece is cut at whitespace
+        long_sentence = " ".join(["word"] * 100)
+        pieces = self.extractor.spacy_pieces(self.make_context([long_sentence]))
+        self.assertTrue(all(end - start <= 120 for start, end in pieces))
+        self.assertTrue(all(long_sentence[end] == " " for _, end in pieces[:-1]))
+    
+    def test_entity_offsets_map_to_full_text(self):
+        """Entities found in pieces should point at their position in the whole document"""
+        context = self.make_context(self.sentences)
+        entities = self.extractor.extract_entities_spacy(context)
+        
+        self.assertEqual(len(entities), 40)
+        for entity in entities:
+            self.assertEqual(context.text[entity["start"]:entity["end"]], entity["text"])
+
+class TestTransformerNER(unittest.TestCase):
+    def test_concurrent_requests_share_the_pipeline(self):
+        """Windows built on request threads should not race the batcher thread's tokenizer"""
+        with stub_models():
+            extractor = EntityExtractor(ner_model="stub-ner", max_batch_wait_ms=0)
+        texts = [synthetic_text(400, "contract", seed) for seed in range(4)]
+        errors = []
+        
+        def extract(text):
+            try:
+                for _ in range(10):
+                    extractor.extract_entities_transformer(DocumentContext(text))
+            except Exception as error:
+                errors.append(error)
+        
+        with stub_models():
+            threads = [threading.Thread(target=extract, args=(text,)) for text in texts]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            entities = extractor.extract_entities_transformer(texts[0])
+        
+        self.assertEqual(errors, [])
+        self.assertTrue(entities)
+        self.assertTrue(all(texts[0][e["start"]:e["end"]] == e["word"] for e in entities))
+
+if __name__ == "__main__":
+    unittest.main()
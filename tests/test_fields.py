@@ -0,0 +1,73 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.fields import extract_fields, scan_fields
+
+class TestFieldScanner(unittest.TestCase):
+    def setUp(self):
+        self.text = (
+            "Invoice No. INV-2041 dated 2023-03-01 totals $12,400.50 (EUR 3.2 million), "
+            "due by March 3, 2024. Contact billing@northwind.com or +1 (555) 123-4567. "
+            "A 2.5% discount applies until 12/31/2023. URGENT: please reply asap."
+        )
+    
+    def test_fields_are_found_in_one_scan(self):
+        """Every business field should be found with its label and exact offsets"""
+        fields = scan_fields(self.text)
+        
+        self.assertEqual(
+            [(field.label, field.text) for field in fields],
+            [
+                ("INVOICE_NUMBER", "INV-2041"),
+                ("DATE", "2023-03-01"),
+                ("MONEY", "$12,400.50"),
+                ("MONEY", "EUR 3.2 million"),
+                ("DEADLINE", "due by"),
+                ("DATE", "March 3, 2024"),
+                ("EMAIL", "billing@northwind.com"),
+                ("PHONE", "+1 (555) 123-4567"),
+                ("PERCENT", "2.5%"),
+                ("DATE", "12/31/2023"),
+                ("URGENCY", "URGENT"),
+                ("URGENCY", "asap")
+            ]
+        )
+        for field in fields:
+            self.assertEqual(self.text[field.start:field.end], field.text)
+    
+    def test_fields_fill_entity_categories(self):
+        """Pattern fields should land in the extract_key_information categories, without priority cues"""
+        result = extract_fields(self.text)
+        
+        self.assertEqual([e["text"] for e in result["monetary_values"]], ["$12,400.50", "EUR 3.2 million"])
+        self.assertEqual([e["text"] for e in result["invoice_numbers"]], ["INV-2041"])
+        self.assertEqual([e["text"] for e in result["phone_numbers"]], ["+1 (555) 123-4567"])
+        self.assertEqual(len(result["dates"]), 3)
+        self.assertEqual(result["emails"][0]["source"], "pattern")
+        self.assertEqual(result["other_entities"], [])
+    
+    def test_number_runs_are_not_fields(self):
+        """Plain runs of numbers and version-like numbers should not be phones, invoices or dates"""
+        for text in ["100 200 300", "2021 2022 2023", "12 345 678", "inv 2023 budget", "release 1.2.33"]:
+            self.assertEqual(scan_fields(text), [], text)
+        
+        for phone in ["+44 20 7946 0958", "(555) 123-4567", "555-123-4567", "555.123.4567"]:
+            self.assertEqual([(f.label, f.text) for f in scan_fields(phone)], [("PHONE", phone)])
+        self.assertEqual([f.text for f in scan_fields("Invoice #4411 and INV-77")], ["4411", "INV-77"])
+        self.assertEqual([f.text for f in scan_fields("Due 31.12.2023")], ["31.12.2023"])
+    
+    def test_priority_cues_overlap_fields(self):
+        """Priority cues inside business fields should still be found"""
+        fields = scan_fields("Send the report to critical-alerts@corp.com before the deadlines")
+        
+        self.assertEqual(
+            [(field.label, field.text) for field in fields],
+            [("EMAIL", "critical-alerts@corp.com"), ("URGENCY", "critical"), ("URGENCY", "deadline")]
+        )
+
+if __name__ == "__main__":
+    unittest.main()
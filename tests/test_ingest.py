@@ -0,0 +1,129 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from app.ingest import Checkpoint, JSONLWriter, ParquetWriter, extract_document, iter_input_files
+
+class TestIngest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, "sub"))
+        for name in ["a.txt", "sub/b.TXT", "sub/c.png"]:
+            with open(os.path.join(self.root, name), "w") as file:
+                file.write("Invoice 42 is due.")
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_iter_input_files_walks_directories(self):
+        """Directories should be walked recursively, keeping supported documents only"""
+        list_path = os.path.join(self.root, "documents.lst")
+        with open(list_path, "w") as file:
+            file.write(os.path.join(self.root, "a.txt") + "\n\n")
+        
+        self.assertEqual(
+            list(iter_input_files([self.root])),
+            [os.path.join(self.root, "a.txt"), os.path.join(self.root, "sub", "b.TXT")]
+        )
+        self.assertEqual(list(iter_input_files([], list_path)), [os.path.join(self.root, "a.txt")])
+    
+    def test_extract_document(self):
+        """Extraction failures should be reported instead of raised"""
+        extracted = extract_document(os.path.join(self.root, "a.txt"))
+        self.assertEqual(extracted["text"], "Invoice 42 is due.")
+        self.assertEqual(extracted["pages"], 1)
+        
+        self.assertIn("error", extract_document(os.path.join(self.root, "missing.pdf")))
+    
+    def test_checkpoint_resumes_successful_documents(self):
+        """Only successfully written documents should be skipped when resuming"""
+        output = os.path.join(self.root, "out.jsonl")
+        checkpoint = Checkpoint(output + ".checkpoint")
+        writer = JSONLWriter(output)
+        checkpoint.mark(writer.write({"path": "a.txt", "status": "success"}))
+        checkpoint.mark(writer.write({"path": "b.txt", "status": "error", "detail": "boom"}))
+        checkpoint.mark(writer.close())
+        checkpoint.close()
+        
+        self.assertEqual(Checkpoint(output + ".checkpoint").done, {"a.txt"})
+        with open(output) as file:
+            self.assertEqual([json.loads(line)["path"] for line in file], ["a.txt", "b.txt"])
+    
+    def test_resumed_output_keeps_one_record_per_document(self):
+        """Failed, repeated and partly written records of an earlier run should be dropped"""
+        output = os.path.join(self.root, "out.jsonl")
+        with open(output, "w") as file:
+            file.write(json.dumps({"path": "a.txt", "status": "success"}) + "\n")
+            file.write(json.dumps({"path": "b.txt", "status": "error", "detail": "boom"}) + "\n")
+            file.write(json.dumps({"path": "a.txt", "status": "success"}) + "\n")
+            file.write(json.dumps({"path": "c.txt", "status": "success"}))
+            file.write('\n{"path": "d.txt", "sta')
+        
+        writer = JSONLWriter(output)
+        writer.write({"path": "b.txt", "status": "success"})
+        writer.close()
+        
+        self.assertEqual(writer.recovered, ["a.txt", "c.txt"])
+        with open(output) as file:
+            self.assertEqual([json.loads(line)["path"] for line in file], ["a.txt", "c.txt", "b.txt"])
+    
+    @unittest.skipIf(pyarrow is None, "Parquet output requires pyarrow")
+    def test_resumed_parquet_parts_keep_successful_records(self):
+        """Parquet parts of an earlier run should be compacted like JSONL output"""
+        output = os.path.join(self.root, "out.parquet")
+        writer = ParquetWriter(output, rows_per_part=2)
+        writer.write({"path": "a.txt", "status": "success", "entities": {"dates": []}})
+        writer.write({"path": "b.txt", "status": "error", "detail": "boom"})
+        writer.close()
+        
+        resumed = ParquetWriter(output, rows_per_part=2)
+        resumed.write({"path": "b.txt", "status": "success"})
+        resumed.close()
+        
+        paths = pyarrow.parquet.read_table(output).column("path").to_pylist()
+        self.assertEqual(resumed.recovered, ["a.txt"])
+        self.assertEqual(sorted(paths), ["a.txt", "b.txt"])
+    
+    @unittest.skipIf(pyarrow is None, "Parquet output requires pyarrow")
+    def test_parquet_parts_share_one_schema(self):
+        """A part holding only error rows should have the same schema as the others"""
+        output = os.path.join(self.root, "out.parquet")
+        writer = ParquetWriter(output, rows_per_part=1)
+        writer.write({"path": "a.txt", "status": "error", "detail": "boom"})
+        writer.write({
+            "path": "b.txt", "status": "success", "file_type": ".txt", "pages": 1, "text_length": 4,
+            "entities": {"dates": []}, "classification": {"document_type": "memo"}, "summary": {"summary": "x"}
+        })
+        writer.close()
+        
+        parts = sorted(os.listdir(output))
+        schemas = [pyarrow.parquet.read_schema(os.path.join(output, part)) for part in parts]
+        self.assertEqual(len(parts), 2)
+        self.assertTrue(all(schema.equals(writer.schema) for schema in schemas))
+        self.assertEqual(str(schemas[0].field("pages").type), "int64")
+        
+        table = pyarrow.parquet.read_table(output)
+        self.assertEqual(table.column("path").to_pylist(), ["a.txt", "b.txt"])
+        self.assertEqual(table.column("pages").to_pylist(), [None, 1])
+        
+        # Parts of earlier runs with inferred, null-typed columns are rewritten on resume
+        legacy = pyarrow.Table.from_pylist([dict(dict.fromkeys(ParquetWriter.COLUMNS), path="c.txt", status="success")])
+        pyarrow.parquet.write_table(legacy, os.path.join(output, "part-00002.parquet"))
+        resumed = ParquetWriter(output, rows_per_part=1)
+        self.assertEqual(resumed.recovered, ["b.txt", "c.txt"])
+        self.assertTrue(pyarrow.parquet.read_schema(os.path.join(output, "part-00002.parquet")).equals(writer.schema))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.utils.jobs import (
+    InMemoryJobStore, InvalidWebhookError, JOB_COMPLETED, JobQueue, JobQueueFullError, SQLiteJobStore,
+    job_priority, new_job, send_webhook, validate_webhook_url
+)
+
+class TestJobStores(unittest.TestCase):
+    def check_store(self, store):
+        job = new_job(filename="a.pdf", result={})
+        store.save(job)
+        self.assertEqual(store.get(job["id"]), job)
+        self.assertIsNone(store.get("missing"))
+        self.assertEqual([queued["id"] for queued in store.unfinished()], [job["id"]])
+        
+        job.update(status=JOB_COMPLETED, result={"summary": {"summary": "done"}})
+        store.save(job)
+        self.assertEqual(store.get(job["id"])["result"]["summary"]["summary"], "done")
+        self.assertEqual(store.unfinished(), [])
+    
+    def test_in_memory_store(self):
+        """Jobs should round-trip through the in-memory store"""
+        self.check_store(InMemoryJobStore())
+    
+    def test_sqlite_store_persists(self):
+        """Jobs should round-trip through SQLite and survive reopening the database"""
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "jobs.db")
+            self.check_store(SQLiteJobStore(db_path))
+            
+            job = new_job(filename="b.pdf")
+            SQLiteJobStore(db_path).save(job)
+            self.assertEqual(SQLiteJobStore(db_path).get(job["id"])["filename"], "b.pdf")
+
+class TestJobQueue(unittest.IsolatedAsyncioTestCase):
+    async def test_runs_jobs_in_priority_order(self):
+        """Urgent and small jobs should run first, and multi-step jobs are requeued"""
+        steps = []
+        remaining = {"large": 2}
+        done = asyncio.Event()
+        
+        async def handler(job_id):
+            steps.append(job_id)
+            if len(steps) == 5:
+                done.set()
+            if remaining.get(job_id, 1) > 1:
+                remaining[job_id] -= 1
+                return job_priority("low", 0)
+            return None
+        
+        queue = JobQueue(handler, workers=1, max_size=4)
+        queue.start()
+        # Queue everything before the worker gets to run
+        queue.submit("large", job_priority("medium", 5000))
+        queue.submit("small", job_priority("medium", 10))
+        queue.submit("urgent", job_priority("urgent", 9000))
+        queue.submit("low", job_priority("low", 1))
+        with self.assertRaises(JobQueueFullError):
+            queue.submit("extra", job_priority("low", 1))
+        
+        await asyncio.wait_for(done.wait(), 1)
+        await queue.stop()
+        self.assertEqual(steps, ["urgent", "small", "large", "large", "low"])
+
+def resolving(*addresses):
+    """Patch host resolution to return addresses."""
+    return mock.patch(
+        "app.utils.jobs.socket.getaddrinfo",
+        return_value=[(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, 0)) for address in addresses]
+    )
+
+class TestWebhooks(unittest.TestCase):
+    def test_only_http_urls_are_accepted(self):
+        """Webhooks should only call http and https URLs, on the allowed hosts when any are set"""
+        with resolving("93.184.216.34"):
+            self.assertEqual(validate_webhook_url("https://hooks.example.com/done"), "https://hooks.example.com/done")
+        validate_webhook_url("http://hooks.example.com:8080/done", ["Hooks.Example.com"])
+        
+        for url in ["file:///etc/passwd", "ftp://hooks.example.com/", "gopher://localhost:6379/", "http:///path"]:
+            with self.assertRaises(InvalidWebhookError):
+                validate_webhook_url(url)
+        with self.assertRaises(InvalidWebhookError):
+            validate_webhook_url("http://169.254.169.254/latest/meta-data", ["hooks.example.com"])
+    
+    def test_internal_addresses_are_refused(self):
+        """Without allowed hosts, hosts resolving to any non-public address should be refused"""
+        for address in ["127.0.0.1", "10.1.2.3", "192.168.0.10", "169.254.169.254", "0.0.0.0", "::1",
+                        "fe80::1", "fd00::1", "::ffff:127.0.0.1", "100.64.0.1", "240.0.0.1"]:
+            with resolving("93.184.216.34", address), self.assertRaises(InvalidWebhookError, msg=address):
+                validate_webhook_url("https://hooks.example.com/done")
+        
+        with mock.patch("app.utils.jobs.socket.getaddrinfo", side_effect=socket.gaierror("unknown host")):
+            with self.assertRaises(InvalidWebhookError):
+                validate_webhook_url("https://missing.example.com/done")
+        
+        # Allowed hosts are trusted without resolving them
+        with resolving("10.1.2.3"):
+            validate_webhook_url("http://hooks.internal/done", ["hooks.internal"])
+    
+    def test_invalid_urls_are_never_opened(self):
+        """send_webhook should refuse invalid URLs instead of opening them"""
+        with tempfile.NamedTemporaryFile() as file:
+            self.assertFalse(send_webhook("file://" + file.name, {"status": "completed"}))
+
+if __name__ == "__main__":
+    unittest.main()
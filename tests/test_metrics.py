@@ -0,0 +1,115 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import Settings
+from app.core.metrics import (
+    MetricsRegistry, end_request_timings, metrics, record_request_timing, server_timing_header,
+    start_request_timings
+)
+from app.models.registry import create_model_registry
+from app.models.stubs import stub_models
+from app.utils.batching import MicroBatcher
+from app.utils.synthetic import synthetic_text
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_histogram_renders_cumulative_buckets(self):
+        """Histograms should render cumulative buckets, count and sum in the Prometheus format"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("test_seconds", "Test latency", ["stage"], buckets=(0.1, 1))
+        registry.observe(histogram, 0.05, stage="extract")
+        registry.observe(histogram, 0.5, stage="extract")
+        registry.observe(histogram, 5, stage="extract")
+        
+        lines = registry.render().splitlines()
+        
+        self.assertEqual(lines[:2], ["# HELP test_seconds Test latency", "# TYPE test_seconds histogram"])
+        self.assertIn('test_seconds_bucket{stage="extract",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{stage="extract",le="1"} 2', lines)
+        self.assertIn('test_seconds_bucket{stage="extract",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_count{stage="extract"} 3', lines)
+        self.assertIn('test_seconds_sum{stage="extract"} 5.55', lines)
+    
+    def test_counters_and_gauges(self):
+        """Counters should add up per label set, gauges should be read at render time"""
+        registry = MetricsRegistry()
+        counter = registry.counter("test_requests", "Test requests", ["result"])
+        registry.inc(counter, result="hit")
+        registry.inc(counter, result="hit")
+        registry.gauge("test_depth", "Test depth", ["queue"], lambda: {("jobs",): 3})
+        
+        rendered = registry.render()
+        
+        self.assertIn('test_requests_total{result="hit"} 2', rendered)
+        self.assertIn('test_depth{queue="jobs"} 3', rendered)
+    
+    def test_disabled_registry_records_nothing(self):
+        """A disabled registry should hand out no-op timers and ignore observations"""
+        registry = MetricsRegistry(enabled=False)
+        histogram = registry.histogram("test_seconds", "Test latency")
+        
+        with registry.timer(histogram, "stage"):
+            pass
+        registry.observe(histogram, 1.0)
+        
+        self.assertNotIn("test_seconds_count", registry.render())
+
+class TestRequestTimings(unittest.TestCase):
+    def test_timers_add_to_the_current_request(self):
+        """Timers should record into the breakdown of the request being served only"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("test_seconds", "Test latency")
+        
+        with registry.timer(histogram, "outside"):
+            pass
+        timings, token = start_request_timings()
+        try:
+            with registry.timer(histogram, "extract"):
+                pass
+            record_request_timing("extract", 0.5)
+        finally:
+            end_request_timings(token)
+        
+        self.assertEqual(list(timings), ["extract"])
+        self.assertGreaterEqual(timings["extract"], 0.5)
+        self.assertEqual(server_timing_header({"extract": 0.0125}), "extract;dur=12.5")
+    
+    def test_batcher_reports_pipeline_time_to_submitting_request(self):
+        """Pipeline time of a micro-batch should reach the request that submitted its inputs"""
+        batcher = MicroBatcher(lambda items: items, max_wait_ms=1, name="test-batcher")
+        timings = {}
+        
+        def submit():
+            request_timings, token = start_request_timings()
+            batcher.submit(["a", "b"])
+            end_request_timings(token)
+            timings.update(request_timings)
+        
+        thread = threading.Thread(target=submit)
+        thread.start()
+        thread.join()
+        
+        self.assertIn("test-batcher", timings)
+
+class TestPipelineMetrics(unittest.TestCase):
+    def test_model_batches_record_input_tokens(self):
+        """Every model batcher should record its longest input in tokens as well as characters"""
+        text = synthetic_text(400, "report", 501)
+        with stub_models():
+            registry = create_model_registry(Settings(classifier_engine="nli", enabled_profiles="accurate"))
+            registry.get("extractor").extract_key_information(text)
+            registry.get("classifier").classify_document(text)
+            registry.get("summarizer").generate_summary(text)
+        
+        rendered = metrics.render()
+        for batcher in ("ner-batcher", "nli-batcher", "summary-batcher"):
+            self.assertIn(f'docintel_pipeline_input_tokens_count{{batcher="{batcher}"}}', rendered)
+            self.assertIn(f'docintel_pipeline_input_chars_count{{batcher="{batcher}"}}', rendered)
+        self.assertNotIn("docintel_pipeline_input_length", rendered)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.registry import ModelDisabledError, ModelRegistry, ModelSpec, UnknownProfileError
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.loads = []
+        
+        def factory():
+            self.loads.append("summarizer")
+            return object()
+        
+        self.registry = ModelRegistry(
+            [
+                ModelSpec("summarizer", factory, "summarizer-model"),
+                ModelSpec("classifier", object, "classifier-model")
+            ],
+            enabled=["summarizer"]
+        )
+    
+    def test_models_load_lazily_once(self):
+        """Concurrent first requests should load a model exactly once"""
+        self.assertEqual(self.registry.status()["summarizer"], "not_loaded")
+        self.assertTrue(self.registry.is_ready())
+        
+        threads = [threading.Thread(target=self.registry.get, args=("summarizer",)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(self.loads, ["summarizer"])
+        self.assertEqual(self.registry.status()["summarizer"], "ready")
+    
+    def test_disabled_models_are_never_loaded(self):
+        """Disabled models should raise without being loaded"""
+        self.assertEqual(self.registry.status()["classifier"], "disabled")
+        self.assertEqual(self.registry.model_id("classifier"), "classifier-model")
+        with self.assertRaises(ModelDisabledError):
+            self.registry.get("classifier")
+    
+    def test_readiness_waits_for_warmup(self):
+        """With warmup, the registry should only be ready once models are loaded"""
+        self.registry.warmup_started = True
+        self.assertFalse(self.registry.is_ready())
+        
+        self.registry.start_warmup().join()
+        
+        self.assertTrue(self.registry.is_ready())
+        self.assertEqual(self.loads, ["summarizer"])
+
+class TestModelProfiles(unittest.TestCase):
+    def test_profiles_share_identical_models(self):
+        """Profiles should load side by side, sharing models with the same id"""
+        loads = []
+        
+        def spec(profile, model_id):
+            return ModelSpec("summarizer", lambda: loads.append(model_id) or object(), model_id, profile=profile)
+        
+        registry = ModelRegistry(
+            [spec("fast", "distilbart"), spec("balanced", "bart"), spec("accurate", "bart")],
+            enabled=["summarizer"],
+            default_profile="accurate"
+        )
+        
+        self.assertIsNot(registry.get("summarizer", "fast"), registry.get("summarizer"))
+        self.assertIs(registry.get("summarizer", "balanced"), registry.get("summarizer", "accurate"))
+        self.assertEqual(loads, ["distilbart", "bart"])
+        self.assertEqual(registry.model_id("summarizer", "fast"), "distilbart")
+        self.assertEqual(registry.status()["summarizer:fast"], "ready")
+        
+        with self.assertRaises(UnknownProfileError):
+            registry.get("summarizer", "turbo")
+
+if __name__ == "__main__":
+    unittest.main()
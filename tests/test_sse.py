@@ -0,0 +1,46 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ui.sse import iter_server_sent_events
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+    
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.body.split("\\n"))
+
+class TestServerSentEvents(unittest.TestCase):
+    def test_events(self):
+        """Each blank-line terminated block should yield one decoded event"""
+        body = 'event: text\\ndata: {"text_length": 3}\\n\\nevent: done\\ndata: {"status": "success"}\\n\\n'
+        
+        self.assertEqual(
+            list(iter_server_sent_events(FakeResponse(body))),
+            [("text", {"text_length": 3}), ("done", {"status": "success"})]
+        )
+    
+    def test_multiline_data(self):
+        """Data lines of one event should be joined with newlines"""
+        body = 'event: summary\\ndata: {"summary":\\ndata:  "Short.",\\ndata: "seconds": 1}\\n\\n'
+        
+        self.assertEqual(
+            list(iter_server_sent_events(FakeResponse(body))),
+            [("summary", {"summary": "Short.", "seconds": 1})]
+        )
+    
+    def test_comments_and_default_event(self):
+        """Comments should be skipped and unnamed events called message"""
+        body = ': keep-alive\\n\\ndata: [1, 2]\\n\\ndata:"last"'
+        
+        self.assertEqual(
+            list(iter_server_sent_events(FakeResponse(body))),
+            [("message", [1, 2]), ("message", "last")]
+        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import contextlib
+import sys
+import unittest
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.summarizer import DocumentSummarizer
+from app.models.stubs import stub_models
+
+class TestDocumentSummarizer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Stub pipelines, so the chunk packing runs without downloading a model
+        cls.stubs = contextlib.ExitStack()
+        cls.stubs.enter_context(stub_models())
+        cls.summarizer = DocumentSummarizer()
+        
+        paragraph = (
+            "The company reported quarterly revenue of 4.2 million dollars, an increase of "
+            "twelve percent over the previous quarter. Operating costs remained flat while "
+            "the sales team expanded into two new regional markets. Management expects the "
+            "new product line to contribute to growth in the second half of the year. "
+        )
+        cls.long_text = paragraph * 60
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.stubs.close()
+    
+    def test_chunk_summaries_are_batched_in_order(self):
+        """Every chunk long enough to summarize should get exactly one summary"""
+        chunks = self.summarizer.chunk_text(self.long_text, max_chunk_size=400)
+        summaries = self.summarizer.summarize_chunks(chunks)
+        
+        self.assertEqual(len(summaries), len([c for c in chunks if len(c.split()) >= 50]))
+        self.assertTrue(all(len(summary) > 0 for summary in summaries))
+    
+    def test_hierarchical_summary(self):
+        """Hierarchical mode should produce a summary shorter than the document"""
+        result = self.summarizer.generate_summary(self.long_text, hierarchical=True)
+        
+        self.assertTrue(len(result["summary"]) > 0, "Should generate a summary")
+        self.assertLess(result["summary_length"], result["original_length"])
+    
+    def test_hybrid_selection_fits_model_input(self):
+        """Hybrid mode should select sentences by model tokens, not words"""
+        # Codes split into many tokens each, so the word count understates the input size
+        text = " ".join(
+            f"Shipment {i} was assigned tracking code QX{i}Z-99AB-KK31 and pallet 4471-{i:04d}-XY." for i in range(300)
+        )
+        selection = self.summarizer.hybrid_selection(text)
+        tokens = len(self.summarizer.input_tokenizer(selection, add_special_tokens=False)["input_ids"])
+        
+        self.assertLessEqual(len(selection.split()), self.summarizer.chunk_words)
+        self.assertLessEqual(tokens, self.summarizer.max_input_tokens)
+        self.assertGreater(tokens, self.summarizer.max_input_tokens // 2)
+        
+        result = self.summarizer.generate_summary(text, mode="hybrid")
+        self.assertTrue(result["summary"])
+    
+    def test_inputs_longer_than_the_model_are_truncated(self):
+        """A single input beyond the model input size should be truncated instead of failing"""
+        text = "Pallet 4471-2209-XY arrived. " * 400
+        
+        summary, = self.summarizer.summarize_texts([text], max_length=60, min_length=10)
+        
+        self.assertTrue(summary)
+
+if __name__ == "__main__":
+    unittest.main()
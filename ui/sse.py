@@ -0,0 +1,35 @@
+import json
+
+def iter_server_sent_events(response):
+    """
+    Yield (event, data) pairs from a server-sent events response.
+    
+    The data lines of an event are joined with newlines and decoded as JSON;
+    events without an ``event:`` field are named ``message``.
+    
+    Args:
+        response: Streaming response with an ``iter_lines`` method
+    
+    Returns:
+        Iterator of (event name, decoded data) tuples
+    """
+    event, data = None, []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data:
+                yield event or "message", json.loads("\n".join(data))
+            event, data = None, []
+        elif line.startswith(":"):
+            # Comment, used as a keep-alive
+            continue
+        else:
+            field, _, value = line.partition(":")
+            if value.startswith(" "):
+                value = value[1:]
+            if field == "event":
+                event = value
+            elif field == "data":
+                data.append(value)
+    
+    if data:
+        yield event or "message", json.loads("\n".join(data))
@@ -5,6 +5,8 @@ import pandas as pd
 import os
 from io import StringIO
 
+from sse import iter_server_sent_events
+
 # Set the API URL (change if deployed elsewhere)
 API_URL = "http://localhost:8000"
 
@@ -25,32 +27,74 @@ st.sidebar.title("Processing Options")
 extract_entities = st.sidebar.checkbox("Extract Entities", value=True)
 classify_document = st.sidebar.checkbox("Classify Document", value=True)
 summarize_document = st.sidebar.checkbox("Summarize Document", value=True)
+model_profile = st.sidebar.selectbox(
+    "Model Profile",
+    ["accurate", "balanced", "fast"],
+    help="Faster profiles use distilled models and skip the transformer NER pass"
+)
 
-# Process button
-process_clicked = st.sidebar.button("Process Document")
+# Process button, disabled until at least one stage is selected
+no_stage_selected = not (extract_entities or classify_document or summarize_document)
+process_clicked = st.sidebar.button("Process Document", disabled=no_stage_selected)
+if no_stage_selected:
+    st.sidebar.caption("Select at least one processing option.")
 
 if uploaded_file is not None and process_clicked:
-    st.info("Processing document... Please wait.")
+    status = st.info("Processing document... Please wait.")
+    progress = st.container()
     
-    # Determine which endpoint to use based on selections
-    if all([extract_entities, classify_document, summarize_document]):
-        endpoint = f"{API_URL}/process"
-    elif extract_entities and not classify_document and not summarize_document:
-        endpoint = f"{API_URL}/extract"
-    elif classify_document and not extract_entities and not summarize_document:
-        endpoint = f"{API_URL}/classify"
-    elif summarize_document and not extract_entities and not classify_document:
-        endpoint = f"{API_URL}/summarize"
-    else:
-        endpoint = f"{API_URL}/process"
+    # Only the selected stages run, concurrently on the server
+    stages = [
+        stage for stage, selected in [
+            ("extract", extract_entities),
+            ("classify", classify_document),
+            ("summarize", summarize_document)
+        ]
+        if selected
+    ]
+    endpoint = f"{API_URL}/process/stream"
     
     # Make API request
     files = {"file": (uploaded_file.name, uploaded_file, "multipart/form-data")}
     
     try:
-        response = requests.post(endpoint, files=files)
+        response = requests.post(
+            endpoint, files=files, data={"profile": model_profile, "stages": ",".join(stages)}, stream=True
+        )
         if response.status_code == 200:
-            result = response.json()
+            # Show every result as soon as the server sends it
+            result = {}
+            for event, data in iter_server_sent_events(response):
+                if event == "text_progress":
+                    status.info(f"Extracting text... {data['characters']:,} characters read")
+                elif event == "text":
+                    result.update(data)
+                    status.info(f"Text extracted: {data['text_length']} words. Analyzing...")
+                elif event == "entities":
+                    result["entities"] = data["entities"]
+                    found = sum(len(entities) for entities in data["entities"].values())
+                    progress.success(f"Entities: {found} found ({data['seconds']:.2f}s)")
+                elif event == "classification":
+                    result["classification"] = data["classification"]
+                    progress.success(
+                        f"Classification: {data['classification']['document_type']}, "
+                        f"{data['classification']['priority']} priority ({data['seconds']:.2f}s)"
+                    )
+                elif event == "summary_chunk":
+                    progress.caption(f"Section {data['index'] + 1}: {data['summary']}")
+                elif event == "summary":
+                    result["summary"] = data["summary"]
+                    progress.success(f"Summary ready ({data['seconds']:.2f}s)")
+                elif event == "error":
+                    progress.error(f"{data['stage']}: {data['detail']}")
+                elif event == "done":
+                    result["timings"] = data["timings"]
+            status.empty()
+            
+            if "timings" in result:
+                st.caption(" | ".join(
+                    f"{stage}: {seconds:.2f}s" for stage, seconds in result["timings"].items()
+                ))
             
             # Create tabs for different results
             tab1, tab2, tab3, tab4 = st.tabs(["Summary", "Classification", "Entities", "Raw JSON"])
@@ -107,6 +151,10 @@ if uploaded_file is not None and process_clicked:
                         "dates": "📅 Dates",
                         "monetary_values": "💰 Money",
                         "locations": "📍 Locations",
+                        "emails": "📧 Emails",
+                        "phone_numbers": "📞 Phone Numbers",
+                        "invoice_numbers": "🧾 Invoice Numbers",
+                        "percentages": "📊 Percentages",
                         "other_entities": "🔖 Other"
                     }
                     
@@ -116,7 +164,7 @@ if uploaded_file is not None and process_clicked:
                     # Display entities in each tab
                     for i, (key, label) in enumerate(entity_categories.items()):
                         with entity_tabs[i]:
-                            if result["entities"][key] and len(result["entities"][key]) > 0:
+                            if result["entities"].get(key):
                                 # Create a dataframe for the entities
                                 df = pd.DataFrame(result["entities"][key])
                                 st.dataframe(df)